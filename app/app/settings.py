@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/3.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -36,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -86,6 +89,31 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/ref/settings/#caches
+
+# Files shared by every worker of the host by default, so an invalidation
+# in one worker reaches all of them; point the workers of several hosts at
+# a shared server (e.g. memcached) instead
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'salesapp_cache')
+        ),
+    }
+}
+
+# Tests keep their cache in memory, apart from the running workers
+if sys.argv[1:2] == ['test']:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -129,7 +157,51 @@ STATIC_ROOT = '/vol/web/static'
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 100
 }
 
 AUTH_USER_MODEL = 'core.User'
+
+# Default minimum trigram similarity for `?fuzzy=` lookups
+FUZZY_SEARCH_THRESHOLD = 0.3
+
+# Per-worker LRU cache of product details looked up by code
+PRODUCT_CODE_CACHE_SIZE = 4096
+PRODUCT_CODE_CACHE_TIMEOUT = 60
+
+# Seconds subtracted from the `?updated_since=` high-water mark so rows
+# committed late by concurrent transactions are fetched on the next sync
+DELTA_SYNC_OVERLAP = 5
+
+# Seconds to wait after the last catalog write before rebuilding the
+# catalog snapshot under MEDIA_ROOT
+CATALOG_SNAPSHOT_DELAY = 10
+
+# Most seconds a rebuild of the catalog snapshot is put off by a steady
+# stream of writes
+CATALOG_SNAPSHOT_MAX_WAIT = 60
+
+# Largest payload accepted by the bulk product upsert endpoint
+PRODUCT_BULK_MAX_ROWS = 20000
+
+# Most lines of one purchase order
+PURCHASE_ORDER_MAX_LINES = 5000
+
+# Most lines accepted in one delivery by the receive products endpoint
+RECEIVE_PRODUCT_MAX_LINES = 5000
+
+# Rows fetched per round trip from the server-side cursor of CSV and
+# NDJSON exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Seconds the versioned unit and category caches are kept
+REFERENCE_CACHE_TIMEOUT = 300
+
+# Most counter rows the stock of a hot product can be spread over
+STOCK_MAX_SHARDS = 64
+
+# Seconds stock snapshots are taken behind the oldest open transaction,
+# so movements stamped before it began are committed by then
+STOCK_SNAPSHOT_LAG = 5
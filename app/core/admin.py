@@ -49,11 +49,17 @@ class BaseAttrAdmin(ModelAdmin):
         return False
 
 
+class ProductAdmin(BaseAttrAdmin):
+    """Product administration; stock moves through the stock ledger"""
+
+    readonly_fields = ['unit_in_stock']
+
+
 # Register
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Unit, BaseAttrAdmin)
 admin.site.register(models.Category, BaseAttrAdmin)
-admin.site.register(models.Product, BaseAttrAdmin)
+admin.site.register(models.Product, ProductAdmin)
 
 admin.site.register(models.Supplier, BaseAttrAdmin)
 admin.site.register(models.Customer, BaseAttrAdmin)
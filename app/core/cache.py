@@ -0,0 +1,56 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class ReferenceCache:
+    """
+    Versioned cache of a small, rarely changing table
+
+    Every key is namespaced by the current version of the table, so
+    `invalidate()` drops everything derived from the table at once by
+    moving to a new version; entries of old versions are never read again
+    and simply expire.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.prefix = f'reference:{model._meta.label_lower}'
+        self.version_key = f'{self.prefix}:version'
+
+    def version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+
+        return version
+
+    def invalidate(self):
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+
+    def get(self, key):
+        return cache.get(self._key(key))
+
+    def set(self, key, value):
+        cache.set(self._key(key), value, settings.REFERENCE_CACHE_TIMEOUT)
+
+    def get_or_set(self, key, default):
+        """Return the value of `key`, storing `default()` when missing"""
+
+        return cache.get_or_set(
+            self._key(key),
+            default,
+            settings.REFERENCE_CACHE_TIMEOUT
+        )
+
+    def instances(self):
+        """Return every row of the table keyed by primary key"""
+
+        return self.get_or_set('instances', self.model.objects.in_bulk)
+
+    def _key(self, key):
+        digest = hashlib.md5(str(key).encode()).hexdigest()
+        return f'{self.prefix}:{self.version()}:{digest}'
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product import prices
+
+
+class Command(BaseCommand):
+    """Django command to apply the scheduled prices that are due"""
+
+    help = 'Copy the scheduled prices that are due to their products'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Keep running, applying due prices every INTERVAL seconds'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+
+        interval = options['interval']
+        if interval is not None and interval < 1:
+            raise CommandError('--interval must be at least 1 second')
+
+        while True:
+            updated = prices.apply_due_prices()
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(updated)} product prices updated'
+            ))
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from customer.views import CustomerViewSet
+from product.views import ProductViewSet
+
+VIEWSETS = {
+    'products': ProductViewSet,
+    'customers': CustomerViewSet,
+}
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the serializer and `values()` list paths
+
+    Every list page is rendered to JSON in-process against the current
+    database, so the timings include the queries, serialization and
+    rendering but no network.
+    """
+
+    help = 'Benchmark the regular and fast paths of the list endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'lists',
+            nargs='*',
+            help='Lists to benchmark: ' + ', '.join(sorted(VIEWSETS))
+        )
+        parser.add_argument('--page-size', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+
+        # Never saved; only lets the request pass IsAuthenticated
+        user = get_user_model()(email='benchmark@localhost')
+        request = APIRequestFactory().get(
+            '/',
+            {'page_size': options['page_size']},
+            HTTP_HOST=next(
+                (host for host in settings.ALLOWED_HOSTS
+                 if host[:1] not in ('.', '*')),
+                'localhost'
+            )
+        )
+        force_authenticate(request, user=user)
+
+        names = options['lists'] or sorted(VIEWSETS)
+        unknown = set(names) - set(VIEWSETS)
+        if unknown:
+            raise CommandError('Unknown lists: ' + ', '.join(sorted(unknown)))
+
+        for name in names:
+            viewset = VIEWSETS[name]
+            regular = self._time(viewset, False, request, options['repeat'])
+            fast = self._time(viewset, True, request, options['repeat'])
+            self.stdout.write(
+                f'{name}: serializer {regular * 1000:.1f} ms, '
+                f'values() {fast * 1000:.1f} ms per page '
+                f'({regular / fast:.1f}x)'
+            )
+
+    def _time(self, viewset, fast_list, request, repeat):
+        """Return the best time of rendering one page"""
+
+        view = viewset.as_view({'get': 'list'}, fast_list=fast_list)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            view(request).render()
+            best = min(best, time.perf_counter() - start)
+
+        return best
@@ -0,0 +1,142 @@
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Product, StockMovement, Unit
+
+from product import stock
+
+MODES = ('naive', 'conditional', 'sharded')
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure concurrent sales of one product
+
+    Every terminal is a thread with its own database connection selling
+    one unit at a time. Each sale runs in a transaction that stays open
+    for `--hold` milliseconds after the decrement, like a checkout that
+    also writes its receipt, so sales of the same row queue on its lock.
+
+    - naive: read `unit_in_stock`, write it back minus one
+    - conditional: `stock.sell()` on the product row
+    - sharded: `stock.sell()` with the stock spread over `--shards` rows
+    """
+
+    help = 'Benchmark concurrent stock decrements of a hot product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--terminals',
+            type=int,
+            nargs='+',
+            default=[1, 2, 4, 8, 16]
+        )
+        parser.add_argument(
+            '--sales',
+            type=int,
+            default=100,
+            help='Sales per terminal'
+        )
+        parser.add_argument(
+            '--hold',
+            type=float,
+            default=5,
+            help='Milliseconds each sale transaction stays open'
+        )
+        parser.add_argument('--shards', type=int, default=16)
+        parser.add_argument(
+            '--modes',
+            nargs='+',
+            default=list(MODES),
+            help='Modes to run: ' + ', '.join(MODES)
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+
+        unknown = set(options['modes']) - set(MODES)
+        if unknown:
+            raise CommandError('Unknown modes: ' + ', '.join(sorted(unknown)))
+        if options['shards'] < 1:
+            raise CommandError('--shards must be at least 1')
+
+        unit = Unit.objects.order_by('pk').first()
+        if unit is None:
+            raise CommandError('Create a unit first')
+
+        product = Product.objects.create(
+            code=f'benchmark-{uuid.uuid4().hex}',
+            name='Stock benchmark',
+            unit=unit,
+            unit_price=1,
+            discount_percentage=0,
+            reorder_level=0,
+            is_active=False
+        )
+        try:
+            for mode in options['modes']:
+                for terminals in options['terminals']:
+                    self._run(product, mode, terminals, options)
+        finally:
+            StockMovement.objects.filter(product=product).delete()
+            product.delete()
+
+    def _run(self, product, mode, terminals, options):
+        sales = terminals * options['sales']
+        stock.shard_stock(product.id, 0)
+        Product.objects.filter(pk=product.pk).update(unit_in_stock=sales)
+        if mode == 'sharded':
+            stock.shard_stock(product.id, options['shards'])
+
+        sell = getattr(self, f'_sell_{mode}')
+        hold = options['hold'] / 1000
+        errors = []
+
+        def terminal():
+            try:
+                for _ in range(options['sales']):
+                    with transaction.atomic():
+                        sell(product.id)
+                        with connection.cursor() as cursor:
+                            cursor.execute('SELECT pg_sleep(%s)', [hold])
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=terminal) for _ in range(terminals)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if errors:
+            raise CommandError(f'{mode}: {errors[0]}')
+
+        left = stock.shard_stock(product.id, 0)
+        self.stdout.write(
+            f'{mode:>11} {terminals:>3} terminals: '
+            f'{sales / elapsed:8.1f} sales/s, '
+            f'{left:g} of {sales} units left'
+        )
+
+    def _sell_naive(self, product_id):
+        current = Product.objects \
+            .values_list('unit_in_stock', flat=True) \
+            .get(pk=product_id)
+        Product.objects \
+            .filter(pk=product_id) \
+            .update(unit_in_stock=current - 1)
+
+    def _sell_conditional(self, product_id):
+        stock.sell(product_id, 1)
+
+    _sell_sharded = _sell_conditional
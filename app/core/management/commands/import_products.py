@@ -0,0 +1,328 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Category, Unit
+
+from product import cache, facets, snapshot
+
+REQUIRED_COLUMNS = (
+    'code',
+    'name',
+    'unit',
+    'unit_in_stock',
+    'unit_price',
+    'discount_percentage',
+    'reorder_level',
+)
+
+TRUE_VALUES = ('1', 'true', 't', 'yes', 'y')
+
+CREATE_STAGING = """
+CREATE TEMPORARY TABLE import_product_staging (
+    line bigint NOT NULL,
+    code varchar(255) NOT NULL,
+    name varchar(255) NOT NULL,
+    unit_id integer NOT NULL,
+    unit_in_stock double precision NOT NULL,
+    unit_price numeric(12, 2) NOT NULL,
+    discount_percentage numeric(4, 2) NOT NULL,
+    reorder_level double precision NOT NULL,
+    on_sale boolean NOT NULL,
+    category_ids integer[]
+)
+"""
+
+COPY_STAGING = """
+COPY import_product_staging (
+    line, code, name, unit_id, unit_in_stock, unit_price,
+    discount_percentage, reorder_level, on_sale, category_ids
+) FROM STDIN WITH (FORMAT csv)
+"""
+
+# The last line wins when a code appears more than once in the file
+LATEST_ROWS = """
+CREATE TEMPORARY TABLE import_product_latest AS
+SELECT DISTINCT ON (code) *
+FROM import_product_staging
+ORDER BY code, line DESC
+"""
+
+# Lock the products the file counts, then record the differences between
+# the counts and their stock as adjustments before overwriting it
+LOCK_PRODUCTS = """
+SELECT core_product.id
+FROM core_product
+JOIN import_product_latest ON import_product_latest.code = core_product.code
+FOR UPDATE OF core_product
+"""
+
+COUNT_STOCK = """
+WITH counted AS (
+    SELECT
+        core_product.id,
+        import_product_latest.unit_in_stock - CASE
+            WHEN core_product.stock_shards = 0
+                THEN core_product.unit_in_stock
+            ELSE (
+                SELECT sum(quantity)
+                FROM core_stockshard
+                WHERE product_id = core_product.id
+            )
+        END AS difference
+    FROM core_product
+    JOIN import_product_latest
+        ON import_product_latest.code = core_product.code
+), recorded AS (
+    INSERT INTO core_stockmovement
+        (product_id, kind, quantity, note, created_at)
+    SELECT id, 'adjustment', difference, 'CSV import', now()
+    FROM counted
+    WHERE difference <> 0
+)
+-- The first shard of a hot product takes the difference
+UPDATE core_stockshard
+SET quantity = quantity + counted.difference
+FROM counted
+WHERE core_stockshard.product_id = counted.id
+    AND core_stockshard.shard = 0
+    AND counted.difference <> 0
+"""
+
+MERGE_PRODUCTS = """
+WITH merged AS (
+    INSERT INTO core_product (
+        code, name, unit_id, unit_in_stock, stock_shards, unit_price,
+        discount_percentage, reorder_level, on_sale, is_active,
+        created_at, updated_at
+    )
+    SELECT
+        code, name, unit_id, unit_in_stock, 0, unit_price,
+        discount_percentage, reorder_level, on_sale, true,
+        now(), now()
+    FROM import_product_latest
+    ON CONFLICT (code) DO UPDATE SET
+        name = EXCLUDED.name,
+        unit_id = EXCLUDED.unit_id,
+        unit_in_stock = EXCLUDED.unit_in_stock,
+        unit_price = EXCLUDED.unit_price,
+        discount_percentage = EXCLUDED.discount_percentage,
+        reorder_level = EXCLUDED.reorder_level,
+        on_sale = EXCLUDED.on_sale,
+        updated_at = EXCLUDED.updated_at
+    RETURNING id, unit_in_stock, (xmax = 0) AS inserted
+),
+opened AS (
+    INSERT INTO core_stockmovement
+        (product_id, kind, quantity, note, created_at)
+    SELECT id, 'adjustment', unit_in_stock, 'CSV import', now()
+    FROM merged
+    WHERE inserted AND unit_in_stock <> 0
+)
+SELECT
+    count(*) FILTER (WHERE inserted),
+    count(*) FILTER (WHERE NOT inserted)
+FROM merged
+"""
+
+DELETE_CATEGORIES = """
+DELETE FROM core_product_categories
+USING core_product, import_product_latest
+WHERE core_product_categories.product_id = core_product.id
+    AND core_product.code = import_product_latest.code
+"""
+
+INSERT_CATEGORIES = """
+INSERT INTO core_product_categories (product_id, category_id)
+SELECT DISTINCT core_product.id, category.id
+FROM import_product_latest
+JOIN core_product ON core_product.code = import_product_latest.code
+CROSS JOIN LATERAL unnest(import_product_latest.category_ids) AS category(id)
+"""
+
+DROP_STAGING = """
+DROP TABLE import_product_staging;
+DROP TABLE import_product_latest
+"""
+
+
+class Command(BaseCommand):
+    """
+    Django command to load products from a CSV file
+
+    Rows are streamed into a staging table with PostgreSQL COPY one batch
+    at a time, so memory use does not depend on the size of the file,
+    then merged into `core_product` by code in a single statement. The
+    stock column holds counts; their differences with the current stock
+    are recorded in the stock ledger.
+    """
+
+    help = 'Import products from a CSV file, updating existing codes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows sent per COPY batch'
+        )
+        parser.add_argument(
+            '--delimiter',
+            default=',',
+            help='CSV field delimiter'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+
+        self.units = self._name_map(Unit, 'name', 'short_name')
+        self.categories = self._name_map(Category, 'name')
+
+        try:
+            source = open(options['path'], newline='', encoding='utf-8')
+        except OSError as error:
+            raise CommandError(str(error))
+
+        with source, transaction.atomic(), connection.cursor() as cursor:
+            reader = csv.DictReader(source, delimiter=options['delimiter'])
+            missing = set(REQUIRED_COLUMNS) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(
+                    'Missing columns: ' + ', '.join(sorted(missing))
+                )
+            with_categories = 'categories' in reader.fieldnames
+
+            cursor.execute(CREATE_STAGING)
+            staged, skipped = self._stage(
+                cursor,
+                reader,
+                options['batch_size'],
+                with_categories
+            )
+
+            self.stdout.write(f'Merging {staged} rows...')
+            cursor.execute(LATEST_ROWS)
+            cursor.execute(LOCK_PRODUCTS)
+            cursor.execute(COUNT_STOCK)
+            cursor.execute(MERGE_PRODUCTS)
+            created, updated = cursor.fetchone()
+            if with_categories:
+                cursor.execute(DELETE_CATEGORIES)
+                cursor.execute(INSERT_CATEGORIES)
+            # Categories and is_active may both have changed the counts
+            facets.recount()
+            cursor.execute(DROP_STAGING)
+
+        cache.discard_all_products()
+        snapshot.schedule_rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created + updated} products '
+            f'({created} created, {updated} updated, {skipped} skipped)'
+        ))
+
+    def _name_map(self, model, *fields):
+        """Map the names of the rows of a small table to their ids"""
+
+        names = {}
+        for row in model.objects.values('id', *fields):
+            for field in fields:
+                names.setdefault(row[field], row['id'])
+
+        return names
+
+    def _stage(self, cursor, reader, batch_size, with_categories):
+        """COPY the valid rows into the staging table in batches"""
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        staged = skipped = pending = 0
+
+        for row in reader:
+            try:
+                record = self._record(reader.line_num, row, with_categories)
+            except (TypeError, ValueError) as error:
+                skipped += 1
+                self.stderr.write(f'Line {reader.line_num}: {error}')
+                continue
+
+            writer.writerow(record)
+            pending += 1
+            if pending == batch_size:
+                staged += self._copy(cursor, buffer, pending)
+                pending = 0
+                self.stdout.write(f'{staged} rows staged...')
+
+        staged += self._copy(cursor, buffer, pending)
+        return staged, skipped
+
+    def _copy(self, cursor, buffer, count):
+        if count:
+            buffer.seek(0)
+            cursor.copy_expert(COPY_STAGING, buffer)
+
+        buffer.seek(0)
+        buffer.truncate()
+        return count
+
+    def _record(self, line, row, with_categories):
+        """Convert a CSV row to a staging row or raise ValueError"""
+
+        code = (row['code'] or '').strip()
+        name = (row['name'] or '').strip()
+        if not code or not name:
+            raise ValueError('code and name are required')
+        if len(code) > 255 or len(name) > 255:
+            raise ValueError('code and name are limited to 255 characters')
+
+        unit_id = self.units.get((row['unit'] or '').strip())
+        if unit_id is None:
+            raise ValueError(f'unknown unit "{row["unit"]}"')
+
+        category_ids = None
+        if with_categories:
+            category_ids = []
+            for category in (row['categories'] or '').split('|'):
+                category = category.strip()
+                if not category:
+                    continue
+                if category not in self.categories:
+                    raise ValueError(f'unknown category "{category}"')
+                category_ids.append(self.categories[category])
+
+        return (
+            line,
+            code,
+            name,
+            unit_id,
+            self._float(row['unit_in_stock']),
+            self._decimal(row['unit_price'], 12),
+            self._decimal(row['discount_percentage'], 4),
+            self._float(row['reorder_level']),
+            (row.get('on_sale') or '').strip().lower() in TRUE_VALUES,
+            None if category_ids is None else
+            '{' + ','.join(map(str, category_ids)) + '}',
+        )
+
+    def _float(self, value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'invalid number "{value}"')
+
+    def _decimal(self, value, max_digits):
+        """Round to two places, as the decimal columns store them"""
+
+        try:
+            number = Decimal(value).quantize(Decimal('0.01'))
+        except (InvalidOperation, TypeError):
+            raise ValueError(f'invalid decimal "{value}"')
+        if not number.is_finite() or \
+                len(number.as_tuple().digits) > max_digits:
+            raise ValueError(f'decimal out of range "{value}"')
+
+        return number
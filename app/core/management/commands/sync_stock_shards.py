@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product import stock
+
+
+class Command(BaseCommand):
+    """Django command to refresh the stock of sharded products"""
+
+    help = 'Copy the shard totals of hot products to their unit_in_stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Keep running, refreshing the stock every INTERVAL seconds'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+
+        interval = options['interval']
+        if interval is not None and interval < 1:
+            raise CommandError('--interval must be at least 1 second')
+
+        while True:
+            updated = stock.sync_shards()
+            self.stdout.write(self.style.SUCCESS(
+                f'{updated} product stocks refreshed'
+            ))
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+
+from product import stock
+
+
+class Command(BaseCommand):
+    """Django command to snapshot the stock balances of the products"""
+
+    help = 'Snapshot the stock of the products moved since the last snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--at',
+            help='ISO 8601 time of the snapshot (default now)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Keep running, taking snapshots every INTERVAL seconds'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+
+        at = None
+        if options['at']:
+            try:
+                at = parse_datetime(options['at'])
+            except ValueError:
+                at = None
+            if at is None:
+                raise CommandError(f'Invalid time "{options["at"]}"')
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+
+        interval = options['interval']
+        if interval is not None and interval < 1:
+            raise CommandError('--interval must be at least 1 second')
+        if interval is not None and at is not None:
+            raise CommandError('--at cannot be used with --interval')
+
+        while True:
+            taken = stock.take_snapshots(at)
+            self.stdout.write(self.style.SUCCESS(
+                f'{taken} stock snapshots taken'
+            ))
+            if interval is None:
+                return
+            time.sleep(interval)
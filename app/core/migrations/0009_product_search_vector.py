@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:37
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION core_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.code, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF code, name ON core_product
+    FOR EACH ROW EXECUTE FUNCTION core_product_search_vector_update();
+
+UPDATE core_product SET search_vector =
+    setweight(to_tsvector('simple', coalesce(code, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(name, '')), 'B');
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS core_product_search_vector_trigger ON core_product;
+DROP FUNCTION IF EXISTS core_product_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_receiveproduct'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            SEARCH_VECTOR_TRIGGER,
+            DROP_SEARCH_VECTOR_TRIGGER
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the unique index concurrently, then attach the constraint to it
+    # so the table is never locked against writes for the whole build
+    atomic = False
+
+    dependencies = [
+        ('core', '0010_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY '
+                    '"core_product_code_c6a8505c_uniq" '
+                    'ON "core_product" ("code");',
+                    'DROP INDEX CONCURRENTLY IF EXISTS '
+                    '"core_product_code_c6a8505c_uniq";'
+                ),
+                migrations.RunSQL(
+                    'ALTER TABLE "core_product" '
+                    'ADD CONSTRAINT "core_product_code_c6a8505c_uniq" '
+                    'UNIQUE USING INDEX "core_product_code_c6a8505c_uniq";',
+                    'ALTER TABLE "core_product" '
+                    'DROP CONSTRAINT "core_product_code_c6a8505c_uniq";'
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='product',
+                    name='code',
+                    field=models.CharField(max_length=255, unique=True),
+                ),
+            ],
+        ),
+    ]
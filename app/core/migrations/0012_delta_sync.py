@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:44
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0011_product_code_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        AddIndexConcurrently(
+            model_name='category',
+            index=models.Index(fields=['updated_at', 'id'], name='category_updated_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customer',
+            index=models.Index(fields=['updated_at', 'id'], name='customer_updated_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'id'], name='product_updated_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='supplier',
+            index=models.Index(fields=['updated_at', 'id'], name='supplier_updated_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='unit',
+            index=models.Index(fields=['updated_at', 'id'], name='unit_updated_at_idx'),
+        ),
+    ]
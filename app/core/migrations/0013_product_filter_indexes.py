@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:03
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_delta_sync'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['unit_price', 'id'], name='product_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'on_sale', 'unit_price'], name='product_flags_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'unit_in_stock'], name='product_active_stock_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['unit', 'unit_price'], name='product_unit_price_idx'),
+        ),
+        # Category filters probe the M2M table by category; the table only
+        # has a (product_id, category_id) unique index for that
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+            '"core_product_categories_category_product_idx" '
+            'ON "core_product_categories" ("category_id", "product_id")',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS '
+            '"core_product_categories_category_product_idx"',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0013_product_filter_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('unit_in_stock__lte', django.db.models.expressions.F('reorder_level'))), fields=['name', 'id'], name='product_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_product_low_stock_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryProductCount',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='product_count', serialize=False, to='core.category')),
+                ('product_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(
+            '''
+            INSERT INTO core_categoryproductcount (category_id, product_count)
+            SELECT core_category.id, count(core_product.id)
+            FROM core_category
+            LEFT JOIN core_product_categories
+                ON core_product_categories.category_id = core_category.id
+            LEFT JOIN core_product
+                ON core_product.id = core_product_categories.product_id
+                AND core_product.is_active
+            GROUP BY core_category.id
+            ''',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
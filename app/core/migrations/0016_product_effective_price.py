@@ -0,0 +1,59 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:11
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+EFFECTIVE_PRICE_TRIGGER = """
+CREATE FUNCTION core_product_effective_price_update() RETURNS trigger AS $$
+BEGIN
+    NEW.effective_price :=
+        round(NEW.unit_price * (100 - NEW.discount_percentage) / 100, 2);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_product_effective_price_trigger
+    BEFORE INSERT OR UPDATE OF unit_price, discount_percentage
+    ON core_product
+    FOR EACH ROW EXECUTE FUNCTION core_product_effective_price_update();
+
+UPDATE core_product SET effective_price =
+    round(unit_price * (100 - discount_percentage) / 100, 2);
+"""
+
+DROP_EFFECTIVE_PRICE_TRIGGER = """
+DROP TRIGGER IF EXISTS core_product_effective_price_trigger ON core_product;
+DROP FUNCTION IF EXISTS core_product_effective_price_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0015_category_product_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.RunSQL(
+            EFFECTIVE_PRICE_TRIGGER,
+            DROP_EFFECTIVE_PRICE_TRIGGER
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=12),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='product_effective_price_idx'),
+        ),
+    ]
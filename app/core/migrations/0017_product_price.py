@@ -0,0 +1,87 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:13
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+PRICE_HISTORY_TRIGGER = """
+CREATE FUNCTION core_product_price_history() RETURNS trigger AS $$
+BEGIN
+    -- Scheduled prices applied by the price job are already recorded
+    IF current_setting('core.applying_prices', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE'
+            AND NEW.unit_price = OLD.unit_price
+            AND NEW.discount_percentage = OLD.discount_percentage THEN
+        RETURN NULL;
+    END IF;
+
+    -- Close the price in effect and record the new one until the next
+    -- scheduled change
+    DELETE FROM core_productprice
+    WHERE product_id = NEW.id AND lower(valid_during) = now();
+    UPDATE core_productprice
+    SET valid_during = tstzrange(lower(valid_during), now())
+    WHERE product_id = NEW.id AND valid_during @> now();
+    INSERT INTO core_productprice
+        (product_id, unit_price, discount_percentage, valid_during,
+         created_at)
+    SELECT NEW.id, NEW.unit_price, NEW.discount_percentage,
+        tstzrange(now(), min(lower(valid_during))), now()
+    FROM core_productprice
+    WHERE product_id = NEW.id AND lower(valid_during) > now();
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_product_price_history_trigger
+    AFTER INSERT OR UPDATE OF unit_price, discount_percentage
+    ON core_product
+    FOR EACH ROW EXECUTE FUNCTION core_product_price_history();
+
+INSERT INTO core_productprice
+    (product_id, unit_price, discount_percentage, valid_during, created_at)
+SELECT id, unit_price, discount_percentage, tstzrange(created_at, NULL),
+    now()
+FROM core_product;
+"""
+
+DROP_PRICE_HISTORY_TRIGGER = """
+DROP TRIGGER IF EXISTS core_product_price_history_trigger ON core_product;
+DROP FUNCTION IF EXISTS core_product_price_history();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_product_effective_price'),
+    ]
+
+    operations = [
+        # The exclusion constraint compares the integer product id with `=`
+        BtreeGistExtension(),
+        migrations.CreateModel(
+            name='ProductPrice',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('discount_percentage', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('valid_during', django.contrib.postgres.fields.ranges.DateTimeRangeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prices', to='core.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='productprice',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('product', '='), ('valid_during', '&&')], name='product_price_no_overlap'),
+        ),
+        migrations.RunSQL(
+            PRICE_HISTORY_TRIGGER,
+            DROP_PRICE_HISTORY_TRIGGER
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:36
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0019_stock_shards'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='receiveproduct',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['purchase_order'], include=('quantity',), name='receive_product_po_qty_idx'),
+        ),
+    ]
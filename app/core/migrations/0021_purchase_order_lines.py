@@ -0,0 +1,98 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Every single product order becomes an order with one line
+COPY_LINES = """
+INSERT INTO core_purchaseorderline
+    (purchase_order_id, product_id, quantity, unit_price, sub_total)
+SELECT id, product_id, quantity, unit_price, sub_total
+FROM core_purchaseorder;
+
+UPDATE core_purchaseorder SET total = sub_total;
+"""
+
+# Orders keep their first line when migrating back
+RESTORE_LINES = """
+UPDATE core_purchaseorder
+SET product_id = line.product_id,
+    quantity = line.quantity,
+    unit_price = line.unit_price,
+    sub_total = line.sub_total
+FROM (
+    SELECT DISTINCT ON (purchase_order_id) *
+    FROM core_purchaseorderline
+    ORDER BY purchase_order_id, id
+) AS line
+WHERE line.purchase_order_id = core_purchaseorder.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_receive_product_po_qty_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderLine',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.FloatField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('sub_total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, to='core.product')),
+                ('purchase_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='core.purchaseorder')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='purchaseorderline',
+            constraint=models.UniqueConstraint(fields=('purchase_order', 'product'), name='purchase_order_line_product'),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.RESTRICT, to='core.product'),
+        ),
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='quantity',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='sub_total',
+            field=models.DecimalField(decimal_places=2, max_digits=12, null=True),
+        ),
+        # The columns are nullable while the data moves, so that migrating
+        # back can restore them before they become NOT NULL again
+        migrations.RunSQL(COPY_LINES, RESTORE_LINES),
+        migrations.RemoveField(
+            model_name='purchaseorder',
+            name='product',
+        ),
+        migrations.RemoveField(
+            model_name='purchaseorder',
+            name='quantity',
+        ),
+        migrations.RemoveField(
+            model_name='purchaseorder',
+            name='unit_price',
+        ),
+        migrations.RemoveField(
+            model_name='purchaseorder',
+            name='sub_total',
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:42
+
+from django.contrib.postgres.operations import (AddIndexConcurrently,
+                                                RemoveIndexConcurrently)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0021_purchase_order_lines'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='receiveproduct',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['purchase_order', 'product'], include=('quantity',), name='receive_product_po_line_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='receiveproduct',
+            name='receive_product_po_qty_idx',
+        ),
+    ]
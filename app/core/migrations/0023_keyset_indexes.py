@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-17 02:28
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0022_receive_product_po_line_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='category',
+            index=models.Index(fields=['name', 'id'], name='category_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customer',
+            index=models.Index(fields=['name', 'id'], name='customer_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['name', 'id'], name='product_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='purchaseorder',
+            index=models.Index(fields=['created_at', 'id'], name='purchase_order_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='receiveproduct',
+            index=models.Index(fields=['created_at', 'id'], name='receive_product_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='supplier',
+            index=models.Index(fields=['name', 'id'], name='supplier_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='unit',
+            index=models.Index(fields=['name', 'id'], name='unit_name_idx'),
+        ),
+    ]
@@ -0,0 +1,521 @@
+import hashlib
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import (http_date, parse_etags,
+                               parse_http_date_safe, quote_etag)
+from django.utils.text import slugify
+from rest_framework import fields, relations, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from core.renderers import CSVRenderer, NDJSONRenderer, RowRenderer
+
+
+class CachedListMixin:
+    """
+    Serve the list action from the `ReferenceCache` in `list_cache`
+
+    The rendered data and its validators are cached per version of the
+    table and full URL, so repeated and conditional list requests do not
+    reach the database until the table changes. Goes before
+    `ConditionalGetMixin`, whose validators it caches.
+    """
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        if self.list_cache is None:
+            return super().list(request, *args, **kwargs)
+
+        key = (request.build_absolute_uri(), request.accepted_renderer.format)
+        cached = self.list_cache.get(key)
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            if isinstance(response, Response) and \
+                    response.status_code == status.HTTP_200_OK:
+                self.list_cache.set(key, (
+                    response.data,
+                    response.get('ETag'),
+                    response.get('Last-Modified')
+                ))
+            return response
+
+        data, etag, last_modified = cached
+        timestamp = parse_http_date_safe(last_modified or '')
+        if self._not_modified(
+                request,
+                etag,
+                timestamp and datetime.fromtimestamp(timestamp, timezone.utc)
+        ):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+
+        if etag is not None:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = last_modified
+
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve with strong ETag and Last-Modified validators
+
+    The validators come from one aggregate over the filtered queryset
+    (latest `updated_at` and row count), so a client that already holds
+    the current representation gets `304 Not Modified` without anything
+    being serialized.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def get_validator_queryset(self):
+        """Return the rows the response of the action is rendered from"""
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+
+        return queryset.order_by()
+
+    def get_validator_aggregates(self):
+        """Return the aggregates that change whenever the response does"""
+
+        return {
+            'last_modified': Max('updated_at'),
+            'count': Count('pk', distinct=True)
+        }
+
+    def get_validators(self, request):
+        """Return the ETag and last modified time of the response"""
+
+        aggregates = self.get_validator_queryset().aggregate(
+            **self.get_validator_aggregates()
+        )
+        last_modified = max(
+            (value for key, value in aggregates.items()
+             if key.startswith('last_modified') and value is not None),
+            default=None
+        )
+
+        key = '|'.join([
+            request.get_full_path(),
+            request.accepted_renderer.media_type,
+            *(str(aggregates[name]) for name in sorted(aggregates))
+        ])
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+        return etag, last_modified
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+
+        if self._not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(
+                    last_modified.timestamp()
+                )
+
+        return response
+
+    def _not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or etag in etags
+
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        if if_modified_since is None or last_modified is None:
+            return False
+
+        return int(last_modified.timestamp()) <= if_modified_since
+
+
+class DeltaSyncMixin:
+    """
+    Incremental sync of a list through `?updated_since=<timestamp>`
+
+    Rows changed at or after the timestamp are returned oldest change
+    first, deactivated rows as `{"id": ..., "is_active": false}`
+    tombstones. `high_water_mark` is the `updated_since` to send once the
+    last page has been read; it trails the newest change by
+    `DELTA_SYNC_OVERLAP` so rows committed late are not missed.
+    """
+
+    def list(self, request, *args, **kwargs):
+        updated_since = request.query_params.get('updated_since')
+        if updated_since is None:
+            return super().list(request, *args, **kwargs)
+
+        since = self._parse_timestamp(updated_since)
+        queryset = self.filter_queryset(self.get_queryset()) \
+            .filter(updated_at__gte=since) \
+            .order_by('updated_at', 'id')
+
+        latest = queryset.aggregate(latest=Max('updated_at'))['latest']
+        high_water_mark = since
+        if latest is not None:
+            overlap = timedelta(seconds=settings.DELTA_SYNC_OVERLAP)
+            high_water_mark = max(since, latest - overlap)
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        data = self.get_delta_data(rows)
+
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response({'results': data})
+        response.data['high_water_mark'] = high_water_mark.isoformat()
+
+        return response
+
+    def get_delta_data(self, rows):
+        """Serialize active rows and turn inactive ones into tombstones"""
+
+        active = [row for row in rows if getattr(row, 'is_active', True)]
+        serialized = iter(self.get_serializer(active, many=True).data)
+
+        return [
+            next(serialized) if getattr(row, 'is_active', True)
+            else {'id': row.pk, 'is_active': False}
+            for row in rows
+        ]
+
+    def _parse_timestamp(self, value):
+        try:
+            timestamp = parse_datetime(value)
+        except ValueError:
+            timestamp = None
+        if timestamp is None:
+            raise ValidationError(
+                {'updated_since': 'Enter a valid ISO 8601 timestamp.'}
+            )
+
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp, timezone.utc)
+
+        return timestamp
+
+
+class FieldSelectionMixin:
+    """
+    Sparse fieldsets on reads through `?fields=a,b` or `?omit=a,b`
+
+    Only the selected fields are rendered and only the columns they are
+    read from are loaded (`QuerySet.only()`); prefetches of relations
+    that are not rendered are dropped.
+    """
+    field_selection_actions = ('list', 'retrieve')
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_field_selection())
+
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.get_field_selection():
+            return queryset
+
+        return self._select_columns(queryset)
+
+    def get_field_selection(self):
+        """Return the `fields`/`omit` serializer kwargs of the request"""
+
+        if self.action not in self.field_selection_actions:
+            return {}
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = self._parse_field_selection()
+
+        return self._field_selection
+
+    def _parse_field_selection(self):
+        available = self.get_serializer_class()().fields
+        selection = {}
+        for param in ('fields', 'omit'):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+
+            names = [name.strip() for name in value.split(',') if name]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise ValidationError(
+                    {param: [f'Unknown field "{name}".' for name in unknown]}
+                )
+            selection[param] = names
+
+        return selection
+
+    def _select_columns(self, queryset):
+        model = queryset.model
+        serializer = self.get_serializer_class()(
+            **self.get_field_selection()
+        )
+
+        columns = set()
+        relations = set()
+        for field in serializer.fields.values():
+            source = field.source.split('.')[0]
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                # Rendered from a property or the whole object; its
+                # dependencies are unknown, so load every column
+                return queryset
+
+            relations.add(source)
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(source)
+
+        # Keyset pagination reads the ordering fields of the last row,
+        # delta sync reads `is_active`, and joined relations must stay
+        # loaded
+        ordering = [
+            name.lstrip('-') for name in queryset.query.order_by
+            if isinstance(name, str)
+        ]
+        if isinstance(queryset.query.select_related, dict):
+            ordering.extend(queryset.query.select_related)
+        for name in (*ordering, 'is_active'):
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(name)
+
+        lookups = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, 'prefetch_through', lookup).split('__')[0]
+            in relations
+        ]
+
+        return queryset \
+            .only(*columns) \
+            .prefetch_related(None) \
+            .prefetch_related(*lookups)
+
+
+class FastListMixin:
+    """
+    Read-only fast path for the list action
+
+    Rows are fetched with `values()` and rendered by converters derived
+    once per request from the list serializer, instead of running
+    `to_representation()` of every field of every model instance. The
+    response has the same shape; lists whose serializer renders fields
+    the fast path does not know take the regular path.
+    """
+    fast_list = False
+
+    # Field types whose database values are already their representation
+    PLAIN_FIELDS = (
+        fields.BooleanField,
+        fields.CharField,
+        fields.FloatField,
+        fields.IntegerField,
+        relations.PrimaryKeyRelatedField,
+    )
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_fast_list_plan() if self.fast_list else None
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = [
+            name.lstrip('-') for name in queryset.query.order_by
+            if isinstance(name, str)
+        ]
+        columns = {column for _, column, _ in plan if column is not None}
+        queryset = queryset \
+            .prefetch_related(None) \
+            .values(*columns.union(ordering, ['id']))
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        data = self._render_values(plan, rows, queryset.model)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def get_fast_list_plan(self):
+        """
+        Return `(name, column, converter)` for every rendered field, with
+        a `None` column for many-to-many primary keys, or `None` when a
+        field cannot be rendered from `values()`
+        """
+        model = self.get_queryset().model
+        plan = []
+        for name, field in self.get_serializer().fields.items():
+            if field.write_only:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+
+            if isinstance(field, relations.ManyRelatedField):
+                if not isinstance(field.child_relation,
+                                  relations.PrimaryKeyRelatedField) or \
+                        field.child_relation.pk_field is not None or \
+                        not model_field.many_to_many:
+                    return None
+                plan.append((name, None, model_field))
+            elif isinstance(field, relations.PrimaryKeyRelatedField) and \
+                    field.pk_field is not None:
+                return None
+            elif isinstance(field, self.PLAIN_FIELDS):
+                plan.append((name, field.source, None))
+            elif isinstance(field, fields.DecimalField) and \
+                    not field.localize:
+                plan.append((name, field.source, self._decimal(field)))
+            elif isinstance(field, (fields.DateField, fields.DateTimeField)):
+                plan.append((name, field.source, field.to_representation))
+            else:
+                return None
+
+        return plan
+
+    def _decimal(self, field):
+        # The column has the scale of the field, so quantize() is a no-op
+        coerce_to_string = getattr(
+            field,
+            'coerce_to_string',
+            api_settings.COERCE_DECIMAL_TO_STRING
+        )
+        if coerce_to_string:
+            return '{:f}'.format
+        return None
+
+    def _render_values(self, plan, rows, model):
+        ids = [row['id'] for row in rows]
+        many = {
+            name: self._related_ids(model_field, ids)
+            for name, column, model_field in plan if column is None
+        }
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in plan:
+                if column is None:
+                    item[name] = many[name].get(row['id'], [])
+                    continue
+                value = row[column]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+
+        return data
+
+    def _related_ids(self, model_field, ids):
+        """Map each id to the primary keys related through `model_field`"""
+
+        through = model_field.remote_field.through
+        pairs = through.objects \
+            .filter(**{f'{model_field.m2m_field_name()}_id__in': ids}) \
+            .order_by('pk') \
+            .values_list(
+                f'{model_field.m2m_field_name()}_id',
+                f'{model_field.m2m_reverse_field_name()}_id'
+            )
+
+        related = {}
+        for source_id, target_id in pairs:
+            related.setdefault(source_id, []).append(target_id)
+
+        return related
+
+
+class ExportMixin:
+    """
+    Stream the whole filtered list as CSV or NDJSON
+
+    Selected with `?format=csv` / `?format=ndjson` or the matching Accept
+    header. Rows are read from a server-side cursor and rendered one chunk
+    at a time, so memory use stays flat and the first bytes are sent
+    before the query has been read to the end.
+    """
+    renderer_classes = (
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        CSVRenderer,
+        NDJSONRenderer
+    )
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, RowRenderer):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            self._export(renderer, queryset),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        filename = slugify(queryset.model._meta.verbose_name_plural)
+        response['Content-Disposition'] = \
+            f'attachment; filename="{filename}.{renderer.format}"'
+
+        return response
+
+    def get_export_fields(self):
+        """Return the serializer fields written to the export"""
+
+        return [
+            name for name, field in self.get_serializer().fields.items()
+            if not field.write_only
+        ]
+
+    def _export(self, renderer, queryset):
+        fields = self.get_export_fields()
+        yield renderer.render_header(fields)
+
+        # iterator() skips prefetch_related(), so the lookups are applied
+        # to each chunk instead
+        lookups = queryset._prefetch_related_lookups
+        rows = queryset.prefetch_related(None).iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == settings.EXPORT_CHUNK_SIZE:
+                yield self._render_chunk(renderer, chunk, lookups, fields)
+                chunk = []
+        if chunk:
+            yield self._render_chunk(renderer, chunk, lookups, fields)
+
+    def _render_chunk(self, renderer, chunk, lookups, fields):
+        prefetch_related_objects(chunk, *lookups)
+        data = self.get_serializer(chunk, many=True).data
+
+        return renderer.render_rows(data, fields)
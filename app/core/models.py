@@ -1,4 +1,11 @@
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.db import models
+from django.utils import timezone
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
 
@@ -82,6 +89,19 @@ class Unit(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the list, ordered with an id tiebreaker
+            models.Index(
+                fields=['name', 'id'],
+                name='unit_name_idx'
+            ),
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='unit_updated_at_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -95,20 +115,45 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the list, ordered with an id tiebreaker
+            models.Index(
+                fields=['name', 'id'],
+                name='category_name_idx'
+            ),
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='category_updated_at_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+# Active products at or below their reorder level
+LOW_STOCK = models.Q(
+    is_active=True,
+    unit_in_stock__lte=models.F('reorder_level')
+)
+
+
 class Product(models.Model):
     """Product in store"""
 
-    code = models.CharField(max_length=255)
+    code = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
-    unit_in_stock = models.FloatField()
+    # Balance of the stock movements, only changed by `F()` updates; for
+    # products with stock shards a cache of their sum
+    unit_in_stock = models.FloatField(default=0)
+    # Number of `StockShard` rows holding the stock of a hot product
+    stock_shards = models.PositiveSmallIntegerField(default=0)
     unit_price = models.DecimalField(max_digits=12, decimal_places=2)
     discount_percentage = models.DecimalField(max_digits=4, decimal_places=2)
     reorder_level = models.FloatField()
     on_sale = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
 
     unit = models.ForeignKey(
         'Unit',
@@ -116,12 +161,247 @@ class Product(models.Model):
     )
     categories = models.ManyToManyField('Category')
 
+    # Maintained by a database trigger from `code` and `name`
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Price after discount, maintained by a database trigger from
+    # `unit_price` and `discount_percentage` so it can be sorted and
+    # filtered on in SQL
+    effective_price = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        editable=False
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the list, ordered with an id tiebreaker
+            models.Index(
+                fields=['name', 'id'],
+                name='product_name_idx'
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='product_search_vector_gin'
+            ),
+            GinIndex(
+                fields=['name'],
+                name='product_name_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
+            GinIndex(
+                fields=['code'],
+                name='product_code_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='product_updated_at_idx'
+            ),
+            # Predicates of the product list filters
+            models.Index(
+                fields=['unit_price', 'id'],
+                name='product_price_idx'
+            ),
+            models.Index(
+                fields=['is_active', 'on_sale', 'unit_price'],
+                name='product_flags_price_idx'
+            ),
+            models.Index(
+                fields=['is_active', 'unit_in_stock'],
+                name='product_active_stock_idx'
+            ),
+            models.Index(
+                fields=['unit', 'unit_price'],
+                name='product_unit_price_idx'
+            ),
+            models.Index(
+                fields=['effective_price', 'id'],
+                name='product_effective_price_idx'
+            ),
+            # Only the few rows to reorder, in the order they are listed
+            models.Index(
+                fields=['name', 'id'],
+                name='product_low_stock_idx',
+                condition=LOW_STOCK
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Same rounding as the trigger, so the saved instance already
+        # holds the stored value
+        discounted = Decimal(str(self.unit_price)) * \
+            (100 - Decimal(str(self.discount_percentage))) / 100
+        self.effective_price = discounted.quantize(
+            Decimal('0.01'),
+            rounding=ROUND_HALF_UP
+        )
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never write back a stock balance read before a concurrent
+            # stock movement
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and
+                field.name not in ('unit_in_stock', 'stock_shards')
+            ]
+        super().save(*args, **kwargs)
+
+
+class ProductPrice(models.Model):
+    """
+    Price of a product during a period; past, current and scheduled
+    prices of a product never overlap
+    """
+
+    product = models.ForeignKey(
+        'Product',
+        on_delete=models.CASCADE,
+        related_name='prices'
+    )
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2)
+    discount_percentage = models.DecimalField(max_digits=4, decimal_places=2)
+    # `[valid from, valid to)`, unbounded above until the next change
+    valid_during = DateTimeRangeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Backed by a GiST index on (product, valid_during), which also
+            # serves point-in-time lookups
+            ExclusionConstraint(
+                name='product_price_no_overlap',
+                expressions=[
+                    ('product', RangeOperators.EQUAL),
+                    ('valid_during', RangeOperators.OVERLAPS),
+                ]
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id}: {self.unit_price}'
+
+
+class StockMovement(models.Model):
+    """Change of the stock of a product; rows are never updated"""
+
+    RECEIPT = 'receipt'
+    SALE = 'sale'
+    ADJUSTMENT = 'adjustment'
+    RETURN = 'return'
+    KINDS = (
+        (RECEIPT, 'Receipt'),
+        (SALE, 'Sale'),
+        (ADJUSTMENT, 'Adjustment'),
+        (RETURN, 'Return'),
+    )
+
+    product = models.ForeignKey(
+        'Product',
+        on_delete=models.RESTRICT,
+        related_name='stock_movements'
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    # Positive into the stock, negative out of it
+    quantity = models.FloatField()
+    note = models.CharField(max_length=255, blank=True)
+
+    user = models.ForeignKey(
+        'User',
+        null=True,
+        on_delete=models.SET_NULL
+    )
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['product', 'created_at'],
+                name='stock_movement_product_idx'
+            ),
+            models.Index(
+                fields=['created_at'],
+                name='stock_movement_created_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.quantity:+g} of {self.product_id}'
+
+
+class StockShard(models.Model):
+    """
+    Part of the stock of a hot product, so that concurrent sales decrement
+    different rows instead of queueing on the lock of the product row
+    """
+
+    product = models.ForeignKey(
+        'Product',
+        on_delete=models.CASCADE,
+        related_name='stock_shard_set'
+    )
+    shard = models.PositiveSmallIntegerField()
+    quantity = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'shard'],
+                name='stock_shard_product_shard'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id}#{self.shard}: {self.quantity:g}'
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock balance of a product at `taken_at`, counting the movements
+    created up to then
+    """
+
+    product = models.ForeignKey(
+        'Product',
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots'
+    )
+    balance = models.FloatField()
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'taken_at'],
+                name='stock_snapshot_product_taken_at'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id} at {self.taken_at}: {self.balance:g}'
+
+
+class CategoryProductCount(models.Model):
+    """Number of products in a category, kept up to date incrementally"""
+
+    category = models.OneToOneField(
+        'Category',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='product_count'
+    )
+    product_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.category_id}: {self.product_count}'
+
 
 class Supplier(models.Model):
     """Supplier of product"""
@@ -136,6 +416,19 @@ class Supplier(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the list, ordered with an id tiebreaker
+            models.Index(
+                fields=['name', 'id'],
+                name='supplier_name_idx'
+            ),
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='supplier_updated_at_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -153,21 +446,41 @@ class Customer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the list, ordered with an id tiebreaker
+            models.Index(
+                fields=['name', 'id'],
+                name='customer_name_idx'
+            ),
+            GinIndex(
+                fields=['name'],
+                name='customer_name_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
+            GinIndex(
+                fields=['contact_no'],
+                name='customer_contact_no_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
+            GinIndex(
+                fields=['email'],
+                name='customer_email_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='customer_updated_at_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
 class PurchaseOrder(models.Model):
-    """Purchase order of products"""
+    """Purchase order of products from a supplier"""
 
-    product = models.ForeignKey(
-        'Product',
-        on_delete=models.RESTRICT
-    )
-
-    quantity = models.FloatField()
-    unit_price = models.DecimalField(max_digits=12, decimal_places=2)
-    sub_total = models.DecimalField(max_digits=12, decimal_places=2)
     required_date = models.DateField()
     is_cancelled = models.BooleanField(default=False)
 
@@ -176,13 +489,56 @@ class PurchaseOrder(models.Model):
         on_delete=models.RESTRICT
     )
 
+    # Sum of the sub totals of the lines
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the list, ordered with an id tiebreaker
+            models.Index(
+                fields=['created_at', 'id'],
+                name='purchase_order_created_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'PO#{self.id}'
 
 
+class PurchaseOrderLine(models.Model):
+    """Product ordered on a purchase order"""
+
+    purchase_order = models.ForeignKey(
+        'PurchaseOrder',
+        on_delete=models.CASCADE,
+        related_name='lines'
+    )
+
+    product = models.ForeignKey(
+        'Product',
+        on_delete=models.RESTRICT
+    )
+
+    quantity = models.FloatField()
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2)
+    sub_total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            # Receipts find their line by order and product
+            models.UniqueConstraint(
+                fields=['purchase_order', 'product'],
+                name='purchase_order_line_product'
+            ),
+        ]
+
+    def __str__(self):
+        return f'PO#{self.purchase_order_id}: {self.product_id}'
+
+
 class ReceiveProduct(models.Model):
     """Receive products"""
     product = models.ForeignKey(
@@ -210,5 +566,22 @@ class ReceiveProduct(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the list, ordered with an id tiebreaker
+            models.Index(
+                fields=['created_at', 'id'],
+                name='receive_product_created_idx'
+            ),
+            # Sums the received quantity of a purchase order, or of one
+            # of its lines, from the index alone
+            models.Index(
+                fields=['purchase_order', 'product'],
+                include=['quantity'],
+                condition=models.Q(is_cancelled=False),
+                name='receive_product_po_line_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'RP#{self.id}'
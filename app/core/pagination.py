@@ -0,0 +1,184 @@
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.utils.urls import remove_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a composite keyset
+
+    The ordering is taken from the queryset (e.g. `name` or `-created_at`)
+    and `id` is appended as a tiebreaker. The cursor stores the full
+    ordering key of the boundary row, so every page is fetched with a
+    `WHERE (key) > (position)` predicate instead of an OFFSET and deep
+    pages cost the same as the first one.
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        """Return the queryset ordering with an `id` tiebreaker"""
+
+        ordering = tuple(
+            field for field in queryset.query.order_by
+            if isinstance(field, str)
+        ) or tuple(self.ordering)
+
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            tiebreaker = '-id' if ordering[-1].startswith('-') else 'id'
+            ordering += (tiebreaker,)
+
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a single page of results using the keyset predicate"""
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            reverse, position = False, None
+        else:
+            reverse, position = self.cursor.reverse, self.cursor.position
+
+        if reverse:
+            queryset = queryset.order_by(*self._reverse(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            position = self._to_python(queryset, position)
+            queryset = queryset.filter(self._after(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+
+        return self.page
+
+    def get_next_link(self):
+        """Return the link to the page after the current one"""
+
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        position = self._get_position_from_instance(
+            self.page[-1], self.ordering
+        )
+        return self.encode_cursor(Cursor(0, False, position))
+
+    def get_previous_link(self):
+        """Return the link to the page before the current one"""
+
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        position = self._get_position_from_instance(
+            self.page[0], self.ordering
+        )
+        return self.encode_cursor(Cursor(0, True, position))
+
+    def decode_cursor(self, request):
+        """Decode the cursor and its composite position"""
+
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(0, cursor.reverse, position)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                value = getattr(instance, name)
+            values.append(str(value))
+
+        return json.dumps(values)
+
+    def _to_python(self, queryset, position):
+        """
+        Convert the position decoded from the cursor to the types of the
+        ordering fields, so a tampered cursor is not found rather than
+        failing the query
+        """
+        values = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            if name in queryset.query.annotations:
+                model_field = queryset.query.annotations[name].output_field
+            elif name == 'pk':
+                model_field = queryset.model._meta.pk
+            else:
+                model_field = queryset.model._meta.get_field(name)
+
+            try:
+                value = model_field.to_python(value)
+                model_field.run_validators(value)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+
+        return values
+
+    def _after(self, position, reverse):
+        """
+        Build the row-value comparison `(a, b, ...) > (x, y, ...)`
+        honouring the direction of each ordering field
+        """
+        clauses = []
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = '{}__{}'.format(name, 'lt' if descending else 'gt')
+
+            equal = {
+                prefix.lstrip('-'): value
+                for prefix, value in zip(self.ordering[:index], position)
+            }
+            clauses.append(Q(**equal) & Q(**{lookup: position[index]}))
+
+        return reduce(operator.or_, clauses)
+
+    def _reverse(self, ordering):
+        return tuple(
+            field[1:] if field.startswith('-') else '-' + field
+            for field in ordering
+        )
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class RowRenderer(BaseRenderer):
+    """
+    Base renderer for export formats written one batch of rows at a time
+
+    `render_header()` and `render_rows()` let a streaming response emit
+    the document incrementally; `render()` covers ordinary responses such
+    as errors or a single object.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows and isinstance(rows[0], dict) else []
+
+        return self.render_header(fields) + self.render_rows(rows, fields)
+
+    def render_header(self, fields):
+        return b''
+
+    def render_rows(self, rows, fields):
+        raise NotImplementedError('render_rows() must be implemented.')
+
+
+class CSVRenderer(RowRenderer):
+    """Render rows as comma separated values with a header line"""
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_header(self, fields):
+        return self._write([fields])
+
+    def render_rows(self, rows, fields):
+        return self._write(
+            [self._cell(row.get(field)) for field in fields] for row in rows
+        )
+
+    def _write(self, lines):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(lines)
+
+        return buffer.getvalue().encode(self.charset)
+
+    def _cell(self, value):
+        if value is None:
+            return ''
+        # Nested objects, such as the lines of an order, are kept as JSON
+        if isinstance(value, dict) or (
+            isinstance(value, (list, tuple)) and
+            any(isinstance(item, (dict, list, tuple)) for item in value)
+        ):
+            return json.dumps(value, cls=JSONEncoder)
+        if isinstance(value, (list, tuple)):
+            return '|'.join(str(item) for item in value)
+
+        return value
+
+
+class NDJSONRenderer(RowRenderer):
+    """Render rows as newline delimited JSON, one object per line"""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render_rows(self, rows, fields):
+        encoder = JSONEncoder(ensure_ascii=False)
+
+        return ''.join(
+            encoder.encode(row) + '\n' for row in rows
+        ).encode(self.charset)
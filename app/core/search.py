@@ -0,0 +1,62 @@
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast, Greatest
+from rest_framework.exceptions import ValidationError
+
+# Default of `pg_trgm.similarity_threshold`, which `%` compares against
+TRIGRAM_THRESHOLD = 0.3
+
+
+def similarity_threshold(request):
+    """Return the `similarity` query param or the configured default"""
+
+    value = request.query_params.get(
+        'similarity',
+        settings.FUZZY_SEARCH_THRESHOLD
+    )
+    try:
+        threshold = float(value)
+    except (TypeError, ValueError):
+        threshold = None
+
+    if threshold is None or not 0 <= threshold <= 1:
+        raise ValidationError(
+            {'similarity': 'Must be a number between 0 and 1.'}
+        )
+
+    return threshold
+
+
+def fuzzy_search(queryset, fields, text, threshold):
+    """
+    Filter rows where any of the fields is trigram-similar to the text,
+    most similar first
+
+    The `%` operator is what the `gin_trgm_ops` indexes serve, but it
+    compares against the `pg_trgm.similarity_threshold` setting of the
+    connection, which is left alone. The similarity is compared to the
+    threshold itself, and `%` narrows the rows through the indexes
+    whenever the threshold is at least the default of that setting.
+    """
+    similarities = [TrigramSimilarity(field, text) for field in fields]
+    if len(similarities) > 1:
+        similarity = Greatest(*similarities)
+    else:
+        similarity = similarities[0]
+
+    # similarity() returns a real; widen it so the value round-trips
+    # exactly through the pagination cursor
+    queryset = queryset \
+        .annotate(similarity=Cast(similarity, FloatField())) \
+        .filter(similarity__gte=threshold)
+
+    if threshold >= TRIGRAM_THRESHOLD:
+        queryset = queryset.filter(reduce(operator.or_, (
+            Q(**{f'{field}__trigram_similar': text}) for field in fields
+        )))
+
+    return queryset.order_by('-similarity')
@@ -0,0 +1,166 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin that renders a subset of the declared fields
+
+    `fields` keeps only the named fields and `omit` drops the named ones,
+    e.g. `ProductSerializer(products, many=True, fields=['id', 'name'])`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        omit = kwargs.pop('omit', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in omit or ():
+            self.fields.pop(name, None)
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """Many relation that reports every id that fails, not just the first"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, (str, dict)) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        values = []
+        errors = []
+        for item in data:
+            try:
+                values.append(self.child_relation.to_internal_value(item))
+            except serializers.ValidationError as error:
+                errors.extend(error.detail)
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return values
+
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key relation resolved with one `pk__in` query for all the ids
+    the payload sends to the field, instead of one query per id
+
+    The ids are gathered from the initial data of the root serializer,
+    so a field inside a list of lines or of a `many=True` serializer is
+    resolved once for the whole payload. `many=True` reports every
+    unknown id.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        pk = self._to_pk(data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        gathered = self._gathered()
+        if gathered is None or pk not in gathered[0]:
+            # Not found where the payload was searched, e.g. form data
+            return super().to_internal_value(data)
+
+        instance = gathered[1].get(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+
+        return instance
+
+    def _to_pk(self, value):
+        if isinstance(value, bool):
+            return None
+        try:
+            return self.get_queryset().model._meta.pk.to_python(value)
+        except (TypeError, ValueError, DjangoValidationError):
+            return None
+
+    def _gathered(self):
+        """
+        Return the ids sent to this field across the payload and their
+        instances keyed by pk, or None without a payload to search
+        """
+        root = self.root
+        if root is self or not hasattr(root, 'initial_data'):
+            return None
+
+        gathered = root.__dict__.setdefault('_batched_relations', {})
+        if self not in gathered:
+            pks = {
+                pk for pk in map(self._to_pk, self._payload_values(root))
+                if pk is not None
+            }
+            gathered[self] = (pks, self.get_queryset().in_bulk(pks))
+
+        return gathered[self]
+
+    def _payload_values(self, root):
+        # Path from the root to this field, `None` standing for the items
+        # of a list
+        path = []
+        node = self
+        while node.parent is not None:
+            if isinstance(node.parent, (serializers.ListSerializer,
+                                        serializers.ManyRelatedField)):
+                path.append(None)
+            else:
+                path.append(node.field_name)
+            node = node.parent
+
+        values = [root.initial_data]
+        for key in reversed(path):
+            if key is None:
+                values = [
+                    item for value in values
+                    if isinstance(value, (list, tuple))
+                    for item in value
+                ]
+            else:
+                values = [
+                    value[key] for value in values
+                    if isinstance(value, dict) and key in value
+                ]
+
+        return values
+
+
+class CachedPrimaryKeyRelatedField(BatchedPrimaryKeyRelatedField):
+    """
+    Primary key relation validated against a `ReferenceCache` of the
+    related table instead of one query per value
+    """
+
+    def __init__(self, reference, **kwargs):
+        self.reference = reference
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        return self.reference.model.objects.all()
+
+    def to_internal_value(self, data):
+        pk = self._to_pk(data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        instance = self.reference.instances().get(pk)
+        if instance is None:
+            # Possibly saved through another worker since the table was
+            # cached, which only dropped the cache of that worker
+            instance = super().to_internal_value(data)
+            self.reference.invalidate()
+
+        return instance
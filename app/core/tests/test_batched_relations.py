@@ -0,0 +1,108 @@
+from django.http import QueryDict
+from django.test import TestCase
+
+from rest_framework import serializers
+
+from core.models import Category, Unit
+from core.serializers import BatchedPrimaryKeyRelatedField
+
+from product.serializers import ProductSerializer
+
+
+class ItemSerializer(serializers.Serializer):
+    unit = BatchedPrimaryKeyRelatedField(queryset=Unit.objects.all())
+    categories = BatchedPrimaryKeyRelatedField(
+        many=True,
+        queryset=Category.objects.all()
+    )
+
+
+class BatchedRelationTests(TestCase):
+    """Test resolving primary key relations for a whole payload"""
+
+    def setUp(self):
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.categories = [
+            Category.objects.create(name=f'Category {index}')
+            for index in range(20)
+        ]
+        self.category_ids = [category.id for category in self.categories]
+
+    def test_many_ids_one_query(self):
+        """Test that the ids of a many relation take one query"""
+
+        serializer = ItemSerializer(data={
+            'unit': self.unit.id,
+            'categories': self.category_ids
+        })
+
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(
+            serializer.validated_data['categories'],
+            self.categories
+        )
+        self.assertEqual(serializer.validated_data['unit'], self.unit)
+
+    def test_list_payload_one_query_per_field(self):
+        """Test that the ids of every item of a list are fetched together"""
+
+        items = [
+            {'unit': self.unit.id, 'categories': [pk]}
+            for pk in self.category_ids
+        ]
+        serializer = ItemSerializer(data=items, many=True)
+
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(
+            [item['categories'][0] for item in serializer.validated_data],
+            self.categories
+        )
+
+    def test_error_per_id(self):
+        """Test that every unknown id of a many relation is reported"""
+
+        missing = self.category_ids[-1] + 1
+        serializer = ItemSerializer(data={
+            'unit': str(self.unit.id),
+            'categories': [missing, self.category_ids[0], missing + 1, 'x']
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(len(serializer.errors['categories']), 3)
+        self.assertIn(str(missing), serializer.errors['categories'][0])
+        self.assertNotIn('unit', serializer.errors)
+
+    def test_form_data(self):
+        """Test that ids missing from the gathered payload still resolve"""
+
+        data = QueryDict(mutable=True)
+        data['unit'] = str(self.unit.id)
+        data.setlist('categories', [str(pk) for pk in self.category_ids[:2]])
+        serializer = ItemSerializer(data=data)
+
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(
+            serializer.validated_data['categories'],
+            self.categories[:2]
+        )
+
+    def test_cached_relation_error_per_id(self):
+        """Test that cached many relations also report every unknown id"""
+
+        missing = self.category_ids[-1] + 1
+        serializer = ProductSerializer(data={
+            'code': '8001',
+            'name': 'Ginebra',
+            'unit': self.unit.id,
+            'categories': [missing, missing + 1],
+            'unit_price': '100.00',
+            'discount_percentage': '0.00',
+            'reorder_level': 5
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(len(serializer.errors['categories']), 2)
@@ -1,9 +1,20 @@
+import tempfile
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.models import (Category, Unit, Product, ProductPrice,
+                         StockMovement, StockSnapshot)
+
+from product import cache as product_cache, stock
+
 
 class CommandTests(TestCase):
 
@@ -23,3 +34,306 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+
+class ImportProductsCommandTests(TestCase):
+    """Test the CSV product import command"""
+
+    HEADER = (
+        'code,name,unit,unit_in_stock,unit_price,discount_percentage,'
+        'reorder_level,on_sale,categories\n'
+    )
+
+    def setUp(self):
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.liquor = Category.objects.create(name='Liquor')
+        self.gin = Category.objects.create(name='Gin')
+
+    def _import(self, content, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write(content)
+            source.flush()
+            stdout, stderr = StringIO(), StringIO()
+            call_command(
+                'import_products',
+                source.name,
+                *args,
+                stdout=stdout,
+                stderr=stderr
+            )
+
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_creates_and_updates(self):
+        """Test that new codes are inserted and existing ones updated"""
+
+        existing = Product.objects.create(
+            code='9001',
+            name='Old name',
+            unit=self.unit,
+            unit_in_stock=1,
+            unit_price=1,
+            discount_percentage=0,
+            reorder_level=1
+        )
+        existing.categories.add(self.liquor)
+
+        stdout, _ = self._import(
+            self.HEADER +
+            '9001,Ginebra,btl,100,95.50,0,10,yes,Gin\n'
+            '9002,Tanduay,bottle,50,120,5,10,no,Liquor|Gin\n'
+        )
+
+        self.assertIn('1 created, 1 updated, 0 skipped', stdout)
+        existing.refresh_from_db()
+        self.assertEqual(existing.name, 'Ginebra')
+        self.assertEqual(existing.unit_price, Decimal('95.50'))
+        self.assertTrue(existing.on_sale)
+        self.assertEqual(list(existing.categories.all()), [self.gin])
+
+        created = Product.objects.get(code='9002')
+        self.assertEqual(created.unit, self.unit)
+        self.assertFalse(created.on_sale)
+        self.assertEqual(
+            set(created.categories.all()),
+            {self.liquor, self.gin}
+        )
+
+    def test_import_records_stock_counts(self):
+        """Test that the stock counts of the file enter the ledger"""
+
+        existing = Product.objects.create(
+            code='9001',
+            name='Ginebra',
+            unit=self.unit,
+            unit_price=1,
+            discount_percentage=0,
+            reorder_level=1
+        )
+        StockMovement.objects.create(
+            product=existing,
+            kind=StockMovement.RECEIPT,
+            quantity=30
+        )
+        Product.objects.filter(pk=existing.pk).update(unit_in_stock=30)
+
+        self._import(
+            self.HEADER +
+            '9001,Ginebra,btl,28,95.50,0,10,yes,Gin\n'
+            '9002,Tanduay,bottle,50,120,5,10,no,Liquor\n'
+        )
+
+        self.assertEqual(
+            list(
+                StockMovement.objects
+                .order_by('id')
+                .values_list('product__code', 'kind', 'quantity')
+            ),
+            [
+                ('9001', 'receipt', 30),
+                ('9001', 'adjustment', -2),
+                ('9002', 'adjustment', 50),
+            ]
+        )
+
+    def test_import_evicts_product_lookups_of_every_worker(self):
+        """Test that the import moves the shared lookup generation"""
+
+        generation = cache.get(product_cache.PRODUCTS_KEY)
+
+        self._import(self.HEADER + '9001,Ginebra,btl,100,95.50,0,10,yes,\n')
+
+        self.assertNotEqual(
+            cache.get(product_cache.PRODUCTS_KEY),
+            generation
+        )
+
+    def test_import_skips_invalid_rows(self):
+        """Test that rows with unknown names or bad numbers are skipped"""
+
+        stdout, stderr = self._import(
+            self.HEADER +
+            '9001,Ginebra,crate,100,95.50,0,10,yes,\n'
+            '9002,Tanduay,btl,50,abc,0,10,no,\n'
+            '9003,Emperador,btl,50,99,0,10,no,Brandy\n'
+            '9004,Alfonso,btl,50,99,0,10,no,\n'
+            '9005,Fundador,btl\n'
+        )
+
+        self.assertIn('1 created, 0 updated, 4 skipped', stdout)
+        self.assertIn('Line 2', stderr)
+        self.assertIn('Line 6: invalid number "None"', stderr)
+        self.assertEqual(
+            list(Product.objects.values_list('code', flat=True)),
+            ['9004']
+        )
+
+    def test_import_last_duplicate_wins_across_batches(self):
+        """Test that the last row of a repeated code is kept"""
+
+        rows = ''.join(
+            f'{9000 + index % 3},Product {index},btl,{index},10,0,1,no,\n'
+            for index in range(7)
+        )
+
+        stdout, _ = self._import(self.HEADER + rows, '--batch-size', '2')
+
+        self.assertIn('4 rows staged', stdout)
+        self.assertEqual(
+            dict(Product.objects.values_list('code', 'name')),
+            {
+                '9000': 'Product 6',
+                '9001': 'Product 4',
+                '9002': 'Product 5',
+            }
+        )
+
+    def test_import_without_categories_column(self):
+        """Test that categories are kept when the column is absent"""
+
+        product = Product.objects.create(
+            code='9001',
+            name='Ginebra',
+            unit=self.unit,
+            unit_in_stock=1,
+            unit_price=1,
+            discount_percentage=0,
+            reorder_level=1
+        )
+        product.categories.add(self.liquor)
+
+        self._import(
+            'code,name,unit,unit_in_stock,unit_price,discount_percentage,'
+            'reorder_level\n'
+            '9001,Ginebra,btl,5,10,0,1\n'
+        )
+
+        self.assertEqual(list(product.categories.all()), [self.liquor])
+
+    def test_import_missing_columns(self):
+        """Test that a file without the required columns is rejected"""
+
+        with self.assertRaises(CommandError):
+            self._import('code,name\n9001,Ginebra\n')
+
+
+class ApplyPriceChangesCommandTests(TestCase):
+    """Test applying the scheduled prices that are due"""
+
+    def test_apply_due_prices(self):
+        """Test that products take the price in effect now"""
+
+        unit = Unit.objects.create(name='bottle', short_name='btl')
+        product = Product.objects.create(
+            code='9001',
+            name='Ginebra',
+            unit=unit,
+            unit_in_stock=1,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=1
+        )
+        ProductPrice.objects \
+            .filter(product=product) \
+            .update(unit_price=75, discount_percentage=20)
+        out = StringIO()
+
+        call_command('apply_price_changes', stdout=out)
+        call_command('apply_price_changes', stdout=out)
+
+        product.refresh_from_db()
+        self.assertEqual(product.unit_price, Decimal('75.00'))
+        self.assertEqual(product.effective_price, Decimal('60.00'))
+        self.assertEqual(product.prices.count(), 1)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ['1 product prices updated', '0 product prices updated']
+        )
+
+
+class TakeStockSnapshotsCommandTests(TestCase):
+    """Test snapshotting the stock balances"""
+
+    def test_take_snapshots(self):
+        """Test that moved products are snapshotted at the given time"""
+
+        unit = Unit.objects.create(name='bottle', short_name='btl')
+        product = Product.objects.create(
+            code='9001',
+            name='Ginebra',
+            unit=unit,
+            unit_price=1,
+            discount_percentage=0,
+            reorder_level=1
+        )
+        StockMovement.objects.create(
+            product=product,
+            kind=StockMovement.RECEIPT,
+            quantity=30,
+            created_at=datetime(2021, 5, 17, tzinfo=timezone.utc)
+        )
+        out = StringIO()
+
+        call_command(
+            'take_stock_snapshots',
+            '--at', '2021-06-01T00:00:00+00:00',
+            stdout=out
+        )
+
+        self.assertIn('1 stock snapshots taken', out.getvalue())
+        self.assertEqual(
+            StockSnapshot.objects.get(product=product).balance,
+            30
+        )
+
+    def test_invalid_time(self):
+        """Test that a malformed --at is rejected"""
+
+        with self.assertRaises(CommandError):
+            call_command('take_stock_snapshots', '--at', 'yesterday')
+
+    @patch('time.sleep', side_effect=KeyboardInterrupt)
+    def test_interval(self, ts):
+        """Test that snapshots keep being taken every interval"""
+
+        with self.assertRaises(KeyboardInterrupt):
+            call_command(
+                'take_stock_snapshots',
+                '--interval', '900',
+                stdout=StringIO()
+            )
+
+        ts.assert_called_once_with(900)
+        with self.assertRaises(CommandError):
+            call_command('take_stock_snapshots', '--interval', '0')
+
+
+class SyncStockShardsCommandTests(TestCase):
+    """Test refreshing the stock of sharded products"""
+
+    def test_sync_shards(self):
+        """Test that sharded products take the sum of their shards"""
+
+        unit = Unit.objects.create(name='bottle', short_name='btl')
+        product = Product.objects.create(
+            code='9001',
+            name='Ginebra',
+            unit=unit,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=1
+        )
+        stock.record_movement(product.id, StockMovement.RECEIPT, 8)
+        stock.shard_stock(product.id, 2)
+        stock.sell(product.id, 3)
+        out = StringIO()
+
+        call_command('sync_stock_shards', stdout=out)
+        call_command('sync_stock_shards', stdout=out)
+
+        product.refresh_from_db()
+        self.assertEqual(product.unit_in_stock, 5)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ['1 product stocks refreshed', '0 product stocks refreshed']
+        )
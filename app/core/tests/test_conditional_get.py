@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product, Supplier
+
+PRODUCTS_URL = reverse('product:product-list')
+SUPPLIERS_URL = reverse('supplier:supplier-list')
+
+
+def product_detail_url(product_id):
+    """Return product detail URL"""
+
+    return reverse('product:product-detail', args=[product_id])
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling of read endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier202@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+        self.unit = Unit.objects.create(name='box', short_name='bx')
+        self.product = Product.objects.create(
+            code='7001',
+            name='Nova',
+            unit=self.unit,
+            unit_in_stock=100,
+            unit_price=30,
+            discount_percentage=0,
+            reorder_level=20
+        )
+
+    def test_list_sends_validators(self):
+        """Test that a list response carries an ETag and Last-Modified"""
+
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+    def test_list_not_modified(self):
+        """Test that a matching If-None-Match answers 304"""
+
+        etag = self.client.get(PRODUCTS_URL)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_list_modified_after_write(self):
+        """Test that updating a row changes the ETag"""
+
+        etag = self.client.get(PRODUCTS_URL)['ETag']
+        self.product.name = 'Nova Cheddar'
+        self.product.save()
+
+        res = self.client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_etag_depends_on_query(self):
+        """Test that filtered lists get their own ETag"""
+
+        etag = self.client.get(PRODUCTS_URL)['ETag']
+
+        res = self.client.get(
+            PRODUCTS_URL,
+            {'unit': self.unit.id},
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_if_modified_since(self):
+        """Test that If-Modified-Since answers 304 when nothing changed"""
+
+        last_modified = self.client.get(PRODUCTS_URL)['Last-Modified']
+
+        res = self.client.get(
+            PRODUCTS_URL,
+            HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_after_category_change(self):
+        """Test that the product detail ETag follows its categories"""
+
+        url = product_detail_url(self.product.id)
+        etag = self.client.get(url)['ETag']
+        self.product.categories.add(Category.objects.create(name='Chips'))
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['categories']), 1)
+
+    def test_detail_modified_after_unit_change(self):
+        """Test that the product detail ETag follows its unit"""
+
+        url = product_detail_url(self.product.id)
+        etag = self.client.get(url)['ETag']
+        self.unit.name = 'pack'
+        self.unit.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_supplier_list_not_modified(self):
+        """Test conditional GET on the supplier list"""
+
+        Supplier.objects.create(
+            code='0001',
+            name='Jeza',
+            contact_no='1010',
+            address='Central Balili, LTB',
+            email='testsupp@testdev.com'
+        )
+        etag = self.client.get(SUPPLIERS_URL)['ETag']
+
+        res = self.client.get(SUPPLIERS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
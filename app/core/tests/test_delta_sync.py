@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product, Customer
+
+UNITS_URL = reverse('product:unit-list')
+PRODUCTS_URL = reverse('product:product-list')
+CUSTOMERS_URL = reverse('customer:customer-list')
+
+PAST = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+
+def sample_product(unit, **params):
+    defaults = {
+        'code': '000101',
+        'name': 'Ginebra',
+        'unit_in_stock': 100,
+        'unit_price': 100,
+        'discount_percentage': 0,
+        'reorder_level': 50
+    }
+    defaults.update(params)
+
+    return Product.objects.create(unit=unit, **defaults)
+
+
+@override_settings(DELTA_SYNC_OVERLAP=5)
+class DeltaSyncTests(TestCase):
+    """Test `?updated_since=` incremental sync of list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier203@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+    def test_only_changed_rows_returned(self):
+        """Test that rows not changed since the timestamp are left out"""
+
+        old = Unit.objects.create(name='box', short_name='bx')
+        Unit.objects.filter(pk=old.pk).update(updated_at=PAST)
+        new = Unit.objects.create(name='pack', short_name='pk')
+
+        since = PAST + timedelta(days=1)
+        res = self.client.get(UNITS_URL, {'updated_since': since.isoformat()})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [new.id])
+
+    def test_deactivated_rows_are_tombstones(self):
+        """Test that inactive rows are returned as tombstones"""
+
+        unit = Unit.objects.create(name='box', short_name='bx')
+        customer = Customer.objects.create(
+            code='150',
+            name='Gone customer',
+            contact_no='32152',
+            address='New street'
+        )
+        customer.is_active = False
+        customer.save()
+
+        res = self.client.get(CUSTOMERS_URL, {
+            'updated_since': PAST.isoformat()
+        })
+
+        self.assertEqual(
+            res.data['results'],
+            [{'id': customer.id, 'is_active': False}]
+        )
+
+        product = sample_product(unit)
+        product.is_active = False
+        product.save()
+
+        res = self.client.get(PRODUCTS_URL, {
+            'updated_since': PAST.isoformat()
+        })
+
+        self.assertEqual(
+            res.data['results'],
+            [{'id': product.id, 'is_active': False}]
+        )
+
+    def test_high_water_mark(self):
+        """Test the high-water mark trails the newest change"""
+
+        unit = Unit.objects.create(name='box', short_name='bx')
+        unit.refresh_from_db()
+
+        res = self.client.get(UNITS_URL, {'updated_since': PAST.isoformat()})
+
+        expected = unit.updated_at - timedelta(seconds=5)
+        self.assertEqual(res.data['high_water_mark'], expected.isoformat())
+
+    def test_high_water_mark_without_changes(self):
+        """Test the high-water mark echoes the timestamp when idle"""
+
+        since = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        res = self.client.get(UNITS_URL, {'updated_since': since.isoformat()})
+
+        self.assertEqual(res.data['results'], [])
+        self.assertEqual(res.data['high_water_mark'], since.isoformat())
+
+    def test_category_change_is_synced(self):
+        """Test that changing product categories marks it as changed"""
+
+        product = sample_product(Unit.objects.create(name='box'))
+        Product.objects.filter(pk=product.pk).update(updated_at=PAST)
+        since = PAST + timedelta(days=1)
+
+        product.categories.add(Category.objects.create(name='Drinks'))
+        res = self.client.get(PRODUCTS_URL, {
+            'updated_since': since.isoformat()
+        })
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [product.id])
+
+    def test_invalid_timestamp(self):
+        """Test that an invalid timestamp is rejected"""
+
+        res = self.client.get(UNITS_URL, {'updated_since': 'yesterday'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Unit, Category, Product, Customer, Supplier,
+                         PurchaseOrder)
+
+PRODUCTS_URL = reverse('product:product-list')
+CUSTOMERS_URL = reverse('customer:customer-list')
+PURCHASE_ORDERS_URL = reverse('supplier:purchase-order-list')
+
+
+def content_of(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class ExportTests(TestCase):
+    """Test the streaming CSV and NDJSON list exports"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager303@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+        self.unit = Unit.objects.create(name='box', short_name='bx')
+        self.category = Category.objects.create(name='Snacks')
+
+    def _create_products(self, count):
+        for index in range(count):
+            product = Product.objects.create(
+                code=f'70{index:02d}',
+                name=f'Nova {index:02d}',
+                unit=self.unit,
+                unit_in_stock=100,
+                unit_price=30,
+                discount_percentage=0,
+                reorder_level=20
+            )
+            product.categories.add(self.category)
+
+    def test_export_products_csv(self):
+        """Test that every product is streamed as a CSV row"""
+
+        self._create_products(3)
+
+        res = self.client.get(PRODUCTS_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertTrue(res['Content-Type'].startswith('text/csv'))
+        self.assertIn('products.csv', res['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(content_of(res))))
+        self.assertEqual(
+            [row['name'] for row in rows],
+            ['Nova 00', 'Nova 01', 'Nova 02']
+        )
+        self.assertEqual(rows[0]['categories'], str(self.category.id))
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_queries_per_chunk(self):
+        """Test that categories are loaded once per chunk of rows"""
+
+        self._create_products(4)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(PRODUCTS_URL, {'format': 'ndjson'})
+            lines = content_of(res).splitlines()
+
+        self.assertEqual(len(lines), 4)
+
+    def test_export_applies_filters(self):
+        """Test that the list filters apply to the export"""
+
+        Customer.objects.create(
+            code='C1',
+            name='Juan Dela Cruz',
+            contact_no='09171234567',
+            address='Manila'
+        )
+        Customer.objects.create(
+            code='C2',
+            name='Maria Clara',
+            contact_no='09177654321',
+            address='Cebu'
+        )
+
+        res = self.client.get(
+            CUSTOMERS_URL,
+            {'format': 'ndjson', 'fuzzy': 'maria'}
+        )
+
+        self.assertTrue(res['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in content_of(res).splitlines()]
+        self.assertEqual([row['code'] for row in rows], ['C2'])
+
+    def test_export_purchase_orders_by_accept_header(self):
+        """Test that the Accept header selects the export format"""
+
+        self._create_products(1)
+        supplier = Supplier.objects.create(
+            code='S1',
+            name='Universal Robina',
+            contact_no='0281234567',
+            address='Pasig',
+            email='sales@urc.test'
+        )
+        PurchaseOrder.objects.create(
+            required_date=date(2021, 1, 31),
+            supplier=supplier,
+            total=250
+        ).lines.create(
+            product=Product.objects.get(),
+            quantity=10,
+            unit_price=25,
+            sub_total=250
+        )
+
+        res = self.client.get(PURCHASE_ORDERS_URL, HTTP_ACCEPT='text/csv')
+
+        rows = list(csv.DictReader(io.StringIO(content_of(res))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['total'], '250.00')
+        self.assertEqual(rows[0]['required_date'], '2021-01-31')
+        lines = json.loads(rows[0]['lines'])
+        self.assertEqual(lines[0]['product'], Product.objects.get().id)
+        self.assertEqual(lines[0]['sub_total'], '250.00')
+
+    def test_export_requires_authentication(self):
+        """Test that exports are not available anonymously"""
+
+        self.client.force_authenticate(None)
+
+        res = self.client.get(PRODUCTS_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
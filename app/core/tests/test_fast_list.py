@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product, Customer
+
+from customer.serializers import CustomerSerializer
+from product.serializers import ProductSerializer
+
+PRODUCTS_URL = reverse('product:product-list')
+CUSTOMERS_URL = reverse('customer:customer-list')
+
+
+class FastListTests(TestCase):
+    """Test that the values() list path renders like the serializers"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier505@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+        unit = Unit.objects.create(name='box', short_name='bx')
+        snacks = Category.objects.create(name='Snacks')
+        chips = Category.objects.create(name='Chips')
+        for index in range(3):
+            product = Product.objects.create(
+                code=f'70{index:02d}',
+                name=f'Nova {index}',
+                unit=unit,
+                unit_in_stock=100.5,
+                unit_price='30.50',
+                discount_percentage='2.25',
+                reorder_level=20,
+                on_sale=bool(index % 2)
+            )
+            if index:
+                product.categories.add(snacks, chips)
+
+        Customer.objects.create(
+            code='C1',
+            name='Juan Dela Cruz',
+            contact_no='09171234567',
+            address='Manila'
+        )
+
+    def test_products_match_serializer(self):
+        """Test that the product list matches ProductSerializer"""
+
+        res = self.client.get(PRODUCTS_URL)
+
+        expected = ProductSerializer(
+            Product.objects.order_by('name'),
+            many=True
+        ).data
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Related ids come in no particular order on either path
+        results = res.json()['results']
+        for item in (*results, *expected):
+            item['categories'] = sorted(item['categories'])
+        self.assertEqual(results, expected)
+
+    def test_customers_match_serializer(self):
+        """Test that the customer list matches CustomerSerializer"""
+
+        res = self.client.get(CUSTOMERS_URL)
+
+        expected = CustomerSerializer(Customer.objects.all(), many=True).data
+        self.assertEqual(res.json()['results'], expected)
+
+    def test_fast_list_pages(self):
+        """Test that cursors of the values() rows page correctly"""
+
+        res = self.client.get(PRODUCTS_URL, {'page_size': 2})
+        next_page = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [item['name'] for item in res.data['results']],
+            ['Nova 0', 'Nova 1']
+        )
+        self.assertEqual(
+            [item['name'] for item in next_page.data['results']],
+            ['Nova 2']
+        )
+
+    def test_fast_list_field_selection(self):
+        """Test that sparse fieldsets apply to the fast path"""
+
+        res = self.client.get(PRODUCTS_URL, {'fields': 'code,categories'})
+
+        self.assertEqual(
+            res.json()['results'][0],
+            {'code': '7000', 'categories': []}
+        )
@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product, Customer
+
+PRODUCTS_URL = reverse('product:product-list')
+CUSTOMERS_URL = reverse('customer:customer-list')
+
+
+def product_detail_url(product_id):
+    """Return product detail URL"""
+
+    return reverse('product:product-detail', args=[product_id])
+
+
+class FieldSelectionTests(TestCase):
+    """Test the ?fields= and ?omit= sparse fieldsets"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier404@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+        self.unit = Unit.objects.create(name='box', short_name='bx')
+        self.product = Product.objects.create(
+            code='7001',
+            name='Nova',
+            unit=self.unit,
+            unit_in_stock=100,
+            unit_price=30,
+            discount_percentage=0,
+            reorder_level=20
+        )
+        self.product.categories.add(Category.objects.create(name='Snacks'))
+
+    def _product_select(self, context):
+        return next(
+            query['sql'] for query in context.captured_queries
+            if 'FROM "core_product"' in query['sql'] and
+            'MAX(' not in query['sql']
+        )
+
+    def test_list_fields(self):
+        """Test that only the requested fields are rendered and loaded"""
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(
+                PRODUCTS_URL,
+                {'fields': 'id,code,name,unit_price'}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data['results'][0]),
+            ['id', 'code', 'name', 'unit_price']
+        )
+        select = self._product_select(context)
+        self.assertNotIn('unit_in_stock', select)
+        self.assertNotIn('search_vector', select)
+        self.assertFalse(any(
+            'core_product_categories' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_list_omit(self):
+        """Test that omitted fields are left out"""
+
+        res = self.client.get(PRODUCTS_URL, {'omit': 'categories,unit'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('categories', res.data['results'][0])
+        self.assertNotIn('unit', res.data['results'][0])
+        self.assertIn('unit_price', res.data['results'][0])
+
+    def test_retrieve_fields(self):
+        """Test that a detail can be trimmed without its nested unit"""
+
+        res = self.client.get(
+            product_detail_url(self.product.id),
+            {'fields': 'id,name'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'id': self.product.id, 'name': 'Nova'})
+
+    def test_unknown_field(self):
+        """Test that an unknown field name is rejected"""
+
+        res = self.client.get(PRODUCTS_URL, {'fields': 'id,colour'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_customer_fields_paginated(self):
+        """Test that a trimmed list still pages without extra queries"""
+
+        for index in range(3):
+            Customer.objects.create(
+                code=f'C{index}',
+                name=f'Customer {index}',
+                contact_no='09171234567',
+                address='Manila'
+            )
+
+        res = self.client.get(
+            CUSTOMERS_URL,
+            {'fields': 'code', 'page_size': 2}
+        )
+        with self.assertNumQueries(2):
+            next_page = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            res.data['results'],
+            [{'code': 'C0'}, {'code': 'C1'}]
+        )
+        self.assertEqual(next_page.data['results'], [{'code': 'C2'}])
@@ -74,17 +74,22 @@ def sample_purchase_order(
         required_date=datetime.datetime(2021, 4, 17),
         is_cancelled=False
 ):
-    """Create a sample purchase order"""
+    """Create a sample purchase order of one product"""
 
-    return models.PurchaseOrder.objects.create(
-        product=sample_product(),
-        quantity=quantity,
-        unit_price=unit_price,
-        sub_total=sub_total,
+    purchase_order = models.PurchaseOrder.objects.create(
         required_date=required_date,
         supplier=sample_supplier(),
         is_cancelled=is_cancelled,
+        total=sub_total
     )
+    purchase_order.lines.create(
+        product=sample_product(),
+        quantity=quantity,
+        unit_price=unit_price,
+        sub_total=sub_total
+    )
+
+    return purchase_order
 
 
 class ModelTests(TestCase):
@@ -220,10 +225,6 @@ class ModelTests(TestCase):
         """Test the po number string representation"""
 
         purchase_order = models.PurchaseOrder.objects.create(
-            product=sample_product(),
-            quantity=20,
-            unit_price=200,
-            sub_total=4000,
             required_date=datetime.datetime(2021, 5, 17),
             is_cancelled=False,
             supplier=sample_supplier()
@@ -235,7 +236,7 @@ class ModelTests(TestCase):
         """Test the receive product str representation"""
 
         receive_product = models.ReceiveProduct.objects.create(
-            product=sample_product(),
+            product=sample_product(code='01011'),
             quantity=20,
             unit_price=200,
             sub_total=4000,
@@ -0,0 +1,122 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Customer
+
+UNITS_URL = reverse('product:unit-list')
+CUSTOMERS_URL = reverse('customer:customer-list')
+PURCHASE_ORDERS_URL = reverse('supplier:purchase-order-list')
+
+
+def cursor(position):
+    """Return a cursor holding the given position"""
+
+    query = f'p={json.dumps(position)}'
+    return base64.b64encode(query.encode('ascii')).decode('ascii')
+
+
+class KeysetPaginationTests(TestCase):
+    """Test keyset pagination of list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager201@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+    def _walk(self, url, key='next'):
+        """Follow the links from url and return the ids of every page"""
+
+        ids = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            page = [item['id'] for item in res.data['results']]
+            ids = page + ids if key == 'previous' else ids + page
+            url = res.data[key]
+
+        return ids
+
+    def test_walk_pages_with_duplicate_names(self):
+        """Test that rows sharing a name are neither skipped nor repeated"""
+
+        for name in ['piece', 'box', 'piece', 'box', 'gram', 'piece']:
+            Unit.objects.create(name=name, short_name=name[:2])
+
+        ids = self._walk(UNITS_URL + '?page_size=2')
+
+        expected = list(
+            Unit.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_walk_pages_backwards(self):
+        """Test that previous links return the same rows in reverse"""
+
+        for index in range(5):
+            Customer.objects.create(
+                code=str(index),
+                name='Customer',
+                contact_no='32152',
+                address='New street'
+            )
+
+        url = CUSTOMERS_URL + '?page_size=2'
+        while True:
+            res = self.client.get(url)
+            if not res.data['next']:
+                break
+            url = res.data['next']
+
+        ids = self._walk(res.data['previous'], key='previous')
+        ids += [item['id'] for item in res.data['results']]
+
+        expected = list(
+            Customer.objects.order_by('name', 'id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_page_not_shifted_by_concurrent_insert(self):
+        """Test that rows inserted before the cursor do not shift pages"""
+
+        for name in ['a', 'b', 'c', 'd']:
+            Unit.objects.create(name=name, short_name=name)
+
+        res = self.client.get(UNITS_URL + '?page_size=2')
+        Unit.objects.create(name='aa', short_name='aa')
+        res = self.client.get(res.data['next'])
+
+        names = [item['name'] for item in res.data['results']]
+        self.assertEqual(names, ['c', 'd'])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor returns not found"""
+
+        res = self.client.get(UNITS_URL, {'cursor': 'cD1bMV0='})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        """Test that positions of the wrong type return not found"""
+
+        res = self.client.get(UNITS_URL, {'cursor': cursor(['a', 'x'])})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(
+            PURCHASE_ORDERS_URL,
+            {'cursor': cursor(['yesterday', '1'])}
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(UNITS_URL, {'cursor': cursor(['a', '1'])})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
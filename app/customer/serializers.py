@@ -1,9 +1,10 @@
 from rest_framework import serializers
 
 from core.models import Customer
+from core.serializers import SparseFieldsMixin
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Customer objects"""
 
     class Meta:
@@ -73,7 +73,7 @@ class PrivateUnitApiTests(TestCase):
         customers = Customer.objects.all().order_by('name')
         serializer = CustomerSerializer(customers, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_successful_retrieve_customers_by_non_manager(self):
         """Test success retrieve customers by non-manager"""
@@ -102,7 +102,7 @@ class PrivateUnitApiTests(TestCase):
         customers = Customer.objects.all().order_by('name')
         serializer = CustomerSerializer(customers, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_successful_create_customer_by_manager(self):
         """Test successful creation of a new customer by manager"""
@@ -182,3 +182,43 @@ class PrivateUnitApiTests(TestCase):
         res = self.client.post(SUPPLIERS_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fuzzy_match_customer_name(self):
+        """Test fuzzy matching a misspelled customer name"""
+
+        customer = Customer.objects.create(
+            code='140',
+            name='Maria Santos',
+            contact_no='09171234567',
+            address='New street',
+            email='maria@testdev.com'
+        )
+        Customer.objects.create(
+            code='141',
+            name='Pedro Reyes',
+            contact_no='09181112222',
+            address='Old street',
+            email='pedro@testdev.com'
+        )
+
+        res = self.client.get(SUPPLIERS_URL, {'fuzzy': 'maria santoz'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [customer.id])
+
+    def test_fuzzy_match_customer_contact(self):
+        """Test fuzzy matching a customer by email"""
+
+        customer = Customer.objects.create(
+            code='142',
+            name='Jose Rizal',
+            contact_no='09171234567',
+            address='New street',
+            email='jose.rizal@testdev.com'
+        )
+
+        res = self.client.get(SUPPLIERS_URL, {'fuzzy': 'jose.rizal@testdev'})
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [customer.id])
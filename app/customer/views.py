@@ -1,13 +1,21 @@
 from rest_framework import (viewsets, mixins)
 from rest_framework.authentication import TokenAuthentication
 
+from core.mixins import (ConditionalGetMixin, DeltaSyncMixin, ExportMixin,
+                         FastListMixin, FieldSelectionMixin)
 from core.permissions import IsAuthenticatedManager
+from core.search import fuzzy_search, similarity_threshold
 from core.models import Customer
 
 from customer import serializers
 
 
-class BaseCustomerAttrViewSet(viewsets.GenericViewSet,
+class BaseCustomerAttrViewSet(ExportMixin,
+                              ConditionalGetMixin,
+                              DeltaSyncMixin,
+                              FieldSelectionMixin,
+                              FastListMixin,
+                              viewsets.GenericViewSet,
                               mixins.ListModelMixin,
                               mixins.CreateModelMixin,
                               mixins.RetrieveModelMixin,
@@ -53,3 +61,21 @@ class CustomerViewSet(BaseCustomerAttrViewSet):
     """
     queryset = Customer.objects.all()
     serializer_class = serializers.CustomerSerializer
+    fast_list = True
+
+    def get_queryset(self):
+        """
+        Return customers, optionally fuzzy matched on name or contacts
+        """
+        queryset = super().get_queryset()
+        fuzzy = self.request.query_params.get('fuzzy')
+
+        if fuzzy:
+            queryset = fuzzy_search(
+                queryset,
+                ('name', 'contact_no', 'email'),
+                fuzzy,
+                similarity_threshold(self.request)
+            )
+
+        return queryset
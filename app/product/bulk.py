@@ -0,0 +1,314 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.fields import CharField
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from core.models import Product, StockMovement
+
+from product import cache, facets, snapshot, stock
+from product.serializers import ProductBulkSerializer
+
+BATCH_SIZE = 500
+
+DOES_NOT_EXIST = PrimaryKeyRelatedField.default_error_messages[
+    'does_not_exist'
+]
+NOT_A_STRING = CharField.default_error_messages['invalid']
+
+
+class BulkUpsertResult:
+    """Outcome of a bulk upsert"""
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.errors = []
+
+    def add_error(self, index, row, errors):
+        code = row.get('code') if isinstance(row, dict) else None
+        self.errors.append({'index': index, 'code': code, 'errors': errors})
+
+
+def upsert_products(rows):
+    """
+    Validate the rows together, then insert new codes and update existing
+    ones in batches within a single transaction
+
+    Invalid rows are reported by index and skipped; the others are saved.
+    Rows of existing codes may be partial; only the given fields change.
+    A code inserted by another request since the existing codes were read
+    is updated instead.
+    """
+    result = BulkUpsertResult()
+
+    codes = {
+        row.get('code') for row in rows
+        if isinstance(row, dict) and isinstance(row.get('code'), str)
+    }
+    existing = dict(
+        Product.objects.filter(code__in=codes).values_list('code', 'id')
+    )
+
+    valid = _validate(rows, existing, result)
+    if not valid:
+        return result
+
+    with transaction.atomic():
+        created = _insert_new(valid, existing, result)
+        updates = [
+            (index, data) for index, data in valid
+            if data['code'] in existing
+        ]
+        _count_stock(updates, existing)
+        _update(updates, existing, result)
+        _set_categories(valid, {**existing, **created})
+
+    cache.discard_products(existing.values())
+    snapshot.schedule_rebuild()
+
+    return result
+
+
+def _validate(rows, existing, result):
+    """Return (index, validated data) of the rows that are valid"""
+
+    validated = []
+    seen = set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            result.add_error(index, row, {
+                'non_field_errors': ['Expected an object.']
+            })
+            continue
+
+        code = row.get('code')
+        if code is not None and not isinstance(code, str):
+            result.add_error(index, row, {'code': [NOT_A_STRING]})
+            continue
+
+        serializer = ProductBulkSerializer(
+            data=row,
+            partial=code in existing
+        )
+        if not serializer.is_valid():
+            result.add_error(index, row, serializer.errors)
+            continue
+
+        code = serializer.validated_data['code']
+        if code in seen:
+            result.add_error(index, row, {
+                'code': ['Duplicate code in this payload.']
+            })
+            continue
+
+        seen.add(code)
+        validated.append((index, serializer.validated_data))
+
+    unit_ids = {
+        data['unit'] for _, data in validated if 'unit' in data
+    }
+    category_ids = {
+        pk for _, data in validated for pk in data.get('categories', [])
+    }
+    known_units = _known(cache.units, unit_ids)
+    known_categories = _known(cache.categories, category_ids)
+
+    valid = []
+    for index, data in validated:
+        errors = {}
+        if 'unit' in data and data['unit'] not in known_units:
+            errors['unit'] = [DOES_NOT_EXIST.format(pk_value=data['unit'])]
+
+        missing = [
+            pk for pk in data.get('categories', [])
+            if pk not in known_categories
+        ]
+        if missing:
+            errors['categories'] = [
+                DOES_NOT_EXIST.format(pk_value=pk) for pk in missing
+            ]
+
+        if errors:
+            result.add_error(index, rows[index], errors)
+        else:
+            valid.append((index, data))
+
+    result.errors.sort(key=lambda error: error['index'])
+    return valid
+
+
+def _known(reference, pks):
+    """
+    Return the ids of `pks` that exist, looking up in the database those
+    missing from the cached table, which may be stale in this worker
+    """
+    known = pks.intersection(reference.instances())
+    missing = pks - known
+    if missing:
+        found = set(
+            reference.model.objects
+            .filter(pk__in=missing)
+            .values_list('pk', flat=True)
+        )
+        if found:
+            reference.invalidate()
+            known |= found
+
+    return known
+
+
+def _fields(data):
+    fields = {
+        key: value for key, value in data.items() if key != 'categories'
+    }
+    if 'unit' in fields:
+        fields['unit_id'] = fields.pop('unit')
+
+    return fields
+
+
+def _insert_new(valid, existing, result):
+    """
+    Insert the rows of codes missing from `existing`; when another request
+    inserted some of them meanwhile, add those to `existing` and retry
+    """
+    while True:
+        rows = [
+            (index, data) for index, data in valid
+            if data['code'] not in existing
+        ]
+        if not rows:
+            return {}
+
+        try:
+            with transaction.atomic():
+                created = _insert(rows)
+        except IntegrityError:
+            inserted = dict(
+                Product.objects
+                .filter(code__in=[data['code'] for _, data in rows])
+                .values_list('code', 'id')
+            )
+            if not inserted:
+                raise
+            existing.update(inserted)
+        else:
+            result.created.extend(created.values())
+            return created
+
+
+def _insert(rows):
+    products = Product.objects.bulk_create(
+        [Product(**_fields(data)) for _, data in rows],
+        batch_size=BATCH_SIZE
+    )
+
+    # The opening stock is the first movement of the ledger
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(
+                product_id=product.id,
+                kind=StockMovement.ADJUSTMENT,
+                quantity=product.unit_in_stock,
+                note='Bulk upsert'
+            )
+            for product in products if product.unit_in_stock
+        ],
+        batch_size=BATCH_SIZE
+    )
+
+    return {product.code: product.id for product in products}
+
+
+def _count_stock(rows, existing):
+    """
+    Record the difference between the stock counts of the rows and the
+    locked current stock as adjustments
+    """
+    counts = {
+        existing[data['code']]: data['unit_in_stock']
+        for _, data in rows if 'unit_in_stock' in data
+    }
+    current = Product.objects \
+        .select_for_update() \
+        .filter(pk__in=counts) \
+        .annotate(current_stock=stock.current_stock()) \
+        .values_list('id', 'current_stock')
+
+    stock.record_movements([
+        StockMovement(
+            product_id=product_id,
+            kind=StockMovement.ADJUSTMENT,
+            quantity=counts[product_id] - unit_in_stock,
+            note='Bulk upsert'
+        )
+        for product_id, unit_in_stock in current
+        if counts[product_id] != unit_in_stock
+    ])
+
+
+def _update(rows, existing, result):
+    now = timezone.now()
+
+    # bulk_update() writes the same columns for every row of a call, so
+    # rows are grouped by the set of fields they change; the stock was
+    # moved by _count_stock()
+    groups = defaultdict(list)
+    for _, data in rows:
+        fields = _fields(data)
+        fields.pop('unit_in_stock', None)
+        fields['updated_at'] = now
+        product = Product(id=existing[data['code']], **fields)
+        groups[tuple(sorted(fields))].append(product)
+
+    for fields, products in groups.items():
+        Product.objects.bulk_update(
+            products,
+            [field for field in fields if field != 'code'],
+            batch_size=BATCH_SIZE
+        )
+        result.updated.extend(product.id for product in products)
+
+
+def _set_categories(valid, product_ids):
+    """
+    Rewrite the category rows of every product that sent categories, and
+    recount the categories of those and of the products that sent
+    `is_active`
+    """
+    through = Product.categories.through
+    rows = [data for _, data in valid if 'categories' in data]
+    affected = set()
+    if rows:
+        links = through.objects.filter(
+            product_id__in=[product_ids[data['code']] for data in rows]
+        )
+        affected.update(links.values_list('category_id', flat=True))
+        links.delete()
+        through.objects.bulk_create(
+            [
+                through(product_id=product_ids[data['code']], category_id=pk)
+                for data in rows
+                for pk in set(data['categories'])
+            ],
+            batch_size=BATCH_SIZE
+        )
+        affected.update(pk for data in rows for pk in data['categories'])
+
+    # Only active products are counted
+    toggled = [
+        product_ids[data['code']] for _, data in valid
+        if 'is_active' in data and 'categories' not in data
+    ]
+    if toggled:
+        affected.update(
+            through.objects
+            .filter(product_id__in=toggled)
+            .values_list('category_id', flat=True)
+        )
+
+    # The through rows bypass the M2M signals that keep the facet counts
+    if affected:
+        facets.recount(affected)
@@ -0,0 +1,171 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import ReferenceCache
+from core.models import Category, Unit
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache local to the worker process
+
+    Every invalidation bumps `generation` so a reader that loaded a
+    payload before a concurrent write does not put the stale payload
+    back. With `version_keys`, a function returning the keys of the
+    shared Django cache a value depends on, an entry is stored with the
+    versions those keys held and is only served while they still do, so
+    writes made in other processes evict exactly the entries they touch.
+    Entries otherwise expire after `timeout` seconds.
+    """
+
+    def __init__(self, maxsize, timeout, version_keys=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.version_keys = version_keys
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value or None when missing, expired or stale"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value, versions = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+        if versions != self._versions(value):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+        return value
+
+    def set(self, key, value, generation):
+        """Store a value loaded while `generation` was current"""
+
+        versions = self._versions(value)
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            self._entries[key] = (
+                time.monotonic() + self.timeout,
+                value,
+                versions
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard_if(self, predicate):
+        """Remove every entry whose value matches the predicate"""
+
+        with self._lock:
+            self.generation += 1
+            stale = [
+                key for key, (_, value, _) in self._entries.items()
+                if predicate(value)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def _versions(self, value):
+        if self.version_keys is None:
+            return None
+
+        keys = self.version_keys(value)
+        versions = cache.get_many(keys)
+
+        return tuple(versions.get(key) for key in keys)
+
+
+def bump_versions(keys):
+    """Move shared version keys, so values depending on them are stale"""
+
+    version = uuid.uuid4().hex
+    cache.set_many({key: version for key in keys}, None)
+
+
+def _product_key(product_id):
+    return f'product_by_code:product:{product_id}'
+
+
+# Moved by import_products, which may rewrite any product
+PRODUCTS_KEY = 'product_by_code:products'
+
+
+def _product_version_keys(payload):
+    return [
+        PRODUCTS_KEY,
+        _product_key(payload['id']),
+        units.version_key,
+        categories.version_key,
+    ]
+
+
+# Serialized `ProductDetailSerializer` payloads keyed by product code,
+# without the stock, which changes with every sale
+product_by_code = LRUCache(
+    settings.PRODUCT_CODE_CACHE_SIZE,
+    settings.PRODUCT_CODE_CACHE_TIMEOUT,
+    version_keys=_product_version_keys
+)
+
+
+def discard_products(product_ids):
+    """Evict the products from the lookups of this and other workers"""
+
+    product_ids = set(product_ids)
+    bump_versions([_product_key(pk) for pk in product_ids])
+    product_by_code.discard_if(lambda payload: payload['id'] in product_ids)
+
+
+def discard_all_products():
+    """Evict every product from the lookups of this and other workers"""
+
+    bump_versions([PRODUCTS_KEY])
+    product_by_code.clear()
+
+
+def discard_unit(unit_id):
+    # Other workers see the version of the unit table move
+    product_by_code.discard_if(
+        lambda payload: payload['unit']['id'] == unit_id
+    )
+
+
+def discard_categories(category_ids):
+    # Other workers see the version of the category table move
+    category_ids = set(category_ids)
+    product_by_code.discard_if(
+        lambda payload: any(
+            category['id'] in category_ids
+            for category in payload['categories']
+        )
+    )
+
+
+# Whole unit and category tables, versioned in the shared Django cache
+units = ReferenceCache(Unit)
+categories = ReferenceCache(Category)
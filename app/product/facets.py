@@ -0,0 +1,77 @@
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import Count, F
+
+from core.models import CategoryProductCount, Product
+
+RECOUNT = """
+INSERT INTO core_categoryproductcount (category_id, product_count)
+SELECT core_category.id, count(core_product.id)
+FROM core_category
+LEFT JOIN core_product_categories
+    ON core_product_categories.category_id = core_category.id
+LEFT JOIN core_product
+    ON core_product.id = core_product_categories.product_id
+    AND core_product.is_active
+{where}
+GROUP BY core_category.id
+ON CONFLICT (category_id) DO UPDATE
+    SET product_count = EXCLUDED.product_count
+"""
+
+
+def adjust_counts(category_ids, sign):
+    """
+    Add (`sign=1`) or subtract (`sign=-1`) one product per occurrence of
+    a category id in `category_ids`
+    """
+    by_delta = defaultdict(list)
+    for category_id, occurrences in Counter(category_ids).items():
+        by_delta[sign * occurrences].append(category_id)
+
+    for delta, ids in by_delta.items():
+        updated = CategoryProductCount.objects \
+            .filter(category_id__in=ids) \
+            .update(product_count=F('product_count') + delta)
+        if updated < len(ids):
+            # A category without a count row yet is counted from scratch
+            recount(ids)
+
+
+def recount(category_ids=None):
+    """
+    Recompute the counts of the given categories, or of all of them, from
+    the M2M rows of the active products; for writes that bypass the M2M
+    signals or change `is_active`
+    """
+    with connection.cursor() as cursor:
+        if category_ids is None:
+            cursor.execute(RECOUNT.format(where=''))
+        else:
+            cursor.execute(
+                RECOUNT.format(where='WHERE core_category.id = ANY(%s)'),
+                [list(category_ids)]
+            )
+
+
+def facet_counts(products=None):
+    """
+    Return the number of products per category id
+
+    Without a product queryset the precomputed counts of active products
+    are read; with one, the products it matches are counted per category.
+    """
+    if products is None:
+        return dict(
+            CategoryProductCount.objects
+            .values_list('category_id', 'product_count')
+        )
+
+    return dict(
+        Product.categories.through.objects
+        .filter(product_id__in=products.order_by().values('pk'))
+        .values('category_id')
+        .annotate(count=Count('product_id'))
+        .values_list('category_id', 'count')
+    )
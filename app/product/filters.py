@@ -0,0 +1,149 @@
+import math
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef
+from rest_framework.exceptions import ValidationError
+
+from core.models import Product
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+# Sort keys accepted by `?ordering=`, each backed by a (key, id) index
+ORDERING_FIELDS = ('name', 'unit_price', 'effective_price')
+
+# Query parameters read by filter_products()
+FILTER_PARAMS = (
+    'unit',
+    'categories',
+    'categories_all',
+    'price_min',
+    'price_max',
+    'effective_price_min',
+    'effective_price_max',
+    'stock_min',
+    'stock_max',
+    'on_sale',
+    'is_active',
+)
+
+
+def filter_products(queryset, params):
+    """
+    Apply the product list filters given in the query parameters
+
+    `unit` and `categories` take comma separated ids; a product matches
+    `categories` when it is in any of them and `categories_all` when it is
+    in all of them. Category filters are `EXISTS` subqueries, so a product
+    in several matching categories is still returned once.
+    """
+    unit_ids = _ids(params, 'unit')
+    if unit_ids:
+        queryset = queryset.filter(unit_id__in=unit_ids)
+
+    category_ids = _ids(params, 'categories')
+    if category_ids:
+        queryset = queryset.filter(_in_categories(category_ids))
+    for category_id in _ids(params, 'categories_all'):
+        queryset = queryset.filter(_in_categories([category_id]))
+
+    ranges = (
+        ('price_min', 'unit_price__gte', _decimal),
+        ('price_max', 'unit_price__lte', _decimal),
+        ('effective_price_min', 'effective_price__gte', _decimal),
+        ('effective_price_max', 'effective_price__lte', _decimal),
+        ('stock_min', 'unit_in_stock__gte', _number),
+        ('stock_max', 'unit_in_stock__lte', _number),
+    )
+    for param, lookup, parse in ranges:
+        value = parse(params, param)
+        if value is not None:
+            queryset = queryset.filter(**{lookup: value})
+
+    for flag in ('on_sale', 'is_active'):
+        value = _bool(params, flag)
+        if value is not None:
+            queryset = queryset.filter(**{flag: value})
+
+    return queryset
+
+
+def order_products(queryset, params):
+    """
+    Sort by `?ordering=` (a field of ORDERING_FIELDS, `-` for descending)
+    """
+    ordering = params.get('ordering')
+    if not ordering:
+        return queryset
+
+    if ordering.lstrip('-') not in ORDERING_FIELDS:
+        raise ValidationError({'ordering': [
+            f'Order by one of {", ".join(ORDERING_FIELDS)}.'
+        ]})
+
+    return queryset.order_by(ordering)
+
+
+def _in_categories(category_ids):
+    return Exists(
+        Product.categories.through.objects.filter(
+            product_id=OuterRef('pk'),
+            category_id__in=category_ids
+        )
+    )
+
+
+def _ids(params, name):
+    """Convert a comma separated list of ids to a list of integers"""
+
+    value = params.get(name)
+    if not value:
+        return []
+
+    try:
+        return [int(str_id) for str_id in value.split(',')]
+    except ValueError:
+        raise ValidationError({name: 'Enter comma separated ids.'})
+
+
+def _decimal(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise ValidationError({name: 'Enter a number.'})
+
+    return number
+
+
+def _number(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is None or not math.isfinite(number):
+        raise ValidationError({name: 'Enter a number.'})
+
+    return number
+
+
+def _bool(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+
+    raise ValidationError({name: 'Enter true or false.'})
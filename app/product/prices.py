@@ -0,0 +1,99 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from psycopg2.extras import DateTimeTZRange
+from rest_framework.exceptions import ValidationError
+
+from core.models import Product, ProductPrice
+
+from product import cache, snapshot
+
+APPLY_DUE_PRICES = """
+UPDATE core_product
+SET unit_price = core_productprice.unit_price,
+    discount_percentage = core_productprice.discount_percentage,
+    updated_at = now()
+FROM core_productprice
+WHERE core_productprice.product_id = core_product.id
+    AND core_productprice.valid_during @> %s
+    AND (core_product.unit_price, core_product.discount_percentage)
+        IS DISTINCT FROM
+        (core_productprice.unit_price, core_productprice.discount_percentage)
+    {where}
+RETURNING core_product.id
+"""
+
+
+def price_at(product_id, at):
+    """Return the price of a product in effect at `at`, or None"""
+
+    return ProductPrice.objects \
+        .filter(product_id=product_id, valid_during__contains=at) \
+        .first()
+
+
+def schedule_price(product, unit_price, discount_percentage, valid_from):
+    """
+    Record a price valid from `valid_from` until the next scheduled change,
+    ending the price in effect at that time; applied at once when due
+    """
+    with transaction.atomic():
+        # Serialize the changes of a product
+        Product.objects.select_for_update().filter(pk=product.pk).exists()
+
+        prices = ProductPrice.objects.filter(product=product)
+        if prices.filter(valid_during__startswith=valid_from).exists():
+            raise ValidationError(
+                {'valid_from': ['A price already starts at this time.']}
+            )
+
+        following = prices \
+            .filter(valid_during__startswith__gt=valid_from) \
+            .order_by('valid_during') \
+            .first()
+        current = prices.filter(valid_during__contains=valid_from).first()
+        if current is not None:
+            current.valid_during = DateTimeTZRange(
+                current.valid_during.lower,
+                valid_from
+            )
+            current.save(update_fields=['valid_during'])
+
+        price = ProductPrice.objects.create(
+            product=product,
+            unit_price=unit_price,
+            discount_percentage=discount_percentage,
+            valid_during=DateTimeTZRange(
+                valid_from,
+                following.valid_during.lower if following else None
+            )
+        )
+        apply_due_prices(product_ids=[product.pk])
+
+    return price
+
+
+def apply_due_prices(at=None, product_ids=None):
+    """
+    Copy the prices in effect at `at` (default now) to the products whose
+    price differs, in one statement; return the ids of the products
+    """
+    at = at or timezone.now()
+    params = [at]
+    where = ''
+    if product_ids is not None:
+        where = 'AND core_product.id = ANY(%s)'
+        params.append(list(product_ids))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # The new prices are already in the history
+        cursor.execute("SET LOCAL core.applying_prices = 'on'")
+        cursor.execute(APPLY_DUE_PRICES.format(where=where), params)
+        updated = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SET LOCAL core.applying_prices = 'off'")
+
+    if updated:
+        cache.discard_products(updated)
+        transaction.on_commit(lambda: cache.discard_products(updated))
+        snapshot.schedule_rebuild()
+
+    return updated
@@ -1,9 +1,13 @@
 from rest_framework import serializers
 
-from core.models import Category, Unit, Product
+from core.models import (Category, Unit, Product, ProductPrice,
+                         StockMovement)
+from core.serializers import CachedPrimaryKeyRelatedField, SparseFieldsMixin
 
+from product import cache, prices, stock
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for category objects"""
 
     class Meta:
@@ -16,7 +20,7 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_field = ('id',)
 
 
-class UnitSerializer(serializers.ModelSerializer):
+class UnitSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for unit objects"""
 
     class Meta:
@@ -30,16 +34,14 @@ class UnitSerializer(serializers.ModelSerializer):
         read_only_field = ('id',)
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serialize for product objects"""
 
-    unit = serializers.PrimaryKeyRelatedField(
-        queryset=Unit.objects.all(),
-    )
+    unit = CachedPrimaryKeyRelatedField(reference=cache.units)
 
-    categories = serializers.PrimaryKeyRelatedField(
+    categories = CachedPrimaryKeyRelatedField(
         many=True,
-        queryset=Category.objects.all()
+        reference=cache.categories
     )
 
     class Meta:
@@ -53,10 +55,13 @@ class ProductSerializer(serializers.ModelSerializer):
             'unit_price',
             'categories',
             'discount_percentage',
+            'effective_price',
             'reorder_level',
-            'on_sale'
+            'on_sale',
+            'is_active'
         )
-        read_only_fields = ('id',)
+        # Changed through stock movements only
+        read_only_fields = ('id', 'unit_in_stock')
 
 
 class ProductDetailSerializer(ProductSerializer):
@@ -68,3 +73,106 @@ class ProductDetailSerializer(ProductSerializer):
         many=True,
         read_only=True
     )
+
+
+class ProductPriceSerializer(serializers.ModelSerializer):
+    """Serialize a past, current or scheduled price of a product"""
+
+    valid_from = serializers.DateTimeField(source='valid_during.lower')
+    valid_to = serializers.DateTimeField(
+        source='valid_during.upper',
+        read_only=True
+    )
+
+    class Meta:
+        model = ProductPrice
+        fields = (
+            'id',
+            'unit_price',
+            'discount_percentage',
+            'valid_from',
+            'valid_to'
+        )
+        read_only_fields = ('id',)
+
+    def create(self, validated_data):
+        """Schedule the price, ending the one in effect at that time"""
+
+        return prices.schedule_price(
+            product=validated_data['product'],
+            unit_price=validated_data['unit_price'],
+            discount_percentage=validated_data['discount_percentage'],
+            valid_from=validated_data['valid_during']['lower']
+        )
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    """Serialize a movement of the stock ledger"""
+
+    class Meta:
+        model = StockMovement
+        fields = (
+            'id',
+            'kind',
+            'quantity',
+            'note',
+            'user',
+            'created_at'
+        )
+        read_only_fields = ('id', 'user', 'created_at')
+
+    def validate(self, attrs):
+        """Check that the quantity moves the stock the way its kind does"""
+
+        sign = stock.SIGNS.get(attrs['kind'])
+        if attrs['quantity'] == 0 or \
+                sign is not None and attrs['quantity'] * sign < 0:
+            direction = {1: 'positive', -1: 'negative'}.get(sign, 'non-zero')
+            raise serializers.ValidationError(
+                {'quantity': [f'A {attrs["kind"]} quantity must be '
+                              f'{direction}.']}
+            )
+
+        return attrs
+
+    def create(self, validated_data):
+        """Append the movement and apply it to the stock"""
+
+        if validated_data['kind'] == StockMovement.SALE:
+            return stock.sell(
+                product_id=validated_data['product_id'],
+                quantity=-validated_data['quantity'],
+                note=validated_data.get('note', ''),
+                user=validated_data.get('user')
+            )
+
+        return stock.record_movement(**validated_data)
+
+
+class ProductBulkSerializer(serializers.ModelSerializer):
+    """Serialize one row of a bulk product upsert keyed by code"""
+
+    # Existing codes are updated, so no uniqueness validation here
+    code = serializers.CharField(max_length=255)
+
+    # Resolved in bulk for the whole payload instead of once per row
+    unit = serializers.IntegerField()
+    categories = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    class Meta:
+        model = Product
+        fields = (
+            'code',
+            'name',
+            'unit',
+            'unit_in_stock',
+            'unit_price',
+            'categories',
+            'discount_percentage',
+            'reorder_level',
+            'on_sale',
+            'is_active'
+        )
@@ -0,0 +1,143 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save, pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Category, Unit, Product
+
+from product import cache, facets, snapshot
+
+
+def _discard(func, *args):
+    """
+    Invalidate now and again once the write is committed, so a reader
+    that saw the old row before the commit cannot keep it cached
+    """
+    func(*args)
+    transaction.on_commit(lambda: func(*args))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product(sender, instance, **kwargs):
+    _discard(cache.discard_products, [instance.pk])
+    snapshot.schedule_rebuild()
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def product_categories_changed(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    """
+    Bump `updated_at` of the products whose categories changed, so the
+    change is visible to conditional and incremental reads
+    """
+    if reverse and action == 'pre_clear':
+        instance._cleared_product_ids = list(
+            instance.product_set.values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        product_ids = [instance.pk]
+    elif action == 'post_clear':
+        product_ids = instance.__dict__.pop('_cleared_product_ids', [])
+    else:
+        product_ids = list(pk_set)
+
+    Product.objects \
+        .filter(pk__in=product_ids) \
+        .update(updated_at=timezone.now())
+    _discard(cache.discard_products, product_ids)
+    snapshot.schedule_rebuild()
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def category_counts_changed(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    """
+    Keep the per-category counts of active products in step with the M2M
+    rows
+    """
+    if action in ('pre_remove', 'pre_clear'):
+        # Only rows that exist are removed; remember their categories
+        links = sender.objects.filter(
+            **{'category_id' if reverse else 'product_id': instance.pk},
+            product__is_active=True
+        )
+        if action == 'pre_remove':
+            links = links.filter(
+                **{'product_id__in' if reverse else 'category_id__in': pk_set}
+            )
+        instance._removed_category_ids = list(
+            links.values_list('category_id', flat=True)
+        )
+    elif action == 'post_add' and reverse:
+        # `pk_set` holds only the rows actually added
+        added = Product.objects \
+            .filter(pk__in=pk_set, is_active=True) \
+            .count()
+        facets.adjust_counts([instance.pk] * added, 1)
+    elif action == 'post_add' and instance.is_active:
+        facets.adjust_counts(pk_set, 1)
+    elif action in ('post_remove', 'post_clear'):
+        facets.adjust_counts(
+            instance.__dict__.pop('_removed_category_ids', []),
+            -1
+        )
+
+
+@receiver(post_init, sender=Product)
+def product_loaded(sender, instance, **kwargs):
+    # Left out when deferred, in which case a change is not noticed
+    instance._loaded_is_active = instance.__dict__.get('is_active')
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, update_fields, **kwargs):
+    """Recount the categories of a product activated or deactivated"""
+
+    loaded = instance.__dict__.get('_loaded_is_active')
+    instance._loaded_is_active = instance.is_active
+    if created or loaded is None or loaded == instance.is_active:
+        return
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+
+    facets.recount(instance.categories.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Product)
+def product_deleting(sender, instance, **kwargs):
+    # The M2M rows are deleted without m2m_changed
+    instance._removed_category_ids = list(
+        Product.categories.through.objects
+        .filter(product_id=instance.pk, product__is_active=True)
+        .values_list('category_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    facets.adjust_counts(
+        instance.__dict__.pop('_removed_category_ids', []),
+        -1
+    )
+
+
+@receiver(post_save, sender=Unit)
+@receiver(post_delete, sender=Unit)
+def invalidate_unit(sender, instance, **kwargs):
+    _discard(cache.units.invalidate)
+    _discard(cache.discard_unit, instance.pk)
+    snapshot.schedule_rebuild()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    _discard(cache.categories.invalidate)
+    _discard(cache.discard_categories, [instance.pk])
+    snapshot.schedule_rebuild()
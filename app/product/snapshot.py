@@ -0,0 +1,208 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import Category, Unit, Product
+
+from product.serializers import (CategorySerializer, UnitSerializer,
+                                 ProductSerializer)
+
+SNAPSHOT_DIR = 'catalog'
+CHUNK_SIZE = 2000
+VERSION_KEY = 'catalog_snapshot:version'
+
+_build_lock = threading.Lock()
+_timer_lock = threading.Lock()
+_timer = None
+_deadline = None
+
+
+def current_version():
+    """
+    Return the version of the catalog, kept in the shared cache
+
+    Every committed catalog write moves it, see `schedule_rebuild`.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex[:16], None)
+        version = cache.get(VERSION_KEY)
+
+    return version
+
+
+def snapshot_path(version):
+    return os.path.join(
+        settings.MEDIA_ROOT,
+        SNAPSHOT_DIR,
+        f'catalog-{version}.json.gz'
+    )
+
+
+def latest_snapshot():
+    """Return the path of the most recently built snapshot, if any"""
+
+    directory = os.path.join(settings.MEDIA_ROOT, SNAPSHOT_DIR)
+    try:
+        paths = [
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.startswith('catalog-') and name.endswith('.json.gz')
+        ]
+    except FileNotFoundError:
+        return None
+
+    return max(paths, key=os.path.getmtime, default=None)
+
+
+def version_of(path):
+    return os.path.basename(path)[len('catalog-'):-len('.json.gz')]
+
+
+def build_snapshot():
+    """Render the active catalog to a gzip file and return its path"""
+
+    with _build_lock:
+        version = current_version()
+        path = snapshot_path(version)
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(descriptor, 'wb') as raw, \
+                    gzip.GzipFile(fileobj=raw, mode='wb') as output:
+                _write_document(output, version)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        _remove_old_snapshots(keep=path)
+        return path
+
+
+def schedule_rebuild():
+    """
+    Move the catalog version and rebuild the snapshot in the background
+    once the write commits
+    """
+    transaction.on_commit(_catalog_changed)
+
+
+def _catalog_changed():
+    cache.set(VERSION_KEY, uuid.uuid4().hex[:16], None)
+    _start_timer()
+
+
+def _start_timer():
+    # Debounce: a burst of writes triggers a single rebuild, but a steady
+    # stream of writes cannot put it off past the deadline
+    global _timer, _deadline
+
+    with _timer_lock:
+        now = time.monotonic()
+        if _deadline is None:
+            _deadline = now + settings.CATALOG_SNAPSHOT_MAX_WAIT
+        if _timer is not None:
+            _timer.cancel()
+        _timer = threading.Timer(
+            max(min(settings.CATALOG_SNAPSHOT_DELAY, _deadline - now), 0),
+            _rebuild_in_background
+        )
+        _timer.daemon = True
+        _timer.start()
+
+
+def _rebuild_in_background():
+    global _deadline
+
+    with _timer_lock:
+        _deadline = None
+    try:
+        build_snapshot()
+    finally:
+        connection.close()
+
+
+def _write_document(output, version):
+    encoder = JSONEncoder()
+    # Everything committed before this instant is in the document; the
+    # overlap catches rows committed late, as in `?updated_since=`
+    generated_at = timezone.now()
+    header = {
+        'version': version,
+        'generated_at': generated_at,
+        'high_water_mark': generated_at - timedelta(
+            seconds=settings.DELTA_SYNC_OVERLAP
+        )
+    }
+    output.write(encoder.encode(header)[:-1].encode())
+
+    # Stock changes with every sale; terminals read it through
+    # `?updated_since=` rather than from the snapshot
+    sections = (
+        ('units', Unit.objects.filter(is_active=True), UnitSerializer, {}),
+        (
+            'categories',
+            Category.objects.filter(is_active=True),
+            CategorySerializer,
+            {}
+        ),
+        (
+            'products',
+            Product.objects.filter(is_active=True).prefetch_related(
+                Prefetch('categories', queryset=Category.objects.only('id'))
+            ),
+            ProductSerializer,
+            {'omit': ['unit_in_stock']}
+        ),
+    )
+    for name, queryset, serializer_class, options in sections:
+        output.write(f', {json.dumps(name)}: ['.encode())
+        separator = ''
+        for chunk in _chunks(queryset):
+            data = serializer_class(chunk, many=True, **options).data
+            for item in data:
+                output.write((separator + encoder.encode(item)).encode())
+                separator = ','
+        output.write(b']')
+
+    output.write(b'}')
+
+
+def _chunks(queryset):
+    """Yield the rows in id order, one keyset chunk at a time"""
+
+    last_id = 0
+    while True:
+        chunk = list(
+            queryset.filter(id__gt=last_id).order_by('id')[:CHUNK_SIZE]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def _remove_old_snapshots(keep):
+    directory = os.path.dirname(keep)
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if path != keep and name.startswith('catalog-'):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,339 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (Case, F, FloatField, OuterRef, Subquery, Sum,
+                              Value, When)
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.models import Product, StockMovement, StockShard, StockSnapshot
+
+# Movements of a kind must have a quantity of this sign
+SIGNS = {
+    StockMovement.RECEIPT: 1,
+    StockMovement.SALE: -1,
+    StockMovement.RETURN: 1,
+}
+
+# Conditional decrements: a sale only goes through when the row holds
+# enough stock, and the ledger row is written in the same statement
+SELL_FROM_PRODUCT = """
+WITH sold AS (
+    UPDATE core_product
+    SET unit_in_stock = unit_in_stock - %(quantity)s, updated_at = now()
+    WHERE id = %(product_id)s
+        AND stock_shards = 0
+        AND unit_in_stock >= %(quantity)s
+    RETURNING id
+)
+INSERT INTO core_stockmovement
+    (product_id, kind, quantity, note, user_id, created_at)
+SELECT id, 'sale', -%(quantity)s, %(note)s, %(user_id)s, %(created_at)s
+FROM sold
+RETURNING id
+"""
+
+# Any shard with enough stock that no other sale holds
+SELL_FROM_SHARD = """
+WITH shard AS (
+    SELECT id
+    FROM core_stockshard
+    WHERE product_id = %(product_id)s AND quantity >= %(quantity)s
+    ORDER BY random()
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+), sold AS (
+    UPDATE core_stockshard
+    SET quantity = quantity - %(quantity)s
+    FROM shard
+    WHERE core_stockshard.id = shard.id
+    RETURNING core_stockshard.product_id
+)
+INSERT INTO core_stockmovement
+    (product_id, kind, quantity, note, user_id, created_at)
+SELECT product_id, 'sale', -%(quantity)s, %(note)s, %(user_id)s, %(created_at)s
+FROM sold
+RETURNING id
+"""
+
+TAKE_SNAPSHOTS = """
+INSERT INTO core_stocksnapshot (product_id, balance, taken_at)
+SELECT moved.product_id, coalesce(previous.balance, 0) + moved.quantity, %s
+FROM (
+    SELECT product_id, sum(quantity) AS quantity
+    FROM core_stockmovement
+    WHERE created_at > coalesce(%s, '-infinity'::timestamptz)
+        AND created_at <= %s
+    GROUP BY product_id
+) AS moved
+LEFT JOIN LATERAL (
+    SELECT balance
+    FROM core_stocksnapshot
+    WHERE product_id = moved.product_id AND taken_at <= %s
+    ORDER BY taken_at DESC
+    LIMIT 1
+) AS previous ON true
+ON CONFLICT (product_id, taken_at) DO NOTHING
+"""
+
+# Latest time no open transaction can still commit movements before: the
+# start of the oldest transaction of another session, less a margin for
+# movements stamped just before their transaction began
+SNAPSHOT_HORIZON = """
+SELECT least(now(), min(xact_start)) - %s * interval '1 second'
+FROM pg_stat_activity
+WHERE datname = current_database()
+    AND backend_type = 'client backend'
+    AND pid <> pg_backend_pid()
+"""
+
+
+def record_movements(movements):
+    """
+    Append unsaved `StockMovement`s to the ledger and add them to the
+    stock of their products in one `UPDATE`
+    """
+    if not movements:
+        return []
+
+    totals = defaultdict(float)
+    for movement in movements:
+        totals[movement.product_id] += movement.quantity
+
+    with transaction.atomic():
+        movements = StockMovement.objects.bulk_create(movements)
+        # The first shard of a hot product takes its movements
+        StockShard.objects \
+            .filter(product_id__in=totals, shard=0) \
+            .update(quantity=F('quantity') + _by_product(totals, 'product'))
+        Product.objects.filter(pk__in=totals).update(
+            unit_in_stock=Case(
+                When(stock_shards=0, then=F('unit_in_stock') +
+                     _by_product(totals, 'pk')),
+                default=_shard_total()
+            ),
+            updated_at=timezone.now()
+        )
+
+    return movements
+
+
+def record_movement(product_id, kind, quantity, note='', user=None):
+    """Append one movement to the ledger and apply it to the stock"""
+
+    movement = StockMovement(
+        product_id=product_id,
+        kind=kind,
+        quantity=quantity,
+        note=note,
+        user=user
+    )
+
+    return record_movements([movement])[0]
+
+
+def sell(product_id, quantity, note='', user=None):
+    """
+    Take `quantity` out of the stock of a product as a sale, or raise a
+    ValidationError when there is not enough stock
+
+    The stock is never read and written back: the decrement is a single
+    conditional `UPDATE`, so concurrent sales neither lose updates nor
+    oversell. Sales of hot products take a shard nobody else is selling
+    from; only when no single shard holds enough are all shards locked.
+    """
+    params = {
+        'product_id': product_id,
+        'quantity': quantity,
+        'note': note,
+        'user_id': user.pk if user is not None else None,
+        'created_at': timezone.now(),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(SELL_FROM_PRODUCT, params)
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(SELL_FROM_SHARD, params)
+            row = cursor.fetchone()
+
+    if row is None:
+        return _sell_across_shards(product_id, quantity, note, user)
+
+    return StockMovement(
+        id=row[0],
+        product_id=product_id,
+        kind=StockMovement.SALE,
+        quantity=-quantity,
+        note=note,
+        user=user,
+        created_at=params['created_at']
+    )
+
+
+def _sell_across_shards(product_id, quantity, note, user):
+    with transaction.atomic():
+        # Locked in a fixed order, so two of these cannot deadlock
+        shards = list(
+            StockShard.objects
+            .select_for_update()
+            .filter(product_id=product_id)
+            .order_by('shard')
+        )
+        if sum(shard.quantity for shard in shards) < quantity:
+            raise ValidationError({'quantity': ['Not enough stock.']})
+
+        remaining = quantity
+        for shard in shards:
+            taken = min(max(shard.quantity, 0), remaining)
+            if taken:
+                StockShard.objects \
+                    .filter(pk=shard.pk) \
+                    .update(quantity=F('quantity') - taken)
+                remaining -= taken
+
+        return StockMovement.objects.create(
+            product_id=product_id,
+            kind=StockMovement.SALE,
+            quantity=-quantity,
+            note=note,
+            user=user
+        )
+
+
+def shard_stock(product_id, shards):
+    """
+    Spread the stock of a product evenly over `shards` counter rows, or
+    gather it back into `unit_in_stock` with 0
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        parts = StockShard.objects \
+            .select_for_update() \
+            .filter(product_id=product_id)
+        total = product.unit_in_stock
+        if product.stock_shards:
+            total = sum(part.quantity for part in parts)
+        parts.delete()
+
+        if shards:
+            share = total // shards
+            StockShard.objects.bulk_create([
+                StockShard(
+                    product_id=product_id,
+                    shard=index,
+                    quantity=share if index else total - share * (shards - 1)
+                )
+                for index in range(shards)
+            ])
+        Product.objects.filter(pk=product_id).update(
+            unit_in_stock=total,
+            stock_shards=shards,
+            updated_at=timezone.now()
+        )
+
+    return total
+
+
+def sync_shards(product_ids=None):
+    """
+    Refresh `unit_in_stock` of the sharded products whose shards moved;
+    return the number of products refreshed
+    """
+    products = Product.objects \
+        .filter(stock_shards__gt=0) \
+        .annotate(shard_total=_shard_total()) \
+        .exclude(unit_in_stock=F('shard_total'))
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    product_ids = list(products.values_list('pk', flat=True))
+    if not product_ids:
+        return 0
+
+    updated = Product.objects \
+        .filter(pk__in=product_ids) \
+        .update(unit_in_stock=_shard_total(), updated_at=timezone.now())
+
+    return updated
+
+
+def current_stock():
+    """
+    Expression of the stock of a product: `unit_in_stock`, or the sum of
+    the shards of a hot product
+    """
+    return Case(
+        When(stock_shards=0, then=F('unit_in_stock')),
+        default=_shard_total()
+    )
+
+
+def _by_product(totals, field):
+    return Case(
+        *[When(**{field: pk}, then=Value(total))
+          for pk, total in totals.items()],
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+
+
+def _shard_total():
+    return Subquery(
+        StockShard.objects
+        .filter(product_id=OuterRef('pk'))
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values('total'),
+        output_field=FloatField()
+    )
+
+
+def balance_at(product_id, at):
+    """
+    Return the stock of a product at `at`: the latest snapshot up to then
+    plus the movements created after it
+    """
+    latest = StockSnapshot.objects \
+        .filter(product_id=product_id, taken_at__lte=at) \
+        .order_by('-taken_at') \
+        .first()
+
+    movements = StockMovement.objects.filter(
+        product_id=product_id,
+        created_at__lte=at
+    )
+    balance = 0
+    if latest is not None:
+        movements = movements.filter(created_at__gt=latest.taken_at)
+        balance = latest.balance
+
+    return balance + (movements.aggregate(total=Sum('quantity'))['total'] or 0)
+
+
+def take_snapshots(at=None):
+    """
+    Snapshot the balance of every product moved since the previous
+    snapshot; return the number of snapshots taken
+
+    The snapshot is taken at `at`, but never later than the horizon of
+    the open transactions: a movement stamped before a snapshot but
+    committed after it would be missing from the snapshot and, being
+    older than it, from every balance read from it. Products without
+    movements keep their previous snapshot, which still holds their
+    balance.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SNAPSHOT_HORIZON, [settings.STOCK_SNAPSHOT_LAG])
+        horizon = cursor.fetchone()[0]
+    at = min(at, horizon) if at is not None else horizon
+
+    since = StockSnapshot.objects \
+        .filter(taken_at__lte=at) \
+        .order_by('-taken_at') \
+        .values_list('taken_at', flat=True) \
+        .first()
+
+    with connection.cursor() as cursor:
+        cursor.execute(TAKE_SNAPSHOTS, [at, since, at, since])
+        return cursor.rowcount
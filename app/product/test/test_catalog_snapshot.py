@@ -0,0 +1,139 @@
+import gzip
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product
+from product import snapshot
+
+SNAPSHOT_URL = reverse('product:snapshot')
+
+
+class CatalogSnapshotApiTests(TestCase):
+    """Test the pre-rendered catalog snapshot"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_settings.enable()
+
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier104@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+        self.unit = Unit.objects.create(name='box', short_name='bx')
+        self.category = Category.objects.create(name='Snacks')
+        self.product = Product.objects.create(
+            code='8001',
+            name='Piattos',
+            unit=self.unit,
+            unit_in_stock=100,
+            unit_price=35,
+            discount_percentage=0,
+            reorder_level=20
+        )
+        self.product.categories.add(self.category)
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def _document(self, res):
+        content = b''.join(res.streaming_content)
+        if res.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+
+        return json.loads(content)
+
+    def test_snapshot_contains_active_catalog(self):
+        """Test that the snapshot holds every active catalog row"""
+
+        Unit.objects.create(name='old', short_name='o', is_active=False)
+
+        res = self.client.get(SNAPSHOT_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        document = self._document(res)
+        self.assertEqual(document['version'], res['ETag'].strip('"'))
+        self.assertEqual(
+            [unit['id'] for unit in document['units']],
+            [self.unit.id]
+        )
+        self.assertEqual(document['categories'][0]['name'], 'Snacks')
+        self.assertEqual(document['products'][0]['code'], '8001')
+        self.assertEqual(
+            document['products'][0]['categories'],
+            [self.category.id]
+        )
+        self.assertNotIn('unit_in_stock', document['products'][0])
+
+    def test_snapshot_without_gzip_support(self):
+        """Test that clients without gzip get plain JSON"""
+
+        res = self.client.get(SNAPSHOT_URL)
+
+        self.assertNotIn('Content-Encoding', res)
+        self.assertEqual(len(self._document(res)['products']), 1)
+
+    def test_snapshot_not_modified(self):
+        """Test that a matching ETag answers 304"""
+
+        etag = self.client.get(SNAPSHOT_URL)['ETag']
+
+        res = self.client.get(SNAPSHOT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_snapshot_version_follows_writes(self):
+        """Test that a write produces a new snapshot version"""
+
+        path = snapshot.build_snapshot()
+        with mock.patch('product.snapshot._start_timer'), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Piattos Cheese'
+            self.product.save()
+
+        new_path = snapshot.build_snapshot()
+
+        self.assertNotEqual(path, new_path)
+        with gzip.open(new_path) as content:
+            document = json.load(content)
+        self.assertEqual(document['products'][0]['name'], 'Piattos Cheese')
+
+    def test_rebuild_scheduled_after_commit(self):
+        """Test that catalog writes schedule a background rebuild"""
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.unit.name = 'pack'
+            self.unit.save()
+
+        self.assertIn(snapshot._catalog_changed, callbacks)
+
+    @override_settings(CATALOG_SNAPSHOT_DELAY=10, CATALOG_SNAPSHOT_MAX_WAIT=25)
+    def test_rebuild_not_put_off_past_max_wait(self):
+        """Test that a stream of writes cannot delay the rebuild forever"""
+
+        self.addCleanup(setattr, snapshot, '_deadline', None)
+        self.addCleanup(setattr, snapshot, '_timer', None)
+        with mock.patch('product.snapshot.threading.Timer') as timer, \
+                mock.patch('product.snapshot.time.monotonic') as monotonic:
+            for now in (100, 108, 116, 124):
+                monotonic.return_value = now
+                snapshot._start_timer()
+
+        self.assertEqual(
+            [call.args[0] for call in timer.call_args_list],
+            [10, 10, 9, 1]
+        )
@@ -61,7 +61,7 @@ class PrivateCategoryApiTests(TestCase):
         categories = Category.objects.all().order_by('name')
         serializer = CategorySerializer(categories, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_successful_retrieve_categories_by_non_manager(self):
         """Test success retrieve categories by non-manager"""
@@ -77,7 +77,7 @@ class PrivateCategoryApiTests(TestCase):
         categories = Category.objects.all().order_by('name')
         serializer = CategorySerializer(categories, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_successful_create_category_by_manager(self):
         """Test successful creation of a new category by manager"""
@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, CategoryProductCount, Product
+
+from product import bulk, facets
+
+FACETS_URL = reverse('product:category-facets')
+
+
+class CategoryFacetTests(TestCase):
+    """Test the per-category product counts"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier909@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.liquor = Category.objects.create(name='Liquor')
+        self.gin = Category.objects.create(name='Gin')
+        self.ginebra = self._product('8001', 'Ginebra', on_sale=True)
+        self.tanduay = self._product('8002', 'Tanduay')
+
+    def _product(self, code, name, **params):
+        return Product.objects.create(
+            code=code,
+            name=name,
+            unit=self.unit,
+            unit_in_stock=10,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=5,
+            **params
+        )
+
+    def _stored(self):
+        return dict(
+            CategoryProductCount.objects
+            .values_list('category_id', 'product_count')
+        )
+
+    def _actual(self):
+        facets.recount()
+        return self._stored()
+
+    def test_counts_follow_m2m_changes(self):
+        """Test that adds, removes and clears adjust the counts"""
+
+        self.ginebra.categories.add(self.liquor, self.gin)
+        self.ginebra.categories.add(self.liquor)
+        self.liquor.product_set.add(self.tanduay)
+        self.assertEqual(self._stored(), {self.liquor.id: 2, self.gin.id: 1})
+
+        self.ginebra.categories.remove(self.gin, self.gin.id + 100)
+        self.tanduay.categories.set([self.gin])
+        self.assertEqual(self._stored(), {self.liquor.id: 1, self.gin.id: 1})
+
+        self.liquor.product_set.clear()
+        self.tanduay.categories.clear()
+        self.assertEqual(self._stored(), {self.liquor.id: 0, self.gin.id: 0})
+
+    def test_counts_follow_product_delete(self):
+        """Test that deleting a product decrements its categories"""
+
+        self.ginebra.categories.add(self.liquor, self.gin)
+        self.tanduay.categories.add(self.liquor)
+
+        self.ginebra.delete()
+
+        self.assertEqual(self._stored(), {self.liquor.id: 1, self.gin.id: 0})
+        self.assertEqual(self._stored(), self._actual())
+
+    def test_facets_from_summary(self):
+        """Test the facet endpoint without filters reads the counts"""
+
+        self.ginebra.categories.add(self.liquor, self.gin)
+        self.tanduay.categories.add(self.liquor)
+        Category.objects.create(name='Beer', is_active=False)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': self.gin.id, 'name': 'Gin', 'product_count': 1},
+            {'id': self.liquor.id, 'name': 'Liquor', 'product_count': 2},
+        ])
+
+    def test_facets_with_filters(self):
+        """Test that product filters narrow the counts"""
+
+        self.ginebra.categories.add(self.liquor, self.gin)
+        self.tanduay.categories.add(self.liquor)
+
+        res = self.client.get(FACETS_URL, {'on_sale': 'false'})
+
+        self.assertEqual(
+            {item['name']: item['product_count'] for item in res.data},
+            {'Gin': 0, 'Liquor': 1}
+        )
+
+    def test_counts_only_active_products(self):
+        """Test that inactive products are left out of the counts"""
+
+        self.ginebra.categories.add(self.liquor)
+        hidden = self._product('8003', 'Emperador', is_active=False)
+        hidden.categories.add(self.liquor)
+        self.gin.product_set.add(self.tanduay, hidden)
+        self.assertEqual(self._stored(), {self.liquor.id: 1, self.gin.id: 1})
+
+        hidden.is_active = True
+        hidden.save()
+        self.assertEqual(self._stored(), {self.liquor.id: 2, self.gin.id: 2})
+
+        self.tanduay.is_active = False
+        self.tanduay.save()
+        self.gin.product_set.remove(self.tanduay)
+        self.assertEqual(self._stored(), {self.liquor.id: 2, self.gin.id: 1})
+        self.assertEqual(self._stored(), self._actual())
+
+        res = self.client.get(FACETS_URL, {'on_sale': 'true'})
+        self.assertEqual(
+            {item['name']: item['product_count'] for item in res.data},
+            {'Gin': 0, 'Liquor': 1}
+        )
+
+    def test_bulk_deactivate_recounts(self):
+        """Test that deactivating through the bulk upsert recounts"""
+
+        self.ginebra.categories.add(self.liquor)
+        self.tanduay.categories.add(self.liquor)
+
+        bulk.upsert_products([{'code': '8002', 'is_active': False}])
+
+        self.assertEqual(self._stored(), {self.liquor.id: 1})
@@ -0,0 +1,229 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product
+from product import bulk
+
+BULK_URL = reverse('product:product-bulk-upsert')
+
+
+def sample_row(unit, **params):
+    defaults = {
+        'code': '9001',
+        'name': 'Ginebra',
+        'unit': unit.id,
+        'unit_in_stock': 100,
+        'unit_price': '100.00',
+        'discount_percentage': '0.00',
+        'reorder_level': 50
+    }
+    defaults.update(params)
+
+    return defaults
+
+
+class ProductBulkUpsertApiTests(TestCase):
+    """Test the bulk product upsert endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager105@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.category = Category.objects.create(name='Liquor')
+
+    def _post(self, rows):
+        return self.client.post(BULK_URL, rows, format='json')
+
+    def test_bulk_create_and_update(self):
+        """Test that new codes are created and existing ones updated"""
+
+        existing = Product.objects.create(
+            code='9001',
+            name='Ginebra',
+            unit=self.unit,
+            unit_in_stock=10,
+            unit_price=90,
+            discount_percentage=0,
+            reorder_level=5
+        )
+
+        res = self._post([
+            {'code': '9001', 'unit_price': '95.50', 'on_sale': True},
+            sample_row(self.unit, code='9002', name='Tanduay'),
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['updated'], 1)
+        self.assertEqual(res.data['errors'], [])
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.unit_price, Decimal('95.50'))
+        self.assertTrue(existing.on_sale)
+        self.assertEqual(existing.name, 'Ginebra')
+        self.assertTrue(Product.objects.filter(code='9002').exists())
+
+    def test_bulk_rewrites_categories(self):
+        """Test that sent categories replace the existing ones"""
+
+        other = Category.objects.create(name='Gin')
+        product = Product.objects.create(
+            code='9001',
+            name='Ginebra',
+            unit=self.unit,
+            unit_in_stock=10,
+            unit_price=90,
+            discount_percentage=0,
+            reorder_level=5
+        )
+        product.categories.add(self.category)
+
+        self._post([
+            {'code': '9001', 'categories': [other.id]},
+            sample_row(self.unit, code='9002', categories=[self.category.id]),
+        ])
+
+        self.assertEqual(list(product.categories.all()), [other])
+        self.assertEqual(
+            list(Product.objects.get(code='9002').categories.all()),
+            [self.category]
+        )
+
+    def test_bulk_reports_row_errors(self):
+        """Test that invalid rows are reported and the rest saved"""
+
+        res = self._post([
+            sample_row(self.unit, code='9001'),
+            {**sample_row(self.unit, code='9002'), 'unit': 0},
+            sample_row(self.unit, code='9003', name=''),
+            sample_row(self.unit, code='9001'),
+            sample_row(self.unit, code='9004', categories=[0]),
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(
+            [error['index'] for error in res.data['errors']],
+            [1, 2, 3, 4]
+        )
+        self.assertIn('unit', res.data['errors'][0]['errors'])
+        self.assertEqual(
+            list(Product.objects.values_list('code', flat=True)),
+            ['9001']
+        )
+
+    def test_bulk_reports_non_string_codes(self):
+        """Test that a code that is not a string is that row's error"""
+
+        res = self._post([
+            sample_row(self.unit, code=['9001']),
+            sample_row(self.unit, code={'value': '9002'}),
+            sample_row(self.unit, code='9003'),
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(
+            [error['index'] for error in res.data['errors']],
+            [0, 1]
+        )
+        self.assertIn('code', res.data['errors'][0]['errors'])
+
+    def test_bulk_code_inserted_concurrently(self):
+        """Test that a code inserted by another request is updated"""
+
+        validate = bulk._validate
+
+        def validate_then_insert(rows, existing, result):
+            # Another request inserts the code once it was looked up
+            Product.objects.create(
+                code='9001',
+                name='Ginebra',
+                unit=self.unit,
+                unit_in_stock=10,
+                unit_price=90,
+                discount_percentage=0,
+                reorder_level=5
+            )
+            return validate(rows, existing, result)
+
+        with mock.patch('product.bulk._validate', validate_then_insert):
+            res = self._post([
+                sample_row(self.unit, code='9001', unit_price='95.00'),
+                sample_row(self.unit, code='9002'),
+            ])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['updated'], 1)
+        product = Product.objects.get(code='9001')
+        self.assertEqual(product.unit_price, Decimal('95.00'))
+        self.assertEqual(product.unit_in_stock, 100)
+
+    def test_bulk_relations_saved_by_another_worker(self):
+        """Test that ids missing from the cached tables are looked up"""
+
+        self._post([sample_row(self.unit, code='9001')])
+        # Inserted without the signals, as another worker would have
+        unit, = Unit.objects.bulk_create([Unit(name='case', short_name='cs')])
+
+        res = self._post([sample_row(unit, code='9002')])
+
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(Product.objects.get(code='9002').unit, unit)
+
+    def test_bulk_query_count_independent_of_rows(self):
+        """Test that the number of queries does not grow per row"""
+
+        def count_queries(start):
+            rows = [
+                sample_row(
+                    self.unit,
+                    code=str(start + index),
+                    categories=[self.category.id]
+                )
+                for index in range(20)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                self._post(rows)
+            return len(context.captured_queries)
+
+        created = count_queries(1000)
+        updated = count_queries(1000)
+
+        # The insert runs in a savepoint, so a conflicting code can retry
+        self.assertLessEqual(created, 13)
+        self.assertLessEqual(updated, 11)
+
+    def test_bulk_requires_list(self):
+        """Test that a non-list payload is rejected"""
+
+        res = self._post(sample_row(self.unit))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_by_non_manager(self):
+        """Test that cashiers cannot bulk upsert"""
+
+        cashier = get_user_model().objects.create_cashier(
+            'testcashier105@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(cashier)
+
+        res = self._post([sample_row(self.unit)])
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,180 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product, StockMovement
+from product import cache, stock
+from product.serializers import ProductDetailSerializer
+
+PRODUCTS_URL = reverse('product:product-list')
+
+
+def by_code_url(code):
+    """Return product by code URL"""
+
+    return reverse('product:product-by-code', args=[code])
+
+
+class ProductByCodeApiTests(TestCase):
+    """Test the exact code lookup of products"""
+
+    def setUp(self):
+        cache.product_by_code.clear()
+
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier103@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+        self.unit = Unit.objects.create(name='box', short_name='bx')
+        self.category = Category.objects.create(name='Snacks')
+        self.product = Product.objects.create(
+            code='4800016644',
+            name='Piattos',
+            unit=self.unit,
+            unit_in_stock=100,
+            unit_price=35,
+            discount_percentage=0,
+            reorder_level=20
+        )
+        self.product.categories.add(self.category)
+
+    def test_retrieve_by_code(self):
+        """Test retrieving a product detail by code"""
+
+        res = self.client.get(by_code_url(self.product.code))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            ProductDetailSerializer(
+                self.product,
+                omit=['unit_in_stock']
+            ).data
+        )
+
+    def test_retrieve_by_unknown_code(self):
+        """Test that an unknown code returns not found"""
+
+        res = self.client.get(by_code_url('0000'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_hit_skips_database(self):
+        """Test that a repeated lookup runs no queries"""
+
+        self.client.get(by_code_url(self.product.code))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(by_code_url(self.product.code))
+
+        self.assertEqual(res.data['name'], 'Piattos')
+
+    def test_invalidated_on_product_save(self):
+        """Test that saving the product evicts its cached detail"""
+
+        self.client.get(by_code_url(self.product.code))
+        self.product.name = 'Piattos Cheese'
+        self.product.save()
+
+        res = self.client.get(by_code_url(self.product.code))
+
+        self.assertEqual(res.data['name'], 'Piattos Cheese')
+
+    def test_invalidated_on_code_change(self):
+        """Test that the old code stops resolving after a code change"""
+
+        old_code = self.product.code
+        self.client.get(by_code_url(old_code))
+        self.product.code = '4800016645'
+        self.product.save()
+
+        res = self.client.get(by_code_url(old_code))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalidated_on_unit_save(self):
+        """Test that renaming the unit evicts the cached detail"""
+
+        self.client.get(by_code_url(self.product.code))
+        self.unit.name = 'pack'
+        self.unit.save()
+
+        res = self.client.get(by_code_url(self.product.code))
+
+        self.assertEqual(res.data['unit']['name'], 'pack')
+
+    def test_invalidated_on_categories_change(self):
+        """Test that changing the categories evicts the cached detail"""
+
+        self.client.get(by_code_url(self.product.code))
+        other = Category.objects.create(name='Chips')
+        other.product_set.add(self.product)
+
+        res = self.client.get(by_code_url(self.product.code))
+
+        self.assertEqual(len(res.data['categories']), 2)
+
+    def test_invalidated_by_another_worker(self):
+        """Test that a write made in another process evicts the detail"""
+
+        other = Product.objects.create(
+            code='4800016650',
+            name='Nova',
+            unit=self.unit,
+            unit_price=30,
+            discount_percentage=0,
+            reorder_level=20
+        )
+        self.client.get(by_code_url(self.product.code))
+        self.client.get(by_code_url(other.code))
+        Product.objects \
+            .filter(pk=self.product.pk) \
+            .update(name='Piattos Cheese')
+        # What discard_products() leaves behind for the other workers
+        cache.bump_versions([f'product_by_code:product:{self.product.id}'])
+
+        res = self.client.get(by_code_url(self.product.code))
+        self.assertEqual(res.data['name'], 'Piattos Cheese')
+
+        with self.assertNumQueries(0):
+            self.client.get(by_code_url(other.code))
+
+    def test_sales_keep_cached_detail(self):
+        """Test that the detail leaves out the stock and survives sales"""
+
+        res = self.client.get(by_code_url(self.product.code))
+        self.assertNotIn('unit_in_stock', res.data)
+
+        stock.record_movement(self.product.id, StockMovement.RECEIPT, 5)
+        stock.sell(self.product.id, 3)
+
+        with self.assertNumQueries(0):
+            self.client.get(by_code_url(self.product.code))
+
+    def test_failed_create_duplicate_code(self):
+        """Test that product codes must be unique"""
+
+        manager = get_user_model().objects.create_manager(
+            'testmanager103@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(manager)
+        payload = {
+            'code': self.product.code,
+            'name': 'Duplicate',
+            'unit': self.unit.id,
+            'unit_in_stock': 1,
+            'unit_price': 1,
+            'discount_percentage': 0,
+            'reorder_level': 1
+        }
+
+        res = self.client.post(PRODUCTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
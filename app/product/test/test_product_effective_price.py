@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Product
+
+PRODUCTS_URL = reverse('product:product-list')
+
+
+class ProductEffectivePriceApiTests(TestCase):
+    """Test the discounted price computed by the database"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier919@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self._product('8001', 'Ginebra', 100, 25)
+        self._product('8002', 'Tanduay', 90, 0)
+        self._product('8003', 'Emperador', 120, 50)
+
+    def _product(self, code, name, price, discount):
+        return Product.objects.create(
+            code=code,
+            name=name,
+            unit=self.unit,
+            unit_in_stock=10,
+            unit_price=price,
+            discount_percentage=discount,
+            reorder_level=5
+        )
+
+    def _names(self, params):
+        res = self.client.get(PRODUCTS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [product['name'] for product in res.data['results']]
+
+    def test_effective_price_rendered(self):
+        """Test that the list renders the discounted price"""
+
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(
+            {product['name']: product['effective_price']
+             for product in res.data['results']},
+            {'Emperador': '60.00', 'Ginebra': '75.00', 'Tanduay': '90.00'}
+        )
+
+    def test_set_based_update(self):
+        """Test that queryset updates recompute the price in the database"""
+
+        Product.objects.filter(code='8002').update(discount_percentage=12.5)
+
+        self.assertEqual(
+            Product.objects.get(code='8002').effective_price,
+            Decimal('78.75')
+        )
+
+    def test_order_by_effective_price(self):
+        """Test sorting by the effective price across pages"""
+
+        first = self.client.get(
+            PRODUCTS_URL,
+            {'ordering': '-effective_price', 'page_size': 2}
+        )
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(
+            [product['name'] for product in first.data['results']],
+            ['Tanduay', 'Ginebra']
+        )
+        self.assertEqual(
+            [product['name'] for product in second.data['results']],
+            ['Emperador']
+        )
+
+    def test_effective_price_range(self):
+        """Test filtering on an effective price range"""
+
+        self.assertEqual(
+            self._names({
+                'effective_price_min': '70',
+                'effective_price_max': '80',
+                'ordering': 'effective_price'
+            }),
+            ['Ginebra']
+        )
+
+    def test_invalid_ordering(self):
+        """Test that only indexed sort keys are accepted"""
+
+        res = self.client.get(PRODUCTS_URL, {'ordering': 'reorder_level'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', res.data)
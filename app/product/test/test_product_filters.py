@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product
+
+PRODUCTS_URL = reverse('product:product-list')
+
+
+class ProductFilterApiTests(TestCase):
+    """Test the product list filters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier707@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.liquor = Category.objects.create(name='Liquor')
+        self.gin = Category.objects.create(name='Gin')
+
+        self.ginebra = self._product('8001', 'Ginebra', 95, 10, on_sale=True)
+        self.ginebra.categories.add(self.liquor, self.gin)
+        self.tanduay = self._product('8002', 'Tanduay', 120, 0)
+        self.tanduay.categories.add(self.liquor)
+        self.water = self._product('8003', 'Water', 20, 50, is_active=False)
+
+    def _product(self, code, name, price, stock, **params):
+        return Product.objects.create(
+            code=code,
+            name=name,
+            unit=self.unit,
+            unit_in_stock=stock,
+            unit_price=price,
+            discount_percentage=0,
+            reorder_level=5,
+            **params
+        )
+
+    def _names(self, params):
+        res = self.client.get(PRODUCTS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [product['name'] for product in res.data['results']]
+
+    def test_categories_any_without_duplicates(self):
+        """Test that a product in several matching categories is listed once"""
+
+        names = self._names(
+            {'categories': f'{self.liquor.id},{self.gin.id}'}
+        )
+
+        self.assertEqual(names, ['Ginebra', 'Tanduay'])
+
+    def test_categories_all(self):
+        """Test that categories_all requires every category"""
+
+        names = self._names(
+            {'categories_all': f'{self.liquor.id},{self.gin.id}'}
+        )
+
+        self.assertEqual(names, ['Ginebra'])
+
+    def test_price_range(self):
+        """Test filtering on a unit price range"""
+
+        self.assertEqual(
+            self._names({'price_min': '90', 'price_max': '100.50'}),
+            ['Ginebra']
+        )
+
+    def test_stock_thresholds(self):
+        """Test filtering on stock thresholds"""
+
+        self.assertEqual(self._names({'stock_max': '0'}), ['Tanduay'])
+        self.assertEqual(
+            self._names({'stock_min': '10'}),
+            ['Ginebra', 'Water']
+        )
+
+    def test_flags(self):
+        """Test filtering on the on_sale and is_active flags"""
+
+        self.assertEqual(self._names({'on_sale': 'true'}), ['Ginebra'])
+        self.assertEqual(
+            self._names({'is_active': 'false'}),
+            ['Water']
+        )
+        self.assertEqual(
+            self._names({'is_active': '1', 'on_sale': '0'}),
+            ['Tanduay']
+        )
+
+    def test_invalid_values(self):
+        """Test that malformed filter values are rejected"""
+
+        for params in ({'price_min': 'cheap'}, {'on_sale': 'maybe'},
+                       {'categories': 'a,b'}, {'stock_max': 'nan'}):
+            res = self.client.get(PRODUCTS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), res.data)
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Product
+
+LOW_STOCK_URL = reverse('product:product-low-stock')
+SUMMARY_URL = reverse('product:product-summary')
+
+
+class ProductLowStockApiTests(TestCase):
+    """Test the low-stock list and the product summary"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager808@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self._product('8001', 'Ginebra', stock=3, reorder_level=5)
+        self._product('8002', 'Tanduay', stock=0, reorder_level=5)
+        self._product('8003', 'Emperador', stock=5, reorder_level=5)
+        self._product('8004', 'Alfonso', stock=50, reorder_level=5)
+        self._product(
+            '8005', 'Fundador', stock=0, reorder_level=5, is_active=False
+        )
+
+    def _product(self, code, name, stock, reorder_level, **params):
+        return Product.objects.create(
+            code=code,
+            name=name,
+            unit=self.unit,
+            unit_in_stock=stock,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=reorder_level,
+            **params
+        )
+
+    def test_low_stock_list(self):
+        """Test listing active products at or below their reorder level"""
+
+        res = self.client.get(LOW_STOCK_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [product['name'] for product in res.data['results']],
+            ['Emperador', 'Ginebra', 'Tanduay']
+        )
+
+    def test_low_stock_combines_with_filters(self):
+        """Test that the product list filters narrow the low-stock list"""
+
+        res = self.client.get(LOW_STOCK_URL, {'stock_max': '0'})
+
+        self.assertEqual(
+            [product['name'] for product in res.data['results']],
+            ['Tanduay']
+        )
+
+    def test_summary(self):
+        """Test the dashboard product counts"""
+
+        res = self.client.get(SUMMARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {'active': 4, 'low_stock': 3, 'out_of_stock': 1}
+        )
+
+    def test_low_stock_by_non_manager(self):
+        """Test that cashiers cannot see the reorder list"""
+
+        cashier = get_user_model().objects.create_cashier(
+            'testcashier808@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(cashier)
+
+        self.assertEqual(
+            self.client.get(LOW_STOCK_URL).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+        self.assertEqual(
+            self.client.get(SUMMARY_URL).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
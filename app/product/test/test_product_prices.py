@@ -0,0 +1,199 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from psycopg2.extras import DateTimeTZRange
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Product, ProductPrice
+
+from product import prices
+
+
+def prices_url(product_id):
+    """Return the price history URL of a product"""
+    return reverse('product:product-price-history', args=[product_id])
+
+
+def price_url(product_id):
+    """Return the point-in-time price URL of a product"""
+    return reverse('product:product-price', args=[product_id])
+
+
+def detail_url(product_id):
+    """Return product detail URL"""
+    return reverse('product:product-detail', args=[product_id])
+
+
+class ProductPriceApiTests(TestCase):
+    """Test the price history and scheduled prices of products"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager929@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.product = Product.objects.create(
+            code='8001',
+            name='Ginebra',
+            unit=self.unit,
+            unit_in_stock=10,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=5
+        )
+
+    def _schedule(self, valid_from, unit_price='80.00', discount='10.00'):
+        return self.client.post(prices_url(self.product.id), {
+            'unit_price': unit_price,
+            'discount_percentage': discount,
+            'valid_from': valid_from.isoformat()
+        }, format='json')
+
+    def _price_at(self, at):
+        res = self.client.get(price_url(self.product.id), {
+            'at': at.isoformat()
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res.data['unit_price']
+
+    def test_creating_product_records_price(self):
+        """Test that a new product starts its price history"""
+
+        res = self.client.get(price_url(self.product.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['unit_price'], '100.00')
+        self.assertIsNone(res.data['valid_to'])
+
+    def test_schedule_future_price(self):
+        """Test that a future price ends the current one and is not due"""
+
+        starts = timezone.now() + timedelta(hours=1)
+        res = self._schedule(starts)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._price_at(timezone.now()), '100.00')
+        self.assertEqual(
+            self._price_at(starts + timedelta(hours=1)),
+            '80.00'
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_price, Decimal('100.00'))
+
+        history = self.client.get(prices_url(self.product.id)).data
+        self.assertEqual(
+            [price['unit_price'] for price in history],
+            ['100.00', '80.00']
+        )
+        self.assertEqual(history[0]['valid_to'], history[1]['valid_from'])
+
+    def test_apply_due_prices(self):
+        """Test that due prices are copied to the products"""
+
+        starts = timezone.now() + timedelta(hours=1)
+        self._schedule(starts)
+
+        updated = prices.apply_due_prices(at=starts + timedelta(minutes=1))
+
+        self.assertEqual(updated, [self.product.id])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_price, Decimal('80.00'))
+        self.assertEqual(self.product.effective_price, Decimal('72.00'))
+        self.assertEqual(self.product.prices.count(), 2)
+
+    def test_schedule_price_due_now(self):
+        """Test that a price starting now is applied at once"""
+
+        res = self._schedule(timezone.now())
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_price, Decimal('80.00'))
+        self.assertEqual(self.product.prices.count(), 2)
+
+    def test_product_update_records_price(self):
+        """Test that editing a price keeps the scheduled prices"""
+
+        starts = timezone.now() + timedelta(hours=1)
+        self._schedule(starts)
+
+        self.client.patch(detail_url(self.product.id), {'unit_price': 90})
+
+        history = self.client.get(prices_url(self.product.id)).data
+        self.assertEqual(
+            [price['unit_price'] for price in history],
+            ['90.00', '80.00']
+        )
+        self.assertEqual(history[0]['valid_to'], history[1]['valid_from'])
+
+    def test_overlapping_prices_rejected(self):
+        """Test that the database rejects overlapping prices"""
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProductPrice.objects.create(
+                product=self.product,
+                unit_price=50,
+                discount_percentage=0,
+                valid_during=DateTimeTZRange(
+                    timezone.now() - timedelta(days=1),
+                    timezone.now() + timedelta(days=1)
+                )
+            )
+
+    def test_schedule_duplicate_start(self):
+        """Test that two prices cannot start at the same time"""
+
+        starts = timezone.now() + timedelta(hours=1)
+        self._schedule(starts)
+
+        res = self._schedule(starts, unit_price='70.00')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('valid_from', res.data)
+
+    def test_price_at_single_query(self):
+        """Test that the point-in-time price takes one lookup"""
+
+        with self.assertNumQueries(1):
+            res = self.client.get(price_url(self.product.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_price_at_invalid(self):
+        """Test malformed timestamps and unknown products"""
+
+        res = self.client.get(price_url(self.product.id), {'at': 'noon'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('at', res.data)
+
+        res = self.client.get(price_url(self.product.id + 1))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_schedule_by_non_manager(self):
+        """Test that cashiers cannot schedule prices"""
+
+        cashier = get_user_model().objects.create_cashier(
+            'testcashier929@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(cashier)
+
+        res = self._schedule(timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            self.client.get(prices_url(self.product.id)).status_code,
+            status.HTTP_200_OK
+        )
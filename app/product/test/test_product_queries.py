@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category, Product
+
+PRODUCTS_URL = reverse('product:product-list')
+
+
+def detail_url(product_id):
+    """Return product detail URL"""
+
+    return reverse('product:product-detail', args=[product_id])
+
+
+def sample_products(count, categories_per_product=3):
+    """Create products, each with its own unit and categories"""
+
+    products = []
+    for index in range(count):
+        unit = Unit.objects.create(
+            name=f'unit {index}',
+            short_name=f'u{index}'
+        )
+        product = Product.objects.create(
+            code=f'{unit.id:06d}',
+            name=f'Product {index}',
+            unit=unit,
+            unit_in_stock=100,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=50
+        )
+        product.categories.set([
+            Category.objects.create(name=f'Category {index}-{number}')
+            for number in range(categories_per_product)
+        ])
+        products.append(product)
+
+    return products
+
+
+class ProductQueryCountTests(TestCase):
+    """Test that product endpoints run a fixed number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager101@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_query_count_independent_of_rows(self):
+        """Test that listing more products does not add queries"""
+
+        sample_products(2)
+        few = self._count_list_queries()
+
+        sample_products(10)
+        many = self._count_list_queries()
+
+        self.assertEqual(few, many)
+
+    def test_list_query_count(self):
+        """Test listing products with categories runs three queries"""
+
+        sample_products(5)
+
+        # ETag aggregate, page of products, prefetched categories
+        with self.assertNumQueries(3):
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(len(res.data['results']), 5)
+        self.assertEqual(len(res.data['results'][0]['categories']), 3)
+
+    def test_retrieve_query_count(self):
+        """Test retrieving a product with relations runs three queries"""
+
+        product = sample_products(1, categories_per_product=5)[0]
+
+        # ETag aggregate, product with its unit, prefetched categories
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(product.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['unit']['id'], product.unit_id)
+        self.assertEqual(len(res.data['categories']), 5)
@@ -0,0 +1,191 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Product
+
+PRODUCTS_URL = reverse('product:product-list')
+
+
+def sample_product(unit, **params):
+    defaults = {
+        'code': '000101',
+        'name': 'Ginebra',
+        'unit_in_stock': 100,
+        'unit_price': 100,
+        'discount_percentage': 0,
+        'reorder_level': 50
+    }
+    defaults.update(params)
+
+    return Product.objects.create(unit=unit, **defaults)
+
+
+class ProductSearchApiTests(TestCase):
+    """Test full-text search on the product list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier101@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+
+    def _search(self, text, **params):
+        res = self.client.get(PRODUCTS_URL, {'search': text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item['id'] for item in res.data['results']]
+
+    def test_search_partial_name(self):
+        """Test that a name prefix finds the product"""
+
+        gin = sample_product(self.unit, code='1001', name='Ginebra San Miguel')
+        sample_product(self.unit, code='1002', name='Red Horse')
+
+        self.assertEqual(self._search('gineb'), [gin.id])
+        self.assertEqual(self._search('san mig'), [gin.id])
+
+    def test_search_partial_code(self):
+        """Test that a code prefix finds the product"""
+
+        sample_product(self.unit, code='4800016', name='Piattos')
+        chips = sample_product(self.unit, code='4900021', name='Nova')
+
+        self.assertEqual(self._search('49000'), [chips.id])
+
+    def test_search_ranks_code_above_name(self):
+        """Test that code matches are ranked before name matches"""
+
+        by_name = sample_product(self.unit, code='2001', name='Coke 1500')
+        by_code = sample_product(self.unit, code='1500', name='Sprite')
+
+        self.assertEqual(self._search('1500'), [by_code.id, by_name.id])
+
+    def test_search_vector_follows_updates(self):
+        """Test that renaming a product updates its search vector"""
+
+        product = sample_product(self.unit, code='3001', name='Tanduay')
+        product.name = 'Emperador'
+        product.save()
+
+        self.assertEqual(self._search('tandu'), [])
+        self.assertEqual(self._search('emper'), [product.id])
+
+    def test_search_results_are_paginated(self):
+        """Test that search results are paginated"""
+
+        for index in range(3):
+            sample_product(self.unit, code=f'500{index}', name='Lucky Me')
+
+        res = self.client.get(PRODUCTS_URL, {
+            'search': 'lucky',
+            'page_size': 2
+        })
+        self.assertEqual(len(res.data['results']), 2)
+
+        res = self.client.get(res.data['next'])
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_search_ignores_query_syntax(self):
+        """Test that tsquery operators in the input are not interpreted"""
+
+        sample_product(self.unit, code='6001', name='Oishi')
+
+        self.assertEqual(self._search('!&|():*'), [])
+
+
+class ProductFuzzySearchApiTests(TestCase):
+    """Test trigram fuzzy matching on the product list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.cashier = get_user_model().objects.create_cashier(
+            'testcashier102@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(self.cashier)
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+
+    def test_fuzzy_matches_misspelled_name(self):
+        """Test that a misspelled name still finds the product"""
+
+        gin = sample_product(self.unit, code='1001', name='Ginebra')
+        sample_product(self.unit, code='1002', name='Red Horse')
+
+        res = self.client.get(PRODUCTS_URL, {'fuzzy': 'ginebrra'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [gin.id])
+
+    def test_fuzzy_ranks_by_similarity(self):
+        """Test that the closest match comes first"""
+
+        close = sample_product(self.unit, code='2001', name='Chocolate')
+        far = sample_product(self.unit, code='2002', name='Chocolate Milk')
+
+        res = self.client.get(PRODUCTS_URL, {'fuzzy': 'chocolat'})
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [close.id, far.id])
+
+    def test_fuzzy_threshold(self):
+        """Test that a higher similarity threshold drops weak matches"""
+
+        sample_product(self.unit, code='3001', name='Chocolate Milk')
+
+        res = self.client.get(PRODUCTS_URL, {
+            'fuzzy': 'chocolat',
+            'similarity': 0.9
+        })
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_fuzzy_low_threshold(self):
+        """Test that a threshold below the default finds weaker matches"""
+
+        milk = sample_product(self.unit, code='3001', name='Chocolate Milk')
+
+        res = self.client.get(PRODUCTS_URL, {
+            'fuzzy': 'milk tea',
+            'similarity': 0.2
+        })
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']],
+            [milk.id]
+        )
+
+    def test_fuzzy_leaves_connection_settings(self):
+        """Test that the similarity threshold of the connection is kept"""
+
+        sample_product(self.unit, code='3001', name='Chocolate Milk')
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(PRODUCTS_URL, {
+                'fuzzy': 'chocolat',
+                'similarity': 0.5
+            })
+
+        self.assertFalse(any(
+            'set_config' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_fuzzy_invalid_threshold(self):
+        """Test that an out of range threshold is rejected"""
+
+        res = self.client.get(PRODUCTS_URL, {
+            'fuzzy': 'chocolat',
+            'similarity': 2
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
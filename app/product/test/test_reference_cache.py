@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Category
+
+UNITS_URL = reverse('product:unit-list')
+CATEGORIES_URL = reverse('product:category-list')
+PRODUCTS_URL = reverse('product:product-list')
+
+
+class ReferenceCacheTests(TestCase):
+    """Test the cached unit and category tables"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager606@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.category = Category.objects.create(name='Liquor')
+
+    def test_list_served_from_cache(self):
+        """Test that a repeated list does not query the database"""
+
+        first = self.client.get(UNITS_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(UNITS_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_not_modified_served_from_cache(self):
+        """Test that a conditional list is answered from the cache"""
+
+        etag = self.client.get(CATEGORIES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_save_invalidates_list(self):
+        """Test that saving a unit drops the cached list"""
+
+        self.client.get(UNITS_URL)
+        Unit.objects.create(name='case', short_name='cs')
+
+        res = self.client.get(UNITS_URL)
+
+        self.assertEqual(
+            [unit['name'] for unit in res.data['results']],
+            ['bottle', 'case']
+        )
+
+    def test_relations_validated_from_cache(self):
+        """Test that unit and category ids are checked without queries"""
+
+        payload = {
+            'code': '9001',
+            'name': 'Ginebra',
+            'unit': self.unit.id,
+            'unit_in_stock': 10,
+            'unit_price': '90.00',
+            'categories': [self.category.id],
+            'discount_percentage': '0.00',
+            'reorder_level': 5
+        }
+        self.client.post(PRODUCTS_URL, {**payload, 'code': '9000'})
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.post(PRODUCTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(any(
+            'FROM "core_unit"' in query['sql'] or
+            'FROM "core_category" WHERE' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_unknown_relation_rejected(self):
+        """Test that an id missing from the table is still rejected"""
+
+        res = self.client.post(PRODUCTS_URL, {
+            'code': '9001',
+            'name': 'Ginebra',
+            'unit': self.unit.id + 100,
+            'unit_in_stock': 10,
+            'unit_price': '90.00',
+            'categories': [self.category.id],
+            'discount_percentage': '0.00',
+            'reorder_level': 5
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('unit', res.data)
+
+    def test_relations_saved_by_another_worker(self):
+        """Test that ids missing from the cache are looked up once"""
+
+        payload = {
+            'code': '9001',
+            'name': 'Ginebra',
+            'unit': self.unit.id,
+            'unit_in_stock': 10,
+            'unit_price': '90.00',
+            'categories': [self.category.id],
+            'discount_percentage': '0.00',
+            'reorder_level': 5
+        }
+        self.client.post(PRODUCTS_URL, {**payload, 'code': '9000'})
+        self.client.get(UNITS_URL)
+        # Inserted without the signals, as another worker would have
+        unit, = Unit.objects.bulk_create([Unit(name='case', short_name='cs')])
+
+        res = self.client.post(PRODUCTS_URL, {**payload, 'unit': unit.id})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['unit'], unit.id)
+
+        res = self.client.get(UNITS_URL)
+        self.assertEqual(
+            [unit['name'] for unit in res.data['results']],
+            ['bottle', 'case']
+        )
@@ -0,0 +1,251 @@
+import threading
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Unit, Product, StockMovement, StockSnapshot
+
+from product import bulk, stock
+
+
+def movements_url(product_id):
+    """Return the stock movements URL of a product"""
+    return reverse('product:product-stock-movements', args=[product_id])
+
+
+def stock_url(product_id):
+    """Return the point-in-time stock URL of a product"""
+    return reverse('product:product-stock', args=[product_id])
+
+
+class StockLedgerTests(TestCase):
+    """Test the stock movement ledger and snapshots"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager939@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.product = Product.objects.create(
+            code='8001',
+            name='Ginebra',
+            unit=self.unit,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=5
+        )
+
+    def _move(self, kind, quantity, **params):
+        return self.client.post(
+            movements_url(self.product.id),
+            {'kind': kind, 'quantity': quantity, **params},
+            format='json'
+        )
+
+    def _movement(self, quantity, created_at):
+        return StockMovement(
+            product_id=self.product.id,
+            kind=StockMovement.ADJUSTMENT,
+            quantity=quantity,
+            created_at=created_at
+        )
+
+    def test_movements_update_stock(self):
+        """Test that recorded movements are applied to the stock"""
+
+        self.assertEqual(
+            self._move('receipt', 24, note='DR#1').status_code,
+            status.HTTP_201_CREATED
+        )
+        self._move('sale', -5)
+        self._move('return', 1)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_in_stock, 20)
+
+        res = self.client.get(movements_url(self.product.id))
+        self.assertEqual(
+            [(item['kind'], item['quantity']) for item in res.data['results']],
+            [('return', 1.0), ('sale', -5.0), ('receipt', 24.0)]
+        )
+        self.assertEqual(res.data['results'][0]['user'], self.manager.id)
+
+    def test_quantity_sign(self):
+        """Test that quantities must move the stock the way of their kind"""
+
+        for kind, quantity in (('sale', 5), ('receipt', -5),
+                               ('adjustment', 0)):
+            res = self._move(kind, quantity)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('quantity', res.data)
+
+    def test_cashier_movements(self):
+        """Test that cashiers record sales but not receipts"""
+
+        cashier = get_user_model().objects.create_cashier(
+            'testcashier939@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(cashier)
+        stock.record_movement(self.product.id, StockMovement.RECEIPT, 1)
+
+        self.assertEqual(
+            self._move('sale', -1).status_code,
+            status.HTTP_201_CREATED
+        )
+        self.assertEqual(
+            self._move('receipt', 10).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+        self.assertEqual(
+            self.client.get(movements_url(self.product.id)).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+
+    def test_product_save_keeps_concurrent_movement(self):
+        """Test that saving a stale product does not overwrite the stock"""
+
+        stale = Product.objects.get(pk=self.product.pk)
+        stock.record_movement(self.product.id, StockMovement.RECEIPT, 12)
+
+        stale.name = 'Ginebra San Miguel'
+        stale.save()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, 'Ginebra San Miguel')
+        self.assertEqual(self.product.unit_in_stock, 12)
+
+    def test_balance_at_from_snapshots(self):
+        """Test rebuilding past balances from snapshots and movements"""
+
+        start = timezone.now() - timedelta(days=10)
+        stock.record_movements([
+            self._movement(10, start),
+            self._movement(5, start + timedelta(days=2)),
+            self._movement(-3, start + timedelta(days=4)),
+        ])
+
+        self.assertEqual(stock.take_snapshots(start + timedelta(days=3)), 1)
+        self.assertEqual(stock.take_snapshots(start + timedelta(days=5)), 1)
+        # Nothing moved since the last snapshot
+        self.assertEqual(stock.take_snapshots(start + timedelta(days=6)), 0)
+
+        self.assertEqual(
+            StockSnapshot.objects.order_by('taken_at')
+            .values_list('balance', flat=True)[1],
+            12
+        )
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                stock.balance_at(self.product.id, start + timedelta(days=3)),
+                15
+            )
+        self.assertEqual(
+            stock.balance_at(self.product.id, start + timedelta(days=1)),
+            10
+        )
+        self.assertEqual(
+            stock.balance_at(self.product.id, start - timedelta(days=1)),
+            0
+        )
+
+        res = self.client.get(stock_url(self.product.id), {
+            'at': (start + timedelta(days=7)).isoformat()
+        })
+        self.assertEqual(res.data['balance'], 12)
+
+    def test_bulk_upsert_records_counts(self):
+        """Test that bulk stock counts are recorded as adjustments"""
+
+        stock.record_movement(self.product.id, StockMovement.RECEIPT, 4)
+        row = {
+            'code': '8002',
+            'name': 'Tanduay',
+            'unit': self.unit.id,
+            'unit_in_stock': 7,
+            'unit_price': '90.00',
+            'discount_percentage': '0.00',
+            'reorder_level': 5
+        }
+
+        bulk.upsert_products([{'code': '8001', 'unit_in_stock': 10}, row])
+
+        for product in Product.objects.all():
+            ledger = product.stock_movements.aggregate(
+                total=Sum('quantity')
+            )['total']
+            self.assertEqual(ledger, product.unit_in_stock)
+        self.assertEqual(
+            Product.objects.get(code='8001').unit_in_stock,
+            10
+        )
+
+
+class StockSnapshotConcurrencyTests(TransactionTestCase):
+    """Test snapshots taken while movements are being committed"""
+
+    def setUp(self):
+        unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.product = Product.objects.create(
+            code='8001',
+            name='Ginebra',
+            unit=unit,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=5
+        )
+
+    @override_settings(STOCK_SNAPSHOT_LAG=0)
+    def test_snapshot_waits_for_open_transactions(self):
+        """Test that a movement committed after a snapshot is kept"""
+
+        stock.record_movements([StockMovement(
+            product_id=self.product.id,
+            kind=StockMovement.RECEIPT,
+            quantity=31,
+            created_at=timezone.now() - timedelta(minutes=1)
+        )])
+        recorded = threading.Event()
+        snapshotted = threading.Event()
+
+        def receive():
+            try:
+                with transaction.atomic():
+                    connection.cursor().execute('SELECT 1')
+                    stock.record_movement(
+                        self.product.id,
+                        StockMovement.RECEIPT,
+                        5
+                    )
+                    recorded.set()
+                    snapshotted.wait(10)
+            finally:
+                connection.close()
+
+        receiver = threading.Thread(target=receive)
+        receiver.start()
+        self.assertTrue(recorded.wait(10))
+        try:
+            self.assertEqual(stock.take_snapshots(), 1)
+        finally:
+            snapshotted.set()
+            receiver.join()
+
+        self.assertEqual(StockSnapshot.objects.get().balance, 31)
+        self.assertEqual(
+            stock.balance_at(self.product.id, timezone.now()),
+            36
+        )
@@ -0,0 +1,178 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from core.models import Unit, Product, StockMovement, StockShard
+
+from product import stock
+
+
+def shards_url(product_id):
+    """Return the stock shards URL of a product"""
+    return reverse('product:product-stock-shards', args=[product_id])
+
+
+def movements_url(product_id):
+    """Return the stock movements URL of a product"""
+    return reverse('product:product-stock-movements', args=[product_id])
+
+
+class StockShardTests(TestCase):
+    """Test conditional stock decrements and sharded stock counters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager949@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+        self.unit = Unit.objects.create(name='bottle', short_name='btl')
+        self.product = Product.objects.create(
+            code='8001',
+            name='Ginebra',
+            unit=self.unit,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=5
+        )
+        stock.record_movement(self.product.id, StockMovement.RECEIPT, 10)
+
+    def _ledger(self):
+        return self.product.stock_movements.aggregate(
+            total=Sum('quantity')
+        )['total']
+
+    def _shards(self):
+        return list(
+            StockShard.objects
+            .filter(product=self.product)
+            .order_by('shard')
+            .values_list('quantity', flat=True)
+        )
+
+    def test_sell(self):
+        """Test that a sale decrements the stock and writes the ledger"""
+
+        movement = stock.sell(self.product.id, 3, note='OR#1')
+
+        self.assertEqual(movement.quantity, -3)
+        self.assertEqual(
+            StockMovement.objects.get(pk=movement.pk).note,
+            'OR#1'
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_in_stock, 7)
+        self.assertEqual(self._ledger(), 7)
+
+    def test_sell_not_enough_stock(self):
+        """Test that a sale larger than the stock is refused"""
+
+        with self.assertRaises(ValidationError):
+            stock.sell(self.product.id, 11)
+
+        res = self.client.post(
+            movements_url(self.product.id),
+            {'kind': 'sale', 'quantity': -11},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', res.data)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_in_stock, 10)
+        self.assertEqual(self._ledger(), 10)
+
+    def test_shard_and_gather_stock(self):
+        """Test spreading the stock over shards and gathering it back"""
+
+        res = self.client.post(
+            shards_url(self.product.id),
+            {'shards': 4},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'shards': 4, 'unit_in_stock': 10})
+        self.assertEqual(self._shards(), [4, 2, 2, 2])
+
+        stock.sell(self.product.id, 2)
+        self.assertEqual(sum(self._shards()), 8)
+
+        self.assertEqual(stock.shard_stock(self.product.id, 0), 8)
+        self.assertEqual(self._shards(), [])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_in_stock, 8)
+        self.assertEqual(self.product.stock_shards, 0)
+
+    def test_sell_across_shards(self):
+        """Test that a sale no single shard covers drains several"""
+
+        stock.shard_stock(self.product.id, 4)
+
+        stock.sell(self.product.id, 9)
+
+        self.assertEqual(sum(self._shards()), 1)
+        self.assertEqual(self._ledger(), 1)
+        with self.assertRaises(ValidationError):
+            stock.sell(self.product.id, 2)
+
+    def test_movements_on_sharded_product(self):
+        """Test that other movements land on the first shard"""
+
+        stock.shard_stock(self.product.id, 4)
+
+        stock.record_movement(self.product.id, StockMovement.RECEIPT, 5)
+
+        self.assertEqual(self._shards(), [9, 2, 2, 2])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_in_stock, 15)
+
+    def test_sync_shards(self):
+        """Test that the stock of sharded products follows their shards"""
+
+        stock.shard_stock(self.product.id, 2)
+        stock.sell(self.product.id, 1)
+        stock.sell(self.product.id, 1)
+
+        self.assertEqual(stock.sync_shards(), 1)
+        self.assertEqual(stock.sync_shards(), 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.unit_in_stock, 8)
+        self.assertEqual(self._ledger(), 8)
+
+    def test_shard_stock_invalid(self):
+        """Test that the shard count is validated"""
+
+        for shards in (-1, 65, 'many', True):
+            res = self.client.post(
+                shards_url(self.product.id),
+                {'shards': shards},
+                format='json'
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('shards', res.data)
+
+    def test_shard_stock_by_non_manager(self):
+        """Test that cashiers cannot shard the stock"""
+
+        cashier = get_user_model().objects.create_cashier(
+            'testcashier949@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(cashier)
+
+        res = self.client.post(
+            shards_url(self.product.id),
+            {'shards': 4},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
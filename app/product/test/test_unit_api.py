@@ -62,7 +62,7 @@ class PrivateUnitApiTests(TestCase):
         units = Unit.objects.all().order_by('name')
         serializer = UnitSerializer(units, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_successful_retrieve_units_by_non_manager(self):
         """Test success retrieve units by non-manager"""
@@ -79,7 +79,7 @@ class PrivateUnitApiTests(TestCase):
         units = Unit.objects.all().order_by('name')
         serializer = UnitSerializer(units, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_successful_create_unit_by_manager(self):
         """Test successful creation of a new unit by manager"""
@@ -11,5 +11,10 @@ router.register('products', views.ProductViewSet)
 app_name = 'product'
 
 urlpatterns = [
+    path(
+        'snapshot/',
+        views.CatalogSnapshotView.as_view(),
+        name='snapshot'
+    ),
     path('', include(router.urls))
 ]
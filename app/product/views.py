@@ -1,13 +1,41 @@
-from rest_framework import (viewsets, mixins)
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, F, FloatField, Max, Prefetch, Q
+from django.db.models.functions import Cast
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import (viewsets, mixins, status)
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from core.mixins import (CachedListMixin, ConditionalGetMixin,
+                         DeltaSyncMixin, ExportMixin, FastListMixin,
+                         FieldSelectionMixin)
 from core.permissions import IsAuthenticatedManager
-from core.models import Category, Unit, Product
+from core.search import fuzzy_search, similarity_threshold
+from core.models import LOW_STOCK, Category, Unit, Product, StockMovement
 
-from product import serializers
+from product import (bulk, cache, facets, prices, serializers, snapshot,
+                     stock)
+from product.filters import FILTER_PARAMS, filter_products, order_products
 
 
-class BaseProductAttrViewSet(viewsets.GenericViewSet,
+class BaseProductAttrViewSet(ExportMixin,
+                             CachedListMixin,
+                             ConditionalGetMixin,
+                             DeltaSyncMixin,
+                             FieldSelectionMixin,
+                             FastListMixin,
+                             viewsets.GenericViewSet,
                              mixins.ListModelMixin,
                              mixins.CreateModelMixin,
                              mixins.RetrieveModelMixin,
@@ -50,6 +78,7 @@ class UnitViewSet(BaseProductAttrViewSet):
 
     queryset = Unit.objects.all()
     serializer_class = serializers.UnitSerializer
+    list_cache = cache.units
 
 
 class CategoryViewSet(BaseProductAttrViewSet):
@@ -57,6 +86,38 @@ class CategoryViewSet(BaseProductAttrViewSet):
 
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
+    list_cache = cache.categories
+
+    @action(detail=False)
+    def facets(self, request):
+        """
+        Return the number of active products in each active category,
+        counting only the products matching the product list filters when
+        given
+        """
+        params = request.query_params
+        if any(param in params for param in FILTER_PARAMS):
+            products = Product.objects.all()
+            if 'is_active' not in params:
+                products = products.filter(is_active=True)
+            counts = facets.facet_counts(filter_products(products, params))
+        else:
+            counts = facets.facet_counts()
+
+        categories = sorted(
+            (category for category in cache.categories.instances().values()
+             if category.is_active),
+            key=lambda category: (category.name, category.id)
+        )
+
+        return Response([
+            {
+                'id': category.id,
+                'name': category.name,
+                'product_count': counts.get(category.id, 0)
+            }
+            for category in categories
+        ])
 
 
 class ProductViewSet(BaseProductAttrViewSet):
@@ -64,32 +125,306 @@ class ProductViewSet(BaseProductAttrViewSet):
 
     queryset = Product.objects.all().order_by('name')
     serializer_class = serializers.ProductSerializer
+    fast_list = True
+    permission_classes_by_action = {
+        **BaseProductAttrViewSet.permission_classes_by_action,
+        'bulk_upsert': [IsAuthenticatedManager],
+        'low_stock': [IsAuthenticatedManager],
+        'summary': [IsAuthenticatedManager],
+        'schedule_price': [IsAuthenticatedManager],
+        'stock_movements': [IsAuthenticatedManager],
+        'stock_shards': [IsAuthenticatedManager],
+    }
+    # Cashiers record sales and returns; stock otherwise moves by manager
+    manager_stock_kinds = (StockMovement.RECEIPT, StockMovement.ADJUSTMENT)
+    field_selection_actions = ('list', 'retrieve', 'low_stock')
+
+    def _search(self, queryset, text):
+        """Filter products matching every search term, best ranked first"""
+
+        terms = re.findall(r'\w+', text)
+        if not terms:
+            return queryset.none()
 
-    def _params_to_ints(self, qs):
-        """Convert a list of string IDs to a list of integers"""
+        # Prefix match each term so partial codes and names are found
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            config='simple',
+            search_type='raw'
+        )
 
-        return [int(str_id) for str_id in qs.split(',')]
+        # ts_rank() returns a real; widen it so the rank round-trips
+        # exactly through the pagination cursor
+        rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+
+        return queryset \
+            .filter(search_vector=query) \
+            .annotate(rank=rank) \
+            .order_by('-rank')
 
     def get_queryset(self):
         """Retrieve the products for the authenticated user"""
 
-        unit = self.request.query_params.get('unit')
-        categories = self.request.query_params.get('categories')
-        queryset = self.queryset
+        search = self.request.query_params.get('search')
+        fuzzy = self.request.query_params.get('fuzzy')
+        queryset = filter_products(self.queryset, self.request.query_params)
+        if self.action == 'low_stock':
+            queryset = queryset.filter(LOW_STOCK)
+
+        if search:
+            queryset = self._search(queryset, search)
+        elif fuzzy:
+            queryset = fuzzy_search(
+                queryset,
+                ('name', 'code'),
+                fuzzy,
+                similarity_threshold(self.request)
+            )
+        queryset = order_products(queryset, self.request.query_params)
+
+        return self._with_relations(queryset)
+
+    def _with_relations(self, queryset):
+        """Load the relations the serializer of the action renders"""
 
-        if unit:
-            unit_ids = self._params_to_ints(unit)
-            queryset = queryset.filter(unit_id__in=unit_ids)
-        if categories:
-            category_ids = self._params_to_ints(categories)
-            queryset = queryset.filter(categories__id__in=category_ids)
+        if self.action in ('retrieve', 'by_code'):
+            return queryset \
+                .select_related('unit') \
+                .prefetch_related('categories')
+
+        return queryset.prefetch_related(
+            Prefetch('categories', queryset=Category.objects.only('id'))
+        )
+
+    def get_validator_aggregates(self):
+        """Include the nested unit and categories of a product detail"""
+
+        aggregates = super().get_validator_aggregates()
+        if self.action == 'retrieve':
+            aggregates.update(
+                last_modified_unit=Max('unit__updated_at'),
+                last_modified_categories=Max('categories__updated_at')
+            )
 
-        return queryset.filter()
+        return aggregates
 
     def get_serializer_class(self):
         """Retrieve appropriate serializer class"""
 
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'by_code'):
             return serializers.ProductDetailSerializer
 
         return self.serializer_class
+
+    @action(detail=False, url_path='by-code/(?P<code>[^/]+)')
+    def by_code(self, request, code=None):
+        """
+        Retrieve a product detail by its exact code, without the stock so
+        sales do not evict the cached details
+        """
+        payload = cache.product_by_code.get(code)
+        if payload is None:
+            generation = cache.product_by_code.generation
+            product = get_object_or_404(
+                self._with_relations(Product.objects.all()),
+                code=code
+            )
+            payload = self.get_serializer(
+                product,
+                omit=['unit_in_stock']
+            ).data
+            cache.product_by_code.set(code, payload, generation)
+
+        return Response(payload)
+
+    @action(detail=False, url_path='low-stock')
+    def low_stock(self, request):
+        """List the active products at or below their reorder level"""
+
+        return self.list(request)
+
+    @action(detail=False)
+    def summary(self, request):
+        """Return the product counts of the dashboard"""
+
+        counts = Product.objects.filter(LOW_STOCK).aggregate(
+            low_stock=Count('id'),
+            out_of_stock=Count('id', filter=Q(unit_in_stock__lte=0))
+        )
+
+        return Response({
+            'active': Product.objects.filter(is_active=True).count(),
+            **counts
+        })
+
+    @action(detail=True, url_path='prices')
+    def price_history(self, request, pk=None):
+        """List the past, current and scheduled prices of a product"""
+
+        product = get_object_or_404(Product.objects.only('id'), pk=pk)
+        history = product.prices.order_by('valid_during')
+
+        return Response(
+            serializers.ProductPriceSerializer(history, many=True).data
+        )
+
+    @price_history.mapping.post
+    def schedule_price(self, request, pk=None):
+        """Schedule a price of a product from `valid_from` on"""
+
+        product = get_object_or_404(Product.objects.only('id'), pk=pk)
+        serializer = serializers.ProductPriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(product=product)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True)
+    def price(self, request, pk=None):
+        """Return the price of a product in effect at `?at=` (or now)"""
+
+        at = self._timestamp('at')
+        try:
+            price = prices.price_at(int(pk), at)
+        except ValueError:
+            price = None
+        if price is None:
+            raise Http404
+
+        return Response(serializers.ProductPriceSerializer(price).data)
+
+    @action(detail=True, url_path='stock-movements')
+    def stock_movements(self, request, pk=None):
+        """List the stock movements of a product, newest first"""
+
+        product = get_object_or_404(Product.objects.only('id'), pk=pk)
+        page = self.paginate_queryset(
+            product.stock_movements.order_by('-created_at')
+        )
+
+        return self.get_paginated_response(
+            serializers.StockMovementSerializer(page, many=True).data
+        )
+
+    @stock_movements.mapping.post
+    def record_stock_movement(self, request, pk=None):
+        """Record a receipt, sale, adjustment or return of a product"""
+
+        product = get_object_or_404(Product.objects.only('id'), pk=pk)
+        serializer = serializers.StockMovementSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data['kind'] in self.manager_stock_kinds \
+                and not IsAuthenticatedManager().has_permission(request, self):
+            self.permission_denied(request)
+
+        serializer.save(product_id=product.id, user=request.user)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], url_path='stock-shards')
+    def stock_shards(self, request, pk=None):
+        """
+        Spread the stock of a hot product over `shards` counter rows so
+        that concurrent sales do not queue on one row; 0 gathers it back
+        """
+        product = get_object_or_404(Product.objects.only('id'), pk=pk)
+        shards = request.data.get('shards')
+        if isinstance(shards, bool) or not isinstance(shards, int) or \
+                not 0 <= shards <= settings.STOCK_MAX_SHARDS:
+            raise ValidationError({'shards': [
+                f'Enter a whole number from 0 to '
+                f'{settings.STOCK_MAX_SHARDS}.'
+            ]})
+
+        unit_in_stock = stock.shard_stock(product.id, shards)
+
+        return Response({'shards': shards, 'unit_in_stock': unit_in_stock})
+
+    @action(detail=True)
+    def stock(self, request, pk=None):
+        """Return the stock of a product at `?at=` (or now)"""
+
+        product = get_object_or_404(Product.objects.only('id'), pk=pk)
+        at = self._timestamp('at')
+
+        return Response({
+            'product': product.id,
+            'at': DateTimeField().to_representation(at),
+            'balance': stock.balance_at(product.id, at)
+        })
+
+    def _timestamp(self, param):
+        """Parse a timestamp query parameter, defaulting to now"""
+
+        value = self.request.query_params.get(param)
+        if value is None:
+            return timezone.now()
+
+        try:
+            return DateTimeField().run_validation(value)
+        except ValidationError as error:
+            raise ValidationError({param: error.detail})
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_upsert(self, request):
+        """Create or update many products keyed by code"""
+
+        if not isinstance(request.data, list):
+            raise ValidationError(
+                {'non_field_errors': ['Expected a list of products.']}
+            )
+        if len(request.data) > settings.PRODUCT_BULK_MAX_ROWS:
+            raise ValidationError({'non_field_errors': [
+                f'At most {settings.PRODUCT_BULK_MAX_ROWS} products '
+                f'per request.'
+            ]})
+
+        result = bulk.upsert_products(request.data)
+
+        return Response({
+            'created': len(result.created),
+            'updated': len(result.updated),
+            'errors': result.errors
+        })
+
+
+class CatalogSnapshotView(APIView):
+    """
+    Serve the pre-rendered, gzip-compressed catalog of active units,
+    categories and products for terminal bootstrap
+    """
+    authentication_classes = (TokenAuthentication,)
+
+    def get(self, request):
+        """Return the newest snapshot, building it if none exists yet"""
+
+        path = snapshot.snapshot_path(snapshot.current_version())
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            # Serve the previous snapshot while the new one is rebuilt;
+            # terminals catch up through `?updated_since=`
+            path = snapshot.latest_snapshot()
+            if path is None:
+                path = snapshot.build_snapshot()
+            else:
+                snapshot.schedule_rebuild()
+            handle = open(path, 'rb')
+
+        etag = quote_etag(snapshot.version_of(path))
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            handle.close()
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = FileResponse(handle, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            content = gzip.GzipFile(fileobj=handle)
+            response = StreamingHttpResponse(
+                iter(lambda: content.read(FileResponse.block_size), b''),
+                content_type='application/json'
+            )
+
+        response['ETag'] = etag
+        response['Vary'] = 'Accept-Encoding'
+        return response
@@ -0,0 +1,113 @@
+from django.db.models import (Case, F, FloatField, OuterRef, Prefetch,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Coalesce, Greatest
+from rest_framework.exceptions import ValidationError
+
+from core.models import PurchaseOrderLine, ReceiveProduct
+
+OPEN = 'open'
+PARTIAL = 'partial'
+RECEIVED = 'received'
+CANCELLED = 'cancelled'
+STATUSES = (OPEN, PARTIAL, RECEIVED, CANCELLED)
+
+
+def with_line_fulfilment(queryset):
+    """Annotate purchase order lines with `quantity_received`"""
+
+    return queryset.annotate(quantity_received=_received(
+        purchase_order_id=OuterRef('purchase_order_id'),
+        product_id=OuterRef('product_id')
+    ))
+
+
+def with_fulfilment(queryset):
+    """
+    Annotate purchase orders with `quantity_ordered`, `quantity_received`,
+    `quantity_outstanding` and `status`, and prefetch their lines with
+    the quantity each received
+
+    The received quantities are correlated sums over the covering index
+    of the receipts that are not cancelled, so listing orders takes no
+    query per order. A line received in excess does not make up for
+    another one still outstanding.
+    """
+    lines = PurchaseOrderLine.objects.filter(purchase_order_id=OuterRef('pk'))
+    outstanding = with_line_fulfilment(lines).annotate(
+        outstanding=Greatest(
+            F('quantity') - F('quantity_received'),
+            Value(0.0)
+        )
+    )
+
+    return queryset \
+        .annotate(
+            quantity_ordered=_total(lines, 'quantity'),
+            quantity_received=_received(purchase_order_id=OuterRef('pk'))
+        ) \
+        .annotate(
+            quantity_outstanding=Case(
+                When(is_cancelled=True, then=Value(0.0)),
+                default=_total(outstanding, 'outstanding'),
+                output_field=FloatField()
+            )
+        ) \
+        .annotate(
+            status=Case(
+                When(is_cancelled=True, then=Value(CANCELLED)),
+                When(quantity_outstanding=0, then=Value(RECEIVED)),
+                When(quantity_received__gt=0, then=Value(PARTIAL)),
+                default=Value(OPEN)
+            )
+        ) \
+        .prefetch_related(Prefetch(
+            'lines',
+            queryset=with_line_fulfilment(PurchaseOrderLine.objects)
+            .order_by('id')
+        ))
+
+
+def filter_status(queryset, params):
+    """
+    Keep the annotated orders whose status is one of the comma separated
+    `?status=` values
+    """
+    value = params.get('status')
+    if not value:
+        return queryset
+
+    statuses = value.split(',')
+    unknown = set(statuses) - set(STATUSES)
+    if unknown:
+        raise ValidationError({'status': [
+            f'Enter statuses among {", ".join(STATUSES)}.'
+        ]})
+
+    # Cancelled orders are told apart without summing their receipts
+    if CANCELLED not in statuses:
+        queryset = queryset.filter(is_cancelled=False)
+    elif statuses == [CANCELLED]:
+        return queryset.filter(is_cancelled=True)
+
+    return queryset.filter(status__in=statuses)
+
+
+def _received(**filters):
+    receipts = ReceiveProduct.objects.filter(is_cancelled=False, **filters)
+
+    return _total(receipts, 'quantity')
+
+
+def _total(queryset, field):
+    """Sum `field` of the rows of a correlated queryset, 0 without rows"""
+
+    return Coalesce(
+        Subquery(
+            queryset
+            .values('purchase_order_id')
+            .annotate(total=Sum(field))
+            .values('total'),
+            output_field=FloatField()
+        ),
+        Value(0.0)
+    )
@@ -1,9 +1,20 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.contrib.postgres.aggregates import ArrayAgg
 from rest_framework import serializers
 
-from core.models import Product, Supplier, PurchaseOrder
+from core.models import (Product, Supplier, PurchaseOrder, PurchaseOrderLine,
+                         ReceiveProduct, StockMovement)
+from core.serializers import BatchedPrimaryKeyRelatedField, SparseFieldsMixin
+
+from product import stock
+
+BATCH_SIZE = 500
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Supplier objects"""
 
     class Meta:
@@ -20,19 +31,194 @@ class SupplierSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
-    """Serializer for Purchase Order object"""
+class PurchaseOrderLineSerializer(serializers.ModelSerializer):
+    """Serializer for one product of a purchase order"""
 
-    product = serializers.PrimaryKeyRelatedField(
-        queryset=Product.objects.all(),
+    product = BatchedPrimaryKeyRelatedField(
+        queryset=Product.objects.only('id')
     )
 
-    supplier = serializers.PrimaryKeyRelatedField(
+    # Annotated by fulfilment.with_line_fulfilment()
+    quantity_received = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = PurchaseOrderLine
+        fields = (
+            'id',
+            'product',
+            'quantity',
+            'unit_price',
+            'sub_total',
+            'quantity_received'
+        )
+        read_only_fields = ('id', 'sub_total')
+
+    def validate_quantity(self, value):
+        """Only positive quantities can be ordered"""
+
+        if value <= 0:
+            raise serializers.ValidationError(
+                'Ensure this value is greater than 0.'
+            )
+
+        return value
+
+
+class PurchaseOrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for Purchase Order object with its lines"""
+
+    supplier = BatchedPrimaryKeyRelatedField(
         queryset=Supplier.objects.all(),
     )
 
+    lines = PurchaseOrderLineSerializer(many=True, allow_empty=False)
+
+    # Annotated by fulfilment.with_fulfilment()
+    quantity_ordered = serializers.FloatField(read_only=True)
+    quantity_received = serializers.FloatField(read_only=True)
+    quantity_outstanding = serializers.FloatField(read_only=True)
+    status = serializers.CharField(read_only=True)
+
     class Meta:
         model = PurchaseOrder
+        fields = (
+            'id',
+            'required_date',
+            'supplier',
+            'is_cancelled',
+            'total',
+            'lines',
+            'quantity_ordered',
+            'quantity_received',
+            'quantity_outstanding',
+            'status'
+        )
+        read_only_fields = ('id', 'total')
+
+    def validate_lines(self, lines):
+        """
+        Check that every product is ordered on one line and compute the
+        sub total of every line
+        """
+
+        if len(lines) > settings.PURCHASE_ORDER_MAX_LINES:
+            raise serializers.ValidationError(
+                f'At most {settings.PURCHASE_ORDER_MAX_LINES} lines '
+                f'per order.'
+            )
+
+        field = PurchaseOrderLine._meta.get_field('sub_total')
+        errors = []
+        seen = set()
+        for line in lines:
+            line_errors = {}
+            pk = line['product'].pk
+            if pk in seen:
+                line_errors['product'] = ['Duplicate product in this order.']
+            seen.add(pk)
+
+            line['sub_total'] = _amount(
+                Decimal(str(line['quantity'])) * line['unit_price'],
+                field
+            )
+            if line['sub_total'] is None:
+                line_errors['sub_total'] = [_too_large(field)]
+            errors.append(line_errors)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        field = PurchaseOrder._meta.get_field('total')
+        if _amount(sum(line['sub_total'] for line in lines), field) is None:
+            raise serializers.ValidationError(
+                f'The order total is too large. {_too_large(field)}'
+            )
+
+        return lines
+
+    def create(self, validated_data):
+        lines = validated_data.pop('lines')
+
+        with transaction.atomic():
+            order = PurchaseOrder.objects.create(
+                total=sum(line['sub_total'] for line in lines),
+                **validated_data
+            )
+            self._insert_lines(order, lines)
+
+        return order
+
+    def update(self, instance, validated_data):
+        lines = validated_data.pop('lines', None)
+
+        with transaction.atomic():
+            if lines is not None:
+                # The lines sent replace the lines of the order
+                instance.lines.all().delete()
+                validated_data['total'] = sum(
+                    line['sub_total'] for line in lines
+                )
+                self._insert_lines(instance, lines)
+
+            return super().update(instance, validated_data)
+
+    def _insert_lines(self, order, lines):
+        PurchaseOrderLine.objects.bulk_create(
+            [PurchaseOrderLine(purchase_order=order, **line)
+             for line in lines],
+            batch_size=BATCH_SIZE
+        )
+
+
+class ReceiveProductListSerializer(serializers.ListSerializer):
+    """
+    Save the lines of a delivery in one transaction, raising the stock of
+    every product received in one `UPDATE`
+    """
+
+    def create(self, validated_data):
+        request = self.context.get('request')
+        user = request.user if request is not None else None
+
+        with transaction.atomic():
+            receipts = ReceiveProduct.objects.bulk_create(
+                [ReceiveProduct(**line) for line in validated_data],
+                batch_size=BATCH_SIZE
+            )
+            stock.record_movements([
+                StockMovement(
+                    product_id=receipt.product_id,
+                    kind=StockMovement.RECEIPT,
+                    quantity=receipt.quantity,
+                    note=str(receipt),
+                    user=user
+                )
+                for receipt in receipts
+            ])
+
+        return receipts
+
+
+class ReceiveProductSerializer(serializers.ModelSerializer):
+    """Serializer for one received line of a delivery"""
+
+    product = BatchedPrimaryKeyRelatedField(
+        queryset=Product.objects.only('id')
+    )
+    supplier = BatchedPrimaryKeyRelatedField(
+        queryset=Supplier.objects.only('id')
+    )
+    purchase_order = BatchedPrimaryKeyRelatedField(
+        queryset=PurchaseOrder.objects
+        .only('id', 'supplier_id', 'is_cancelled')
+        .annotate(product_ids=ArrayAgg('lines__product_id')),
+        required=False,
+        allow_null=True
+    )
+
+    class Meta:
+        model = ReceiveProduct
+        list_serializer_class = ReceiveProductListSerializer
         fields = (
             'id',
             'product',
@@ -41,6 +227,60 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
             'sub_total',
             'required_date',
             'supplier',
+            'purchase_order',
             'is_cancelled'
         )
-        read_only_fields = ('id',)
+        read_only_fields = ('id', 'is_cancelled')
+
+    def validate(self, attrs):
+        """Check that the purchase order expects the product received"""
+
+        order = attrs.get('purchase_order')
+        if order is None:
+            return attrs
+
+        if order.is_cancelled:
+            message = 'The purchase order is cancelled.'
+        elif order.supplier_id != attrs['supplier'].pk:
+            message = 'The purchase order is for another supplier.'
+        elif attrs['product'].pk not in order.product_ids:
+            message = 'The purchase order has no line for this product.'
+        else:
+            return attrs
+
+        raise serializers.ValidationError({'purchase_order': [message]})
+
+    def validate_quantity(self, value):
+        """Only positive quantities can be received"""
+
+        if value <= 0:
+            raise serializers.ValidationError(
+                'Ensure this value is greater than 0.'
+            )
+
+        return value
+
+
+def _amount(value, field):
+    """
+    Round `value` to the decimal places of the `field`, or None when it
+    does not fit its digits
+    """
+    limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+    if not value.is_finite() or abs(value) >= limit:
+        return None
+
+    value = value.quantize(
+        Decimal(10) ** -field.decimal_places,
+        rounding=ROUND_HALF_UP
+    )
+
+    return value if abs(value) < limit else None
+
+
+def _too_large(field):
+    return (
+        f'Ensure that there are no more than '
+        f'{field.max_digits - field.decimal_places} digits before the '
+        f'decimal point.'
+    )
@@ -65,18 +65,23 @@ def sample_supplier(**params):
 
 def sample_purchase_order(product, supplier, **params):
     defaults = {
-        'quantity': 120,
-        'unit_price': 110,
-        'sub_total': 1320,
-        'required_date': datetime.datetime(2021, 5, 17),
+        'required_date': datetime.date(2021, 5, 17),
+        'total': 13200,
     }
     defaults.update(params)
 
-    return PurchaseOrder.objects.create(
-        product=product,
+    purchase_order = PurchaseOrder.objects.create(
         supplier=supplier,
         **defaults
     )
+    purchase_order.lines.create(
+        product=product,
+        quantity=120,
+        unit_price=110,
+        sub_total=13200
+    )
+
+    return purchase_order
 
 
 class PublicPurchaseOrderApiTests(TestCase):
@@ -123,7 +128,7 @@ class PrivatePurchaseOrderApiTests(TestCase):
         purchase_orders = PurchaseOrder.objects.all()
         serializer = PurchaseOrderSerializer(purchase_orders, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_failed_retrieve_orders_by_non_manager(self):
         """Test failed retrieve orders by non-manager"""
@@ -142,24 +147,155 @@ class PrivatePurchaseOrderApiTests(TestCase):
         supplier = sample_supplier()
 
         payload = {
-            'product': product.id,
-            'quantity': 80,
-            'unit_price': 120,
-            'sub_total': 9600,
-            'required_date': datetime.datetime(2021, 5, 17),
+            'required_date': '2021-05-17',
             'supplier': supplier.id,
-            'is_cancelled': False
+            'is_cancelled': False,
+            'lines': [{
+                'product': product.id,
+                'quantity': 80,
+                'unit_price': 120
+            }]
         }
-        res = self.client.post(PURCHASE_ORDERS_URL, payload)
+        res = self.client.post(PURCHASE_ORDERS_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
         exists = PurchaseOrder.objects.filter(
-            product=payload['product'],
-            quantity=payload['quantity'],
-            unit_price=payload['unit_price'],
-            sub_total=payload['sub_total'],
-            supplier=payload['supplier'],
+            lines__product=product,
+            lines__quantity=80,
+            lines__unit_price=120,
+            lines__sub_total=9600,
+            supplier=supplier,
+            total=9600
         ).exists()
 
         self.assertTrue(exists)
+
+    def test_create_order_with_many_lines(self):
+        """Test that the lines of an order are saved together"""
+
+        unit = sample_unit()
+        supplier = sample_supplier()
+        products = [
+            sample_product(unit=unit, code=f'7{index:03}')
+            for index in range(30)
+        ]
+        payload = {
+            'required_date': '2021-05-17',
+            'supplier': supplier.id,
+            'lines': [
+                {'product': product.id, 'quantity': 3, 'unit_price': '9.99'}
+                for product in products
+            ]
+        }
+
+        with self.assertNumQueries(8):
+            res = self.client.post(
+                PURCHASE_ORDERS_URL,
+                payload,
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['total'], '899.10')
+        self.assertEqual(len(res.data['lines']), 30)
+        self.assertEqual(res.data['lines'][0]['sub_total'], '29.97')
+        self.assertEqual(res.data['quantity_ordered'], 90)
+
+    def test_create_order_invalid_lines(self):
+        """Test that unknown and repeated products are reported by line"""
+
+        unit = sample_unit()
+        product = sample_product(unit=unit)
+        payload = {
+            'required_date': '2021-05-17',
+            'supplier': sample_supplier().id,
+            'lines': [
+                {'product': product.id, 'quantity': 1, 'unit_price': 5},
+                {'product': product.id + 1, 'quantity': 1, 'unit_price': 5},
+                {'product': product.id, 'quantity': 2, 'unit_price': 5},
+            ]
+        }
+
+        res = self.client.post(PURCHASE_ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['lines'][0], {})
+        self.assertIn('product', res.data['lines'][1])
+
+        del payload['lines'][1]
+        res = self.client.post(PURCHASE_ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['lines'][0], {})
+        self.assertIn('product', res.data['lines'][1])
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+        payload['lines'] = []
+        res = self.client.post(PURCHASE_ORDERS_URL, payload, format='json')
+        self.assertIn('lines', res.data)
+
+    def test_create_order_amounts_too_large(self):
+        """Test that sub totals and totals must fit their columns"""
+
+        unit = sample_unit()
+        product = sample_product(unit=unit)
+        other = sample_product(unit=unit, code='000102')
+        payload = {
+            'required_date': '2021-05-17',
+            'supplier': sample_supplier().id,
+            'lines': [
+                {'product': product.id, 'quantity': 1, 'unit_price': 5},
+                {
+                    'product': other.id,
+                    'quantity': 1e9,
+                    'unit_price': '9999999999.00'
+                },
+            ]
+        }
+
+        res = self.client.post(PURCHASE_ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['lines'][0], {})
+        self.assertIn('sub_total', res.data['lines'][1])
+
+        payload['lines'] = [
+            {'product': product.id, 'quantity': 1, 'unit_price': '9e9'},
+            {'product': other.id, 'quantity': 1, 'unit_price': '9e9'},
+        ]
+        res = self.client.post(PURCHASE_ORDERS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('total', res.data['lines'][0])
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+    def test_update_order_lines(self):
+        """Test that sent lines replace the lines of an order"""
+
+        unit = sample_unit()
+        product = sample_product(unit=unit)
+        other = sample_product(unit=unit, code='000102')
+        purchase_order = sample_purchase_order(product, sample_supplier())
+
+        res = self.client.patch(detail_url(purchase_order.id), {
+            'lines': [
+                {'product': other.id, 'quantity': 4, 'unit_price': '2.50'}
+            ]
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        purchase_order.refresh_from_db()
+        self.assertEqual(purchase_order.total, 10)
+        self.assertEqual(
+            list(purchase_order.lines.values_list('product_id', flat=True)),
+            [other.id]
+        )
+
+        res = self.client.patch(
+            detail_url(purchase_order.id),
+            {'is_cancelled': True},
+            format='json'
+        )
+        self.assertEqual(res.data['status'], 'cancelled')
+        self.assertEqual(len(res.data['lines']), 1)
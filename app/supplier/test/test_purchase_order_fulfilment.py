@@ -0,0 +1,206 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Unit, Product, Supplier, PurchaseOrder,
+                         ReceiveProduct)
+
+PURCHASE_ORDERS_URL = reverse('supplier:purchase-order-list')
+
+
+def detail_url(purchase_order_id):
+    """Return purchase order detail URL"""
+
+    return reverse('supplier:purchase-order-detail', args=[purchase_order_id])
+
+
+class PurchaseOrderFulfilmentTests(TestCase):
+    """Test the received quantities and status of purchase orders"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager023@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+        unit = Unit.objects.create(name='box', short_name='bx')
+        self.product = Product.objects.create(
+            code='000101',
+            name='Ginebra',
+            unit=unit,
+            unit_price=100,
+            discount_percentage=0,
+            reorder_level=50
+        )
+        self.supplier = Supplier.objects.create(
+            code='000101',
+            name='Jeza',
+            contact_no=1010,
+            address='Central Balili, LTB',
+            email='testsupp@testdev.com'
+        )
+
+    def _order(self, quantity=10, products=None, **params):
+        order = PurchaseOrder.objects.create(
+            supplier=self.supplier,
+            required_date=datetime.date(2021, 5, 17),
+            **params
+        )
+        for product in products or [self.product]:
+            order.lines.create(
+                product=product,
+                quantity=quantity,
+                unit_price=50,
+                sub_total=quantity * 50
+            )
+
+        return order
+
+    def _receive(self, order, quantity, product=None, **params):
+        return ReceiveProduct.objects.create(
+            product=product or self.product,
+            supplier=self.supplier,
+            purchase_order=order,
+            quantity=quantity,
+            unit_price=50,
+            sub_total=quantity * 50,
+            required_date=datetime.date(2021, 5, 17),
+            **params
+        )
+
+    def _statuses(self, **params):
+        res = self.client.get(PURCHASE_ORDERS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return {
+            order['id']: (
+                order['quantity_received'],
+                order['quantity_outstanding'],
+                order['status']
+            )
+            for order in res.data['results']
+        }
+
+    def test_fulfilment(self):
+        """Test the received and outstanding quantities of each order"""
+
+        opened = self._order()
+        partial = self._order()
+        self._receive(partial, 4)
+        self._receive(partial, 3, is_cancelled=True)
+        received = self._order()
+        self._receive(received, 6)
+        self._receive(received, 6)
+        cancelled = self._order(is_cancelled=True)
+
+        self.assertEqual(self._statuses(), {
+            opened.id: (0, 10, 'open'),
+            partial.id: (4, 6, 'partial'),
+            received.id: (12, 0, 'received'),
+            cancelled.id: (0, 0, 'cancelled'),
+        })
+
+        res = self.client.get(detail_url(partial.id))
+        self.assertEqual(res.data['quantity_received'], 4)
+        self.assertEqual(res.data['lines'][0]['quantity_received'], 4)
+
+    def test_fulfilment_by_line(self):
+        """Test that a line received in excess leaves the others open"""
+
+        other = Product.objects.create(
+            code='000102',
+            name='Tanduay',
+            unit=self.product.unit,
+            unit_price=90,
+            discount_percentage=0,
+            reorder_level=50
+        )
+        order = self._order(products=[self.product, other])
+        self._receive(order, 20)
+
+        res = self.client.get(detail_url(order.id))
+
+        self.assertEqual(res.data['quantity_ordered'], 20)
+        self.assertEqual(res.data['quantity_received'], 20)
+        self.assertEqual(res.data['quantity_outstanding'], 10)
+        self.assertEqual(res.data['status'], 'partial')
+        self.assertEqual(
+            [line['quantity_received'] for line in res.data['lines']],
+            [20, 0]
+        )
+
+        self._receive(order, 10, product=other)
+        res = self.client.get(detail_url(order.id))
+        self.assertEqual(res.data['status'], 'received')
+
+    def test_filter_by_status(self):
+        """Test listing the orders of some statuses"""
+
+        opened = self._order()
+        partial = self._order()
+        self._receive(partial, 4)
+        cancelled = self._order(is_cancelled=True)
+
+        self.assertEqual(list(self._statuses(status='open')), [opened.id])
+        self.assertEqual(
+            list(self._statuses(status='cancelled')),
+            [cancelled.id]
+        )
+        self.assertEqual(
+            set(self._statuses(status='open,partial')),
+            {opened.id, partial.id}
+        )
+
+        res = self.client.get(PURCHASE_ORDERS_URL, {'status': 'late'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', res.data)
+
+    def test_list_query_count(self):
+        """Test that listing orders takes no query per order"""
+
+        for _ in range(2):
+            self._receive(self._order(), 4)
+        with self.assertNumQueries(3):
+            self.client.get(PURCHASE_ORDERS_URL)
+
+        for _ in range(10):
+            self._receive(self._order(), 4)
+        with self.assertNumQueries(3):
+            self.client.get(PURCHASE_ORDERS_URL)
+
+    def test_receiving_changes_validators(self):
+        """Test that a new receipt is not answered Not Modified"""
+
+        order = self._order()
+        etag = self.client.get(PURCHASE_ORDERS_URL)['ETag']
+
+        self._receive(order, 4)
+        res = self.client.get(PURCHASE_ORDERS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['status'], 'partial')
+
+    def test_create_returns_fulfilment(self):
+        """Test that a new order is returned open"""
+
+        res = self.client.post(PURCHASE_ORDERS_URL, {
+            'required_date': '2021-05-17',
+            'supplier': self.supplier.id,
+            'lines': [{
+                'product': self.product.id,
+                'quantity': 80,
+                'unit_price': 120
+            }]
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['status'], 'open')
+        self.assertEqual(res.data['quantity_outstanding'], 80)
+        self.assertEqual(res.data['lines'][0]['quantity_received'], 0)
@@ -0,0 +1,184 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (Unit, Product, Supplier, PurchaseOrder,
+                         ReceiveProduct, StockMovement)
+
+RECEIVE_PRODUCTS_URL = reverse('supplier:receive-product-list')
+
+
+def sample_product(unit, code, **params):
+    defaults = {
+        'name': f'Product {code}',
+        'unit_price': 100,
+        'discount_percentage': 0,
+        'reorder_level': 5
+    }
+    defaults.update(params)
+
+    return Product.objects.create(unit=unit, code=code, **defaults)
+
+
+def sample_supplier(**params):
+    defaults = {
+        'code': '000101',
+        'name': 'Jeza',
+        'contact_no': 1010,
+        'address': 'Central Balili, LTB',
+        'email': 'testsupp@testdev.com'
+    }
+    defaults.update(params)
+
+    return Supplier.objects.create(**defaults)
+
+
+class ReceiveProductApiTests(TestCase):
+    """Test receiving deliveries of products"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_manager(
+            'testmanager013@testdev.com',
+            'testmanpassword3214'
+        )
+        self.client.force_authenticate(self.manager)
+
+        self.unit = Unit.objects.create(name='box', short_name='bx')
+        self.supplier = sample_supplier()
+        self.products = [
+            sample_product(self.unit, f'9{index:03}') for index in range(20)
+        ]
+        self.order = PurchaseOrder.objects.create(
+            supplier=self.supplier,
+            required_date=datetime.date(2021, 5, 17)
+        )
+        self.order.lines.create(
+            product=self.products[0],
+            quantity=24,
+            unit_price=50,
+            sub_total=1200
+        )
+
+    def _line(self, product, quantity=12, **params):
+        line = {
+            'product': product.id,
+            'quantity': quantity,
+            'unit_price': '50.00',
+            'sub_total': f'{quantity * 50}.00',
+            'required_date': '2021-05-17',
+            'supplier': self.supplier.id
+        }
+        line.update(params)
+
+        return line
+
+    def test_receive_delivery(self):
+        """Test that every line is saved and added to the stock"""
+
+        lines = [self._line(product) for product in self.products]
+        lines[0]['purchase_order'] = self.order.id
+
+        res = self.client.post(RECEIVE_PRODUCTS_URL, lines, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 20)
+        self.assertEqual(res.data[0]['purchase_order'], self.order.id)
+        self.assertEqual(ReceiveProduct.objects.count(), 20)
+        for product in Product.objects.all():
+            self.assertEqual(product.unit_in_stock, 12)
+
+        movement = StockMovement.objects.get(product=self.products[0])
+        self.assertEqual(movement.kind, StockMovement.RECEIPT)
+        self.assertEqual(movement.note, f'RP#{res.data[0]["id"]}')
+        self.assertEqual(movement.user, self.manager)
+
+    def test_receive_query_count(self):
+        """Test that the queries do not grow with the lines"""
+
+        lines = [self._line(product) for product in self.products[:2]]
+        lines[0]['purchase_order'] = self.order.id
+        with self.assertNumQueries(11):
+            self.client.post(RECEIVE_PRODUCTS_URL, lines, format='json')
+
+        lines = [self._line(product) for product in self.products]
+        lines[0]['purchase_order'] = self.order.id
+        with self.assertNumQueries(11):
+            res = self.client.post(RECEIVE_PRODUCTS_URL, lines, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_receive_invalid_lines(self):
+        """Test that one invalid line rejects the whole delivery"""
+
+        cancelled = PurchaseOrder.objects.create(
+            supplier=self.supplier,
+            required_date=datetime.date(2021, 5, 17),
+            is_cancelled=True
+        )
+        cancelled.lines.create(
+            product=self.products[1],
+            quantity=1,
+            unit_price=50,
+            sub_total=50
+        )
+        lines = [
+            self._line(self.products[0]),
+            self._line(self.products[0], supplier=self.supplier.id + 1),
+            self._line(self.products[1], purchase_order=cancelled.id),
+            self._line(self.products[1], purchase_order=self.order.id),
+        ]
+
+        res = self.client.post(RECEIVE_PRODUCTS_URL, lines, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('supplier', res.data[1])
+        self.assertIn('purchase_order', res.data[2])
+        self.assertIn('purchase_order', res.data[3])
+
+        res = self.client.post(
+            RECEIVE_PRODUCTS_URL,
+            [self._line(self.products[2]),
+             self._line(self.products[2], quantity=0)],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', res.data[1])
+        self.assertFalse(ReceiveProduct.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_receive_not_a_list(self):
+        """Test that a delivery must be a non-empty list of lines"""
+
+        for payload in (self._line(self.products[0]), []):
+            res = self.client.post(
+                RECEIVE_PRODUCTS_URL,
+                payload,
+                format='json'
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_receive_by_non_manager(self):
+        """Test that cashiers cannot receive deliveries"""
+
+        cashier = get_user_model().objects.create_cashier(
+            'testcashier013@testdev.com',
+            'passtest0231'
+        )
+        self.client.force_authenticate(cashier)
+
+        res = self.client.post(
+            RECEIVE_PRODUCTS_URL,
+            [self._line(self.products[0])],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
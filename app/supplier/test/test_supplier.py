@@ -73,7 +73,7 @@ class PrivateUnitApiTests(TestCase):
         suppliers = Supplier.objects.all().order_by('name')
         serializer = SupplierSerializer(suppliers, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_successful_retrieve_suppliers_by_non_manager(self):
         """Test success retrieve suppliers by non-manager"""
@@ -102,7 +102,7 @@ class PrivateUnitApiTests(TestCase):
         suppliers = Supplier.objects.all().order_by('name')
         serializer = SupplierSerializer(suppliers, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_successful_create_supplier_by_manager(self):
         """Test successful creation of a new supplier by manager"""
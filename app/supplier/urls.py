@@ -8,6 +8,9 @@ router.register('suppliers', views.SupplierViewSet)
 router.register('purchase-orders',
                 views.PurchaseOrderViewSet,
                 basename='purchase-order')
+router.register('receive-products',
+                views.ReceiveProductViewSet,
+                basename='receive-product')
 
 app_name = 'supplier'
 
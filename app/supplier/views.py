@@ -1,13 +1,23 @@
-from rest_framework import (viewsets, mixins)
+from django.conf import settings
+from django.db.models import Max
+from rest_framework import (viewsets, mixins, status)
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
+from core.mixins import (ConditionalGetMixin, DeltaSyncMixin, ExportMixin,
+                         FieldSelectionMixin)
 from core.permissions import IsAuthenticatedManager
-from core.models import Supplier, PurchaseOrder
+from core.models import Supplier, PurchaseOrder, ReceiveProduct
 
-from supplier import serializers
+from supplier import fulfilment, serializers
 
 
-class BaseSupplierAttrViewSet(viewsets.GenericViewSet,
+class BaseSupplierAttrViewSet(ExportMixin,
+                              ConditionalGetMixin,
+                              DeltaSyncMixin,
+                              FieldSelectionMixin,
+                              viewsets.GenericViewSet,
                               mixins.ListModelMixin,
                               mixins.CreateModelMixin,
                               mixins.RetrieveModelMixin,
@@ -59,7 +69,77 @@ class PurchaseOrderViewSet(BaseSupplierAttrViewSet):
     serializer_class = serializers.PurchaseOrderSerializer
     permission_classes = (IsAuthenticatedManager,)
 
+    def get_queryset(self):
+        """Return orders with their fulfilment, filtered by `?status=`"""
+
+        queryset = fulfilment.with_fulfilment(self.queryset)
+        queryset = fulfilment.filter_status(
+            queryset,
+            self.request.query_params
+        )
+
+        return queryset.order_by('-created_at')
+
+    def get_validator_aggregates(self):
+        """Include the receipts counted in the fulfilment of the orders"""
+
+        aggregates = super().get_validator_aggregates()
+        aggregates['last_modified_receipts'] = Max(
+            'receiveproduct__updated_at'
+        )
+
+        return aggregates
+
+    def perform_create(self, serializer):
+        serializer.save()
+        self._annotate(serializer)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self._annotate(serializer)
+
+    def _annotate(self, serializer):
+        """Reload the saved order with its fulfilment"""
+
+        serializer.instance = fulfilment \
+            .with_fulfilment(self.queryset) \
+            .get(pk=serializer.instance.pk)
+
+
+class ReceiveProductViewSet(viewsets.GenericViewSet,
+                            mixins.ListModelMixin,
+                            mixins.RetrieveModelMixin):
+    """Receive deliveries of products into the stock"""
+
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticatedManager,)
+    queryset = ReceiveProduct.objects.all()
+    serializer_class = serializers.ReceiveProductSerializer
+
     def get_queryset(self):
         """Return objects"""
 
-        return self.queryset.order_by('-created_at')
+        return self.queryset.order_by('-created_at', '-id')
+
+    def create(self, request):
+        """Receive every line of a delivery, or none of them"""
+
+        if not isinstance(request.data, list):
+            raise ValidationError(
+                {'non_field_errors': ['Expected a list of received lines.']}
+            )
+        if len(request.data) > settings.RECEIVE_PRODUCT_MAX_LINES:
+            raise ValidationError({'non_field_errors': [
+                f'At most {settings.RECEIVE_PRODUCT_MAX_LINES} lines '
+                f'per delivery.'
+            ]})
+
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
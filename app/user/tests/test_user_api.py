@@ -138,7 +138,7 @@ class PrivateManageUserApiTests(TestCase):
         serializer = StaffUserSerializer(users, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_failed_retrieve_users_by_cashier(self):
         """Test failed retrieve users by cashier"""